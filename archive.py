@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Seekable compressed archive tier for closed batch files.
+
+An archive holds the exact bytes of one batch file, split into
+fixed-size blocks that are compressed independently:
+
+    b"SLARC1\\n" | block 0 | block 1 | ... | index (JSON) | footer
+
+The footer is struct ">QQ8s": index offset, index length, b"SLARCIDX".
+The index records the codec, block size, the original name, size and
+SHA-256, and the (offset, length) of every compressed block. Reading
+byte range [a, b) of the original only decompresses the blocks that
+cover it, so offsets from the lookup index stay valid and a single
+record costs one block, not the whole file.
+"""
+import io
+import os
+import sys
+import gzip
+import lzma
+import json
+import time
+import struct
+import hashlib
+import threading
+
+from buffer_tail import fsync_dir
+
+ARCHIVE_EXTENSION = ".sarc"
+ARCHIVE_MAGIC = b"SLARC1\n"
+FOOTER = struct.Struct(">QQ8s")
+FOOTER_MAGIC = b"SLARCIDX"
+
+CODECS = {
+    "gzip": (lambda data, level: gzip.compress(data, compresslevel=level or 6, mtime=0), gzip.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=6 if level is None else level), lzma.decompress),
+}
+
+
+def is_archive(path: str) -> bool:
+    return path.endswith(ARCHIVE_EXTENSION)
+
+
+def archive_path_for(path: str) -> str:
+    return path + ARCHIVE_EXTENSION
+
+
+def write_archive(src: str, dst: str = None, codec: str = "gzip", block_size: int = 1 << 16,
+                  level: int = None) -> str:
+    """Compress src into a seekable archive (temp file + fsync + rename); returns its path"""
+    compress = CODECS[codec][0]
+    dst = dst or archive_path_for(src)
+    tmp = dst + ".tmp"
+    digest = hashlib.sha256()
+    blocks = []
+    size = 0
+
+    try:
+        with open(src, 'rb') as fin, open(tmp, 'wb') as fout:
+            fout.write(ARCHIVE_MAGIC)
+            offset = len(ARCHIVE_MAGIC)
+            for data in iter(lambda: fin.read(block_size), b""):
+                digest.update(data)
+                size += len(data)
+                block = compress(data, level)
+                fout.write(block)
+                blocks.append([offset, len(block)])
+                offset += len(block)
+
+            index = json.dumps({
+                "format": "signed-log-archive",
+                "version": 1,
+                "codec": codec,
+                "block_size": block_size,
+                "source": os.path.basename(src),
+                "size": size,
+                "sha256": digest.hexdigest(),
+                "blocks": blocks
+            }, separators=(",", ":")).encode()
+            fout.write(index)
+            fout.write(FOOTER.pack(offset, len(index), FOOTER_MAGIC))
+            fout.flush()
+            os.fsync(fout.fileno())
+        os.replace(tmp, dst)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    fsync_dir(os.path.dirname(os.path.abspath(dst)))
+    return dst
+
+
+class ArchiveReader(io.RawIOBase):
+    """Seekable, read-only view of the original bytes inside an archive.
+
+    Blocks are decompressed on demand and the most recent one is cached,
+    so sequential reads decompress each block once and a seek + read of
+    one record touches a single block (two if it straddles a boundary).
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.f = open(path, 'rb')
+        self.f.seek(-FOOTER.size, os.SEEK_END)
+        index_offset, index_length, magic = FOOTER.unpack(self.f.read(FOOTER.size))
+        if magic != FOOTER_MAGIC:
+            self.f.close()
+            raise ValueError(f"Not a signed log archive: {path}")
+        self.f.seek(index_offset)
+        self.index = json.loads(self.f.read(index_length))
+        self.decompress = CODECS[self.index["codec"]][1]
+        self.block_size = self.index["block_size"]
+        self.size = self.index["size"]
+        self.pos = 0
+        self.cached = (None, b"")
+        self.blocks_read = 0
+
+    def block(self, number: int) -> bytes:
+        if self.cached[0] != number:
+            offset, length = self.index["blocks"][number]
+            self.f.seek(offset)
+            self.cached = (number, self.decompress(self.f.read(length)))
+            self.blocks_read += 1
+        return self.cached[1]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.pos
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self.pos = max(0, offset)
+        return self.pos
+
+    def readinto(self, buffer) -> int:
+        if self.pos >= self.size:
+            return 0
+        number, start = divmod(self.pos, self.block_size)
+        data = self.block(number)
+        n = min(len(buffer), len(data) - start)
+        buffer[:n] = data[start:start + n]
+        self.pos += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self.f.close()
+        super().close()
+
+
+def open_archive(path: str, mode: str = 'rb'):
+    """Open an archive like open() would open the original batch file"""
+    raw = io.BufferedReader(ArchiveReader(path), buffer_size=1 << 16)
+    if 'b' in mode:
+        return raw
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def restore_archive(path: str, dst: str = None) -> str:
+    """Write the original batch file back out, checking its SHA-256"""
+    reader = ArchiveReader(path)
+    dst = dst or os.path.join(os.path.dirname(path), reader.index["source"])
+    digest = hashlib.sha256()
+    with reader, open(dst + ".tmp", 'wb') as out:
+        for data in iter(lambda: reader.read(1 << 20), b""):
+            digest.update(data)
+            out.write(data)
+        out.flush()
+        os.fsync(out.fileno())
+        if digest.hexdigest() != reader.index["sha256"]:
+            os.remove(dst + ".tmp")
+            raise ValueError(f"Archive {path} does not match its recorded SHA-256")
+    os.replace(dst + ".tmp", dst)
+    return dst
+
+
+def archive_matches(path: str, src: str) -> bool:
+    """True if the archive decompresses to exactly the bytes of src"""
+    digest = hashlib.sha256()
+    with ArchiveReader(path) as reader:
+        for data in iter(lambda: reader.read(1 << 20), b""):
+            digest.update(data)
+        expected = reader.index["sha256"]
+    source = hashlib.sha256()
+    with open(src, 'rb') as f:
+        for data in iter(lambda: f.read(1 << 20), b""):
+            source.update(data)
+    return digest.hexdigest() == expected == source.hexdigest()
+
+
+class ArchiveCompactor:
+    """Move closed batches older than min_age seconds into the archive tier.
+
+    Each batch is compressed, decompressed again and compared with the
+    original before the original is removed. Index entries are moved to
+    the archive (offsets are unchanged), and the batch is dropped from the
+    verification checkpoint so the archive is verified once in its new
+    form. The SQLite stores are opened per run, so compact_once() can be
+    called from the background thread that start() creates.
+    """
+
+    def __init__(self, directory: str, min_age: float = 3600, codec: str = "gzip",
+                 block_size: int = 1 << 16, index_file: str = None, checkpoint_file: str = None):
+        self.directory = directory
+        self.min_age = min_age
+        self.codec = codec
+        self.block_size = block_size
+        self.index_file = index_file
+        self.checkpoint_file = checkpoint_file
+        self.stats = {"files": 0, "bytes_in": 0, "bytes_out": 0, "errors": 0}
+
+    def candidates(self) -> list:
+        from batch_format import list_batch_files
+
+        cutoff = time.time() - self.min_age
+        return [
+            path for path in list_batch_files(self.directory)
+            if not is_archive(path) and os.path.getmtime(path) <= cutoff
+        ]
+
+    def compact_file(self, path: str, index=None, checkpoint=None) -> str:
+        archive = write_archive(path, codec=self.codec, block_size=self.block_size)
+        if not archive_matches(archive, path):
+            os.remove(archive)
+            raise ValueError(f"Archive round trip failed for {path}")
+
+        size_in = os.path.getsize(path)
+        if index is not None and not index.move(path, archive):
+            index.index_file(archive)
+        if checkpoint is not None:
+            checkpoint.forget([path])
+        os.remove(path)
+        fsync_dir(os.path.dirname(path))
+
+        self.stats["files"] += 1
+        self.stats["bytes_in"] += size_in
+        self.stats["bytes_out"] += os.path.getsize(archive)
+        return archive
+
+    def compact_once(self) -> list:
+        paths = self.candidates()
+        if not paths:
+            return []
+
+        from log_index import LogIndex
+        from verify_checkpoint import VerificationCheckpoint
+
+        index = LogIndex(self.index_file) if self.index_file else None
+        checkpoint = VerificationCheckpoint(self.checkpoint_file) if self.checkpoint_file else None
+        archived = []
+        try:
+            for path in paths:
+                try:
+                    archived.append(self.compact_file(path, index, checkpoint))
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"⚠️ Failed to archive {os.path.basename(path)}: {e}")
+        finally:
+            for store in (index, checkpoint):
+                if store is not None:
+                    store.close()
+        return archived
+
+    def start(self, interval: float = 60) -> threading.Event:
+        """Compact every interval seconds on a background thread; set the returned event to stop"""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.compact_once()
+
+        threading.Thread(target=loop, daemon=True).start()
+        return stop
+
+
+if __name__ == "__main__":
+    import argparse
+    from config.test_config import (
+        LOCAL_SIGNED_DIR, LOG_INDEX_FILE, VERIFY_CHECKPOINT_FILE,
+        ARCHIVE_CODEC, ARCHIVE_BLOCK_SIZE, ARCHIVE_MIN_AGE, ensure_dirs
+    )
+
+    parser = argparse.ArgumentParser(description="Compressed archive tier for signed batches")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact", help="Archive closed batches older than --min-age seconds")
+    compact.add_argument("--dir", default=LOCAL_SIGNED_DIR)
+    compact.add_argument("--min-age", type=float, default=ARCHIVE_MIN_AGE)
+    compact.add_argument("--codec", choices=sorted(CODECS), default=ARCHIVE_CODEC)
+    compact.add_argument("--block-size", type=int, default=ARCHIVE_BLOCK_SIZE)
+    restore = sub.add_parser("restore", help="Write the original batch file back out")
+    restore.add_argument("archive")
+    args = parser.parse_args()
+    ensure_dirs()
+
+    if args.command == "restore":
+        print(f"✓ Restored {restore_archive(args.archive)}")
+        sys.exit(0)
+
+    compactor = ArchiveCompactor(
+        args.dir, args.min_age, args.codec, args.block_size,
+        index_file=LOG_INDEX_FILE, checkpoint_file=VERIFY_CHECKPOINT_FILE
+    )
+    compactor.compact_once()
+    stats = compactor.stats
+    ratio = stats["bytes_in"] / stats["bytes_out"] if stats["bytes_out"] else 0
+    print(f"✓ Archived {stats['files']} batches: {stats['bytes_in']} -> {stats['bytes_out']} bytes "
+          f"({ratio:.1f}x), {stats['errors']} errors")
@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""Compact newline-delimited batch format (".ndjson") for signed logs.
+
+Layout, one JSON object per line:
+
+    {"format": "rfc5848-ndjson", "batch_id": ..., "key_id": ..., "public_key": ..., ...}
+    {"id": <message_id>, "ts": <timestamp>, "msg": <original_message>, "sig": <base64>, "f": [...]}
+    ...
+    {"trailer": true, "message_count": N, "batch_signature": {...}, "chain": {...}}
+
+The key and algorithm are declared once in the header. Records carry a
+raw base64 signature in "message" mode and no signature in "merkle" mode,
+where the trailer holds the signed root over all records. The optional
+"f" list holds the unsigned syslog fields (facility, severity, host,
+program; see syslog_fields.py), and the optional "chain" block links the
+batch to its predecessor (see hash_chain.py).
+"""
+import os
+import sys
+import json
+import base64
+from datetime import datetime
+
+from merkle import leaf_hash, merkle_root, build_levels, inclusion_proof
+from buffer_tail import fsync_dir
+from hash_chain import ContentDigest
+from syslog_fields import FIELD_NAMES
+
+COMPACT_FORMAT = "rfc5848-ndjson"
+COMPACT_EXTENSION = ".ndjson"
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def signing_data(message: dict) -> bytes:
+    """Bytes covered by a message signature (must match the signer)"""
+    return f"{message['message_id']}{message['timestamp']}{message['original_message']}".encode()
+
+
+ROOT_SIGNATURE_VERSION = 2
+
+
+def root_signing_data(batch_id: str, tree_size: int, root: str, version: int = ROOT_SIGNATURE_VERSION) -> bytes:
+    """Bytes covered by a Merkle root signature (must match the signer)
+
+    Version 2 length-prefixes the batch_id and separates the fields, so two
+    different (batch_id, tree_size, root) triples never sign the same
+    bytes. Version 1, plain concatenation, is what batch signatures without
+    a "version" field were made over.
+    """
+    if version == 1:
+        return f"{batch_id}{tree_size}{root}".encode()
+    return f"{len(batch_id)}:{batch_id}|{tree_size}|{root}".encode()
+
+
+class SignedRecord:
+    """One signed line as flat slots instead of nested message dicts.
+
+    signature is the raw 64-byte Ed25519 signature (None in "merkle"
+    mode) and fields the parse_fields() tuple (or None). Used by the
+    low-footprint signer, which writes each record as soon as it is made.
+    """
+    __slots__ = ("message_id", "timestamp", "text", "signature", "fields")
+
+    def __init__(self, message_id: str, timestamp: str, text: str, signature: bytes = None, fields: tuple = None):
+        self.message_id = message_id
+        self.timestamp = timestamp
+        self.text = text
+        self.signature = signature
+        self.fields = fields
+
+
+class CompactBatchWriter:
+    """Write a compact batch incrementally, one record per signed message.
+
+    Output goes to a temp file that is fsynced and renamed into place on
+    close(), so a batch is either complete on disk or absent. In "merkle"
+    mode only the 32-byte leaf hashes are kept in memory; sign_root is
+    called at close with (batch_id, tree_size, root_hex) and must return
+    the batch_signature block. chain_link, if given, is called at close
+    with (batch_id, message_count, content_digest, path) and returns the
+    trailer's chain block.
+    """
+
+    def __init__(self, path: str, batch_id: str, key_id: str, public_key_hex: str,
+                 signing_mode: str = "message", sign_root=None, created: str = None,
+                 chain_link=None):
+        if signing_mode == "merkle" and sign_root is None:
+            raise ValueError("Merkle mode needs a sign_root callback")
+
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.batch_id = batch_id
+        self.signing_mode = signing_mode
+        self.sign_root = sign_root
+        self.chain_link = chain_link
+        self.count = 0
+        self.leaves = []
+        self.digest = ContentDigest()
+
+        self.f = open(self.tmp_path, 'w', encoding='utf-8')
+        self.f.write(_dumps({
+            "format": COMPACT_FORMAT,
+            "version": "1.0",
+            "batch_id": batch_id,
+            "created": created or datetime.utcnow().isoformat() + "Z",
+            "signing_mode": signing_mode,
+            "algorithm": "ed25519",
+            "key_id": key_id,
+            "public_key": public_key_hex,
+            "signature_encoding": "base64"
+        }) + "\n")
+
+    def write(self, message: dict):
+        record = {
+            "id": message['message_id'],
+            "ts": message['timestamp'],
+            "msg": message['original_message']
+        }
+        if "fields" in message:
+            record["f"] = [message['fields'].get(name) for name in FIELD_NAMES]
+        leaf = leaf_hash(signing_data(message))
+        self.digest.update(leaf)
+        if self.signing_mode == "merkle":
+            self.leaves.append(leaf)
+        else:
+            record["sig"] = base64.b64encode(bytes.fromhex(message['signature']['value'])).decode()
+
+        self.f.write(_dumps(record) + "\n")
+        self.count += 1
+
+    def write_record(self, record: SignedRecord):
+        """write() for a SignedRecord; produces the same line as the equivalent message dict"""
+        line = {"id": record.message_id, "ts": record.timestamp, "msg": record.text}
+        if record.fields is not None:
+            line["f"] = list(record.fields)
+        leaf = leaf_hash(f"{record.message_id}{record.timestamp}{record.text}".encode())
+        self.digest.update(leaf)
+        if self.signing_mode == "merkle":
+            self.leaves.append(leaf)
+        else:
+            line["sig"] = base64.b64encode(record.signature).decode()
+
+        self.f.write(_dumps(line) + "\n")
+        self.count += 1
+
+    def close(self) -> str:
+        """Write the trailer and atomically publish the batch; returns its path"""
+        trailer = {"trailer": True, "message_count": self.count}
+        if self.signing_mode == "merkle" and self.leaves:
+            trailer["batch_signature"] = self.sign_root(
+                self.batch_id, len(self.leaves), merkle_root(self.leaves).hex()
+            )
+        if self.chain_link is not None:
+            trailer["chain"] = self.chain_link(self.batch_id, self.count, self.digest.hexdigest(), self.path)
+
+        self.f.write(_dumps(trailer) + "\n")
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+        fsync_dir(os.path.dirname(self.path))
+        return self.path
+
+    def abort(self):
+        """Discard a partially written batch"""
+        self.f.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class ListBatchWriter:
+    """Writer facade for the indented JSON layout, which has to be written whole"""
+
+    def __init__(self, save_batch, path: str):
+        self.save_batch = save_batch
+        self.path = path
+        self.messages = []
+
+    @property
+    def count(self) -> int:
+        return len(self.messages)
+
+    def write(self, message: dict):
+        self.messages.append(message)
+
+    def close(self) -> str:
+        return self.save_batch(self.messages, self.path)
+
+    def abort(self):
+        self.messages = []
+
+
+def open_batch(path: str, mode: str = 'rb'):
+    """Open a batch file for reading, transparently reading archived (.sarc) batches"""
+    # Imported here so writers (and lite_signer.py) do not load the compression codecs
+    from archive import is_archive, open_archive
+
+    if is_archive(path):
+        return open_archive(path, mode)
+    if 'b' in mode:
+        return open(path, mode)
+    return open(path, mode, encoding='utf-8')
+
+
+def list_batch_files(directory: str) -> list:
+    """Every batch file under a directory, source partitions included: indented JSON, compact and archived"""
+    import glob
+    from archive import ARCHIVE_EXTENSION
+
+    files = []
+    for pattern in ("*.json", "*" + COMPACT_EXTENSION, "*" + ARCHIVE_EXTENSION):
+        files.extend(glob.glob(os.path.join(directory, "**", pattern), recursive=True))
+    return sorted(files)
+
+
+def is_compact_batch(path: str) -> bool:
+    """Detect the compact format from the first line of a batch file"""
+    with open_batch(path) as f:
+        first = f.readline(4096)
+    return first.startswith(b'{"format":"' + COMPACT_FORMAT.encode())
+
+
+def read_last_line(path: str) -> bytes:
+    """Return the final non-empty line of a file without reading all of it"""
+    with open_batch(path) as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        block = 4096
+        data = b""
+        while end > 0:
+            start = max(0, end - block)
+            f.seek(start)
+            data = f.read(end - start) + data
+            stripped = data.rstrip(b"\n")
+            newline = stripped.rfind(b"\n")
+            if newline >= 0:
+                return stripped[newline + 1:]
+            end = start
+        return data.rstrip(b"\n")
+
+
+def read_compact_trailer(path: str) -> dict:
+    """Read the trailer of a compact batch, or None if the batch is incomplete"""
+    try:
+        trailer = json.loads(read_last_line(path))
+    except ValueError:
+        return None
+    return trailer if trailer.get("trailer") else None
+
+
+def read_compact_header(path: str) -> dict:
+    with open_batch(path, 'r') as f:
+        return json.loads(f.readline())
+
+
+def iter_compact_spans(path: str):
+    """Yield (record, byte_offset, byte_length) for each record line of a compact batch"""
+    with open_batch(path) as f:
+        offset = len(f.readline())
+        for line in f:
+            record = json.loads(line)
+            if record.get("trailer"):
+                break
+            yield record, offset, len(line)
+            offset += len(line)
+
+
+def iter_compact_range(path: str, start: int, end: int):
+    """Yield the records of a compact batch whose lines start in [start, end)
+
+    Consecutive ranges cover every record exactly once, so one large batch
+    can be verified in pieces. The header and trailer are never yielded.
+    """
+    with open_batch(path) as f:
+        if start == 0:
+            position = len(f.readline())
+        else:
+            # Back up one byte: if start is a line boundary this reads just "\n"
+            f.seek(start - 1)
+            position = start - 1 + len(f.readline())
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            record = json.loads(line)
+            if record.get("trailer"):
+                break
+            yield record
+            position += len(line)
+
+
+def iter_compact_batch(path: str):
+    """Stream a compact batch: yields the header first, then each message
+
+    Messages are returned in the standard signed-message shape (hex
+    signature, public_key_info) so the usual verification code applies.
+    """
+    with open_batch(path, 'r') as f:
+        header = json.loads(f.readline())
+        if header.get("format") != COMPACT_FORMAT:
+            raise ValueError("Not a compact batch file")
+        yield header
+
+        for line in f:
+            record = json.loads(line)
+            if record.get("trailer"):
+                break
+            yield compact_record_to_message(record, header)
+
+
+def compact_record_to_message(record: dict, header: dict) -> dict:
+    """Expand a compact record into the standard signed-message shape"""
+    message = {
+        "version": "1.0",
+        "message_id": record['id'],
+        "timestamp": record['ts'],
+        "original_message": record['msg']
+    }
+    if "f" in record:
+        message["fields"] = dict(zip(FIELD_NAMES, record['f']))
+    if "sig" in record:
+        message["signature"] = {
+            "algorithm": header['algorithm'],
+            "key_id": header['key_id'],
+            "value": base64.b64decode(record['sig']).hex()
+        }
+        message["public_key_info"] = {
+            "key_id": header['key_id'],
+            "algorithm": header['algorithm'],
+            "public_key": header['public_key']
+        }
+    return message
+
+
+class JsonBatchReader:
+    """Incrementally parse an indented JSON batch (version/batch_id/messages).
+
+    Header fields before "messages" are available as .header as soon as the
+    reader is created; iterating yields one message dict at a time while
+    only a small window of the file is held in memory, so peak memory does
+    not depend on the batch size. Fields after the messages array end up
+    in .trailing once iteration has finished. Each message's character
+    offset and length in the file are kept in .last_span (the signer writes
+    ASCII-only JSON, so these are also byte offsets). A value that still
+    does not decode once max_value characters are buffered is reported as
+    malformed, so a corrupt batch cannot make the window grow to the size
+    of the file.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1 << 16, max_value: int = 1 << 20):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.max_value = max_value
+        self.decoder = json.JSONDecoder()
+        self.f = open_batch(path, 'r')
+        self.buf = ""
+        self.pos = 0        # parse position inside buf
+        self.base = 0       # file offset of buf[0]
+        self.eof = False
+        self.header = {}
+        self.trailing = {}
+        self.last_span = None
+
+        self._expect("{")
+        self.in_messages = self._read_fields(self.header, True)
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:
+            # Drop the consumed prefix so the window stays small
+            self.base += self.pos
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def _skip_ws(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str):
+        if self._skip_ws() != char:
+            raise ValueError(f"Malformed batch file: expected '{char}' at offset {self.base + self.pos}")
+        self.pos += 1
+
+    def _value(self):
+        self._skip_ws()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number at the very end of the window may still be growing
+                if end < len(self.buf) or self.eof:
+                    start = self.pos
+                    self.pos = end
+                    return value, start
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                if len(self.buf) - self.pos > self.max_value:
+                    raise ValueError(
+                        f"Malformed batch file: no JSON value within {self.max_value} bytes "
+                        f"at offset {self.base + self.pos}"
+                    )
+            self._fill()
+
+    def _read_fields(self, target: dict, stop_at_messages: bool) -> bool:
+        """Read top-level fields into target; True if stopped at the messages array"""
+        while True:
+            char = self._skip_ws()
+            if char == "}":
+                self.pos += 1
+                return False
+            if char == ",":
+                self.pos += 1
+                continue
+            if not char:
+                raise ValueError("Malformed batch file: unexpected end of file")
+            key, _ = self._value()
+            self._expect(":")
+            if stop_at_messages and key == "messages":
+                self._expect("[")
+                return True
+            target[key], _ = self._value()
+
+    def __iter__(self):
+        try:
+            while self.in_messages:
+                char = self._skip_ws()
+                if char == ",":
+                    self.pos += 1
+                    continue
+                if char == "]":
+                    self.pos += 1
+                    self.in_messages = False
+                    self._read_fields(self.trailing, False)
+                    break
+                if not char:
+                    raise ValueError("Malformed batch file: unterminated messages array")
+                message, start = self._value()
+                self.last_span = (self.base + start, self.pos - start)
+                yield message
+        finally:
+            self.close()
+
+    def close(self):
+        self.f.close()
+
+
+def load_compact_batch(path: str) -> dict:
+    """Load a whole compact batch into the indented-JSON batch shape
+
+    Merkle inclusion proofs are rebuilt from the records so each message
+    can be checked on its own. Meant for small batches and tooling; bulk
+    verification streams with iter_compact_batch instead.
+    """
+    records = iter_compact_batch(path)
+    header = next(records)
+    messages = list(records)
+    trailer = read_compact_trailer(path)
+    if trailer is None:
+        raise ValueError("Incomplete compact batch (no trailer)")
+
+    batch_data = {
+        "version": header['version'],
+        "batch_id": header['batch_id'],
+        "created": header['created'],
+        "message_count": trailer['message_count']
+    }
+    if 'batch_signature' in trailer:
+        levels = build_levels([leaf_hash(signing_data(m)) for m in messages])
+        for index, message in enumerate(messages):
+            message["proof"] = {
+                "index": index,
+                "path": [node.hex() for node in inclusion_proof(levels, index)]
+            }
+        batch_data["batch_signature"] = trailer['batch_signature']
+        batch_data["public_key_info"] = {
+            "key_id": header['key_id'],
+            "algorithm": header['algorithm'],
+            "public_key": header['public_key']
+        }
+    if 'chain' in trailer:
+        batch_data["chain"] = trailer['chain']
+    batch_data["messages"] = messages
+    return batch_data
+
+
+def load_batch(path: str) -> dict:
+    """Load a batch file in either format"""
+    if is_compact_batch(path):
+        return load_compact_batch(path)
+    with open_batch(path, 'r') as f:
+        return json.load(f)
+
+
+def convert_json_batch(src: str, dst: str = None) -> str:
+    """Convert an existing indented test_logs_*.json batch to the compact format"""
+    with open(src, 'r') as f:
+        batch_data = json.load(f)
+
+    messages = batch_data.get('messages', [])
+    if dst is None:
+        dst = os.path.splitext(src)[0] + COMPACT_EXTENSION
+
+    if 'batch_signature' in batch_data:
+        signing_mode = "merkle"
+        key_info = batch_data['public_key_info']
+    elif messages:
+        signing_mode = "message"
+        key_info = messages[0]['public_key_info']
+    else:
+        raise ValueError(f"Nothing to convert in {src}")
+
+    # The existing root and chain signatures stay valid: both cover the
+    # batch_id and message content, not the file layout
+    existing_signature = batch_data.get('batch_signature')
+    existing_chain = batch_data.get('chain')
+    writer = CompactBatchWriter(
+        dst,
+        batch_data.get('batch_id', ''),
+        key_info['key_id'],
+        key_info['public_key'],
+        signing_mode=signing_mode,
+        sign_root=lambda batch_id, size, root: existing_signature,
+        created=batch_data.get('created'),
+        chain_link=(lambda *args: existing_chain) if existing_chain else None
+    )
+    try:
+        for message in messages:
+            if signing_mode == "message" and message['public_key_info']['public_key'] != key_info['public_key']:
+                raise ValueError(f"Batch {src} mixes signing keys; cannot declare one key in the header")
+            writer.write(message)
+    except Exception:
+        writer.abort()
+        raise
+
+    return writer.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python batch_format.py test_logs_*.json [...]")
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        try:
+            out = convert_json_batch(path)
+            print(f"✓ {os.path.basename(path)} ({os.path.getsize(path)} bytes) -> "
+                  f"{os.path.basename(out)} ({os.path.getsize(out)} bytes)")
+        except Exception as e:
+            print(f"❌ Failed to convert {path}: {e}")
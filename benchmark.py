@@ -0,0 +1,1041 @@
+#!/usr/bin/env python3
+"""Benchmarks for the local signing service and SIEM verifier."""
+import os
+import sys
+import io
+import json
+import time
+import socket
+import argparse
+import platform
+import statistics
+import atexit
+import shutil
+import resource
+import tempfile
+import subprocess
+import contextlib
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BASE_DIR, "bench_baseline.json")
+
+# Sign/verify hot paths measured by the "suite" command, each in a fresh process
+HOT_PATHS = ["create_rfc5848_structure", "verify_message", "save_signed_batch",
+             "process_buffer", "verify_file"]
+# Metrics compared against the baseline, and the direction that is worse
+BASELINE_METRICS = {"lines_per_s": -1, "p50_ms": 1, "peak_rss_mb": 1}
+
+# Entry points compared by the "footprint" command: each runs as its own
+# interpreter on a fresh data dir, drains the buffer and exits
+FOOTPRINT_ENTRY_POINTS = {
+    "lite": "from lite_signer import LiteSigner\nLiteSigner().run()",
+    "full": "from test_signing_service import LocalTestSigningService\n"
+            "LocalTestSigningService(verbose=False, output_format='ndjson').follow_buffer(exit_when_idle=True)"
+}
+# Budgets for lite_signer.py (see README.md): cold start with an empty
+# buffer, and peak RSS while signing the --lines run
+FOOTPRINT_BUDGETS = {"startup_ms": 150, "peak_rss_mb": 24}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB (Linux reports KiB)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss /= 1024
+    return rss / 1024
+
+
+def use_scratch_data_dir() -> str:
+    """Point buffer/output/state at a temp dir so benchmarks never touch signed_logs
+
+    A dir created here is removed when the benchmark exits; one passed in
+    through SIGNER_DATA_DIR is left in place.
+    """
+    if "SIGNER_DATA_DIR" not in os.environ:
+        os.environ["SIGNER_DATA_DIR"] = tempfile.mkdtemp(prefix="signer_bench_")
+        atexit.register(shutil.rmtree, os.environ["SIGNER_DATA_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["SIGNER_DATA_DIR"], exist_ok=True)
+    return os.environ["SIGNER_DATA_DIR"]
+
+
+def synthetic_lines(count: int, length: int = 80):
+    """Syslog lines shaped like test_logs.txt, padded to about `length` characters"""
+    hosts = ["firewall", "router", "ap-lobby", "gw-01"]
+    programs = ["auth", "kernel", "dnsmasq", "dropbear", "hostapd"]
+    for i in range(count):
+        line = (f"<{128 + i % 64}>Aug 23 14:{i // 60 % 60:02d}:{i % 60:02d} "
+                f"{hosts[i % len(hosts)]} {programs[i % len(programs)]}: synthetic event {i}")
+        if len(line) < length:
+            line += " " + "x" * (length - len(line) - 1)
+        yield line
+
+
+def write_synthetic_batch(path: str, count: int, distinct: int = 1000) -> int:
+    """Write a valid indented-JSON batch of count messages without holding it in memory
+
+    Only `distinct` messages are actually signed and then repeated, so
+    generating millions of records stays fast while every signature verifies.
+    A field after the messages array makes the reader parse past it too.
+    """
+    from test_signing_service import LocalTestSigningService
+
+    service = LocalTestSigningService(verbose=False)
+    templates = [
+        json.dumps(service.create_rfc5848_structure(
+            f"<{130 + i % 8}>Aug 23 14:32:{i % 60:02d} firewall auth: synthetic log {i}"
+        ), indent=2).replace("\n", "\n    ")
+        for i in range(min(count, distinct))
+    ]
+
+    with open(path, 'w') as f:
+        f.write('{\n  "version": "1.0",\n  "batch_id": "bench_batch",\n')
+        f.write(f'  "created": "2025-08-25T00:00:00Z",\n  "message_count": {count},\n')
+        f.write('  "messages": [\n')
+        for i in range(count):
+            if i:
+                f.write(",\n")
+            f.write("    " + templates[i % len(templates)])
+        f.write(f'\n  ],\n  "trailer": {{"message_count": {count}}}\n}}')
+
+    return os.path.getsize(path)
+
+
+def _child_verify(path: str, mode: str):
+    """Verify one file in this (fresh) process and report time and peak RSS"""
+    from test_siem_verifier import LocalSIEMVerifier
+
+    verifier = LocalSIEMVerifier(verbose=False)
+    start = time.perf_counter()
+    if mode == "stream":
+        summary = verifier.verify_file(path)
+        valid = summary['valid']
+        errors = len(summary['file_errors'])
+    else:
+        with open(path, 'r') as f:
+            batch_data = json.load(f)
+        valid = sum(verifier.verify_message(m)['valid'] for m in batch_data['messages'])
+        errors = 0
+
+    print(json.dumps({
+        "seconds": time.perf_counter() - start,
+        "valid": valid,
+        "file_errors": errors,
+        "peak_rss_mb": peak_rss_mb()
+    }))
+
+
+def run_child(*args) -> dict:
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *args],
+        cwd=BASE_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def timed_calls(fn, items) -> list:
+    """Run fn(item) for each item and return per-call latencies in seconds"""
+    latencies = []
+    clock = time.perf_counter
+    for item in items:
+        start = clock()
+        fn(item)
+        latencies.append(clock() - start)
+    return latencies
+
+
+def _child_hot_path(name: str, count: int, length: int, batch_size: int):
+    """Measure one hot path in this (fresh) process and report lines/s, latency and peak RSS
+
+    Per-message paths report per-call latency; batch and file paths report
+    latency per batch of batch_size lines.
+    """
+    from test_signing_service import LocalTestSigningService
+    from test_siem_verifier import LocalSIEMVerifier
+
+    lines = list(synthetic_lines(count, length))
+    chunks = [lines[i:i + batch_size] for i in range(0, count, batch_size)]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = LocalTestSigningService(verbose=False)
+        verifier = LocalSIEMVerifier(verbose=False)
+
+        if name == "create_rfc5848_structure":
+            unit = "message"
+            latencies = timed_calls(service.create_rfc5848_structure, lines)
+        elif name == "verify_message":
+            unit = "message"
+            messages = [service.create_rfc5848_structure(line) for line in lines]
+            latencies = timed_calls(verifier.verify_message, messages)
+        elif name == "save_signed_batch":
+            unit = "batch"
+            batches = [[service.create_rfc5848_structure(line) for line in chunk] for chunk in chunks]
+            latencies = timed_calls(service.save_signed_batch, batches)
+        elif name == "process_buffer":
+            unit = "batch"
+
+            def process(chunk):
+                with open(service.buffer_file, 'w') as f:
+                    f.write("\n".join(chunk) + "\n")
+                service.process_buffer(workers=1)
+
+            latencies = timed_calls(process, chunks)
+        elif name == "verify_file":
+            unit = "batch"
+            paths = [service.save_signed_batch([service.create_rfc5848_structure(line) for line in chunk])
+                     for chunk in chunks]
+            latencies = timed_calls(verifier.verify_file, paths)
+        else:
+            raise ValueError(f"Unknown hot path: {name}")
+
+    total = sum(latencies)
+    print(json.dumps({
+        "name": name,
+        "unit": unit,
+        "lines": count,
+        "line_length": length,
+        "calls": len(latencies),
+        "seconds": total,
+        "lines_per_s": count / total if total else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_rss_mb": peak_rss_mb()
+    }))
+
+
+def cpu_model() -> str:
+    """CPU model name from /proc/cpuinfo, or platform.processor() elsewhere"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def host_info() -> dict:
+    """What a baseline's numbers depend on besides the code"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_model": cpu_model(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def bench_hot_paths(names, count: int, length: int, batch_size: int, repeat: int = 5) -> dict:
+    """Run each hot path in its own process so peak RSS is per path
+
+    Each path runs repeat times and every metric keeps its median. The
+    spread of each compared metric, (max - min) / median over the runs, is
+    stored with it: compare_to_baseline() never flags a change that is
+    within that measured noise.
+    """
+    results = []
+    print(f"{'hot path':>26} {'unit':>8} {'lines/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak RSS MiB':>13} "
+          f"{'spread':>7}")
+    for name in names:
+        runs = [run_child("_child-hot-path", name, str(count), str(length), str(batch_size)) for _ in range(repeat)]
+        result = dict(runs[0])
+        for metric in ("seconds", "lines_per_s", "p50_ms", "p99_ms", "peak_rss_mb"):
+            result[metric] = statistics.median(run[metric] for run in runs)
+        result["spread"] = {
+            metric: (max(run[metric] for run in runs) - min(run[metric] for run in runs)) / result[metric]
+            for metric in BASELINE_METRICS
+        }
+        results.append(result)
+        print(f"{name:>26} {result['unit']:>8} {result['lines_per_s']:>10.0f} {result['p50_ms']:>9.3f} "
+              f"{result['p99_ms']:>9.3f} {result['peak_rss_mb']:>13.1f} {result['spread']['lines_per_s']:>7.0%}")
+
+    return {
+        "meta": dict(
+            host_info(),
+            created=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            lines=count,
+            line_length=length,
+            batch_size=batch_size,
+            repeat=repeat
+        ),
+        "results": results
+    }
+
+
+def bench_metrics_overhead(count: int, length: int, rounds: int = 15) -> list:
+    """Per-message cost of the sampled metrics timers on signing and verification
+
+    Both variants run in this process on the same inputs, alternating
+    timers off and on each round; the fastest round of each is compared.
+    On a noisy machine that difference can still be below the noise, so
+    the cost of one timer wrapper is also measured on a no-op and scaled
+    by the number of timed calls per message (2 to sign, 1 to verify).
+    """
+    import timeit
+    from metrics import METRICS, Histogram
+    from test_signing_service import LocalTestSigningService, message_id_for, HASH_SECONDS, SIGN_SECONDS
+    from test_siem_verifier import LocalSIEMVerifier, VERIFY_SECONDS
+
+    METRICS.enabled = True
+    service = LocalTestSigningService(verbose=False)
+    verifier = LocalSIEMVerifier(verbose=False)
+    lines = list(synthetic_lines(count, length))
+    messages = [service.create_rfc5848_structure(line) for line in lines]
+
+    variants = {
+        "off": (message_id_for, service.private_key.sign, LocalSIEMVerifier.verify_message.__get__(verifier)),
+        "on": (METRICS.timed(message_id_for, HASH_SECONDS), METRICS.timed(service.private_key.sign, SIGN_SECONDS),
+               METRICS.timed(LocalSIEMVerifier.verify_message.__get__(verifier), VERIFY_SECONDS))
+    }
+    paths = {
+        "create_rfc5848_structure": lambda: [service.create_rfc5848_structure(line) for line in lines],
+        "verify_message": lambda: [verifier.verify_message(message) for message in messages]
+    }
+
+    best = {}
+    for _ in range(rounds):
+        for mode, (hash_id, sign_bytes, verify_message) in variants.items():
+            service.hash_id, service.sign_bytes, verifier.verify_message = hash_id, sign_bytes, verify_message
+            for name, run in paths.items():
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                best[name, mode] = min(best.get((name, mode), elapsed), elapsed)
+
+    def noop(*args):
+        return None
+
+    wrapped = METRICS.timed(noop, Histogram("noop_seconds", ""))
+    calls = 200000
+    plain_s = min(timeit.repeat(noop, number=calls, repeat=5))
+    wrapped_s = min(timeit.repeat(wrapped, number=calls, repeat=5))
+    timer_ns = max(0.0, (wrapped_s - plain_s) / calls * 1e9)
+
+    results = []
+    timed_calls_per_message = {"create_rfc5848_structure": 2, "verify_message": 1}
+    print(f"timer wrapper cost: {timer_ns:.0f} ns per call")
+    print(f"{'hot path':>26} {'off lines/s':>12} {'on lines/s':>11} {'measured':>9} {'estimated':>10}")
+    for name in paths:
+        off = count / best[name, "off"]
+        on = count / best[name, "on"]
+        result = {
+            "name": name,
+            "off_lines_per_s": off,
+            "on_lines_per_s": on,
+            "overhead_pct": (off - on) / off * 100,
+            "timer_ns": timer_ns,
+            "estimated_overhead_pct": timer_ns * timed_calls_per_message[name] * off / 1e9 * 100
+        }
+        results.append(result)
+        print(f"{name:>26} {off:>12.0f} {on:>11.0f} {result['overhead_pct']:>8.2f}% "
+              f"{result['estimated_overhead_pct']:>9.2f}%")
+    return results
+
+
+def compare_to_baseline(run: dict, baseline: dict, threshold: float) -> list:
+    """Regressions in lines/s, p50 latency or peak RSS of the medians
+
+    A metric regresses when it is worse by more than threshold (a fraction)
+    and by more than the spread measured across repeats in either run, so
+    run-to-run noise on a busy or small machine is not reported.
+    """
+    previous = {result['name']: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in run["results"]:
+        base = previous.get(result['name'])
+        if base is None:
+            continue
+        for metric, worse in BASELINE_METRICS.items():
+            allowed = max(threshold, base.get('spread', {}).get(metric, 0), result.get('spread', {}).get(metric, 0))
+            change = (result[metric] - base[metric]) / base[metric] * worse
+            if change > allowed:
+                regressions.append({
+                    "name": result['name'],
+                    "metric": metric,
+                    "baseline": base[metric],
+                    "current": result[metric],
+                    "allowed": allowed
+                })
+    return regressions
+
+
+def host_differences(baseline: dict) -> list:
+    """Host fields that differ between this machine and the one the baseline was recorded on"""
+    meta = baseline.get("meta", {})
+    return [f"{key}: {meta.get(key)} -> {value}" for key, value in host_info().items() if meta.get(key) != value]
+
+
+def bench_verifier_memory(sizes, modes=("stream",), workdir=None, load_max: int = 100000) -> list:
+    """Peak verifier RSS per batch size; streaming should stay flat
+
+    json.load needs memory proportional to the batch, so the load baseline
+    only runs up to load_max messages.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        print(f"{'messages':>10} {'file MiB':>9} {'mode':>7} {'peak RSS MiB':>13} {'seconds':>8}")
+        for size in sizes:
+            path = os.path.join(tmp, f"bench_{size}.json")
+            file_bytes = write_synthetic_batch(path, size)
+            for mode in modes:
+                if mode == "load" and size > load_max:
+                    continue
+                result = run_child("_child-verify", path, mode)
+                result.update({"messages": size, "file_bytes": file_bytes, "mode": mode})
+                results.append(result)
+                print(f"{size:>10} {file_bytes / 2**20:>9.1f} {mode:>7} "
+                      f"{result['peak_rss_mb']:>13.1f} {result['seconds']:>8.2f}")
+            os.remove(path)
+    return results
+
+
+def bench_receiver(count: int, line_length: int, transport: str) -> dict:
+    """Lines/s from sending over loopback to signed batches on disk"""
+    from test_signing_service import LocalTestSigningService
+
+    service = LocalTestSigningService(verbose=False)
+    receiver = service.create_receiver(port=0, max_latency=0.05)
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread = receiver.run_in_thread()
+        start = time.perf_counter()
+
+        if transport == "udp":
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            for line in synthetic_lines(count, line_length):
+                sock.sendto(line.encode(), (receiver.host, receiver.port))
+        else:
+            sock = socket.create_connection((receiver.host, receiver.port))
+            for line in synthetic_lines(count, line_length):
+                sock.sendall(line.encode() + b"\n")
+        sock.close()
+
+        deadline = time.monotonic() + 300
+        while receiver.stats["handled"] < count and time.monotonic() < deadline:
+            if transport == "udp" and receiver.stats["received"] + receiver.stats["dropped"] < count:
+                # Datagrams lost in the kernel never arrive; stop once input goes quiet
+                before = receiver.stats["received"]
+                time.sleep(0.5)
+                if receiver.stats["received"] == before and receiver.stats["handled"] >= before:
+                    break
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        receiver.stop_from_thread(thread)
+
+    return {
+        "path": transport,
+        "lines": count,
+        "handled": receiver.stats["handled"],
+        "spilled": receiver.stats["spilled"],
+        "seconds": elapsed,
+        "lines_per_s": receiver.stats["handled"] / elapsed
+    }
+
+
+def bench_file_buffer(count: int, line_length: int) -> dict:
+    """Lines/s for the buffer-file path: append to test_logs.txt, then tail-follow and sign"""
+    from test_signing_service import LocalTestSigningService
+
+    service = LocalTestSigningService(verbose=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        with open(service.buffer_file, 'a') as f:
+            for line in synthetic_lines(count, line_length):
+                f.write(line + "\n")
+        service.follow_buffer(exit_when_idle=True)
+        elapsed = time.perf_counter() - start
+
+    return {"path": "file", "lines": count, "handled": count, "spilled": 0,
+            "seconds": elapsed, "lines_per_s": count / elapsed}
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list (0.0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def bench_flush_latency(rate: int, seconds: float, line_length: int) -> dict:
+    """Receive-to-signed-on-disk latency with the daemon flush controller at a paced input rate
+
+    Each line carries its send time; the handler records the latency of
+    every line once its batch has been written. Lines are sent over TCP in
+    1 ms ticks, so TCP backpressure (not drops) shows when signing cannot
+    keep up with the offered rate.
+    """
+    from test_signing_service import LocalTestSigningService
+
+    service = LocalTestSigningService(verbose=False)
+    receiver = service.create_receiver(port=0, spill=False, policy=service.create_flush_policy())
+    latencies = []
+
+    def handler(lines):
+        sign_lines(lines)
+        done = time.monotonic()
+        latencies.extend(done - float(line.rsplit("sent=", 1)[1]) for line in lines)
+
+    sign_lines = receiver.handler
+    receiver.handler = handler
+    count = int(rate * seconds)
+    padding = "x" * max(0, line_length - 64)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread = receiver.run_in_thread()
+        sock = socket.create_connection((receiver.host, receiver.port))
+        start = time.monotonic()
+        sent = 0
+        while sent < count:
+            due = min(count, int((time.monotonic() - start) * rate) + 1)
+            while sent < due:
+                sock.sendall(f"<134>Aug 23 14:32:00 bench flush: {padding} sent={time.monotonic():.6f}\n".encode())
+                sent += 1
+            time.sleep(0.001)
+        sock.close()
+
+        deadline = time.monotonic() + 300
+        while receiver.stats["handled"] < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        elapsed = time.monotonic() - start
+        receiver.stop_from_thread(thread)
+
+    return {
+        "rate": rate,
+        "lines": count,
+        "handled": receiver.stats["handled"],
+        "batches": receiver.stats["batches"],
+        "achieved_lines_per_s": receiver.stats["handled"] / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000
+    }
+
+
+def bench_key_server(keys: int, lookups: int, batch_size: int) -> list:
+    """Key lookups/s against a local key server: cold (no cache), batched, and warm cache"""
+    from nacl.signing import SigningKey
+    from key_registry import KeyRegistry
+    from test_key_server import KeyServer, KeyServerClient
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = KeyRegistry(os.path.join(tmp, "manifest.json"))
+        for i in range(keys):
+            registry.register(f"collector_{i}", SigningKey.generate().verify_key.encode())
+        key_ids = registry.key_ids()
+
+        server = KeyServer(registry, port=0).start()
+        server.run_in_thread()
+        url = f"http://{server.host}:{server.port}"
+
+        def measure(name, client, run):
+            start = time.perf_counter()
+            run(client)
+            elapsed = time.perf_counter() - start
+            results.append({
+                "mode": name,
+                "lookups": lookups,
+                "requests": client.stats["requests"],
+                "seconds": elapsed,
+                "lookups_per_s": lookups / elapsed
+            })
+            client.close()
+
+        def single(client):
+            for i in range(lookups):
+                client.resolve(key_ids[i % len(key_ids)])
+
+        def new_connection(client):
+            for i in range(lookups):
+                client.resolve(key_ids[i % len(key_ids)])
+                client.close()
+
+        def batched(client):
+            for i in range(0, lookups, batch_size):
+                client.get_keys([key_ids[j % len(key_ids)] for j in range(i, min(lookups, i + batch_size))])
+
+        measure("cold, new connection", KeyServerClient(url, ttl=0), new_connection)
+        measure("cold, keep-alive", KeyServerClient(url, ttl=0), single)
+        measure(f"cold, batch of {batch_size}", KeyServerClient(url, ttl=0), batched)
+        warm = KeyServerClient(url)
+        warm.prefetch()
+        warm.stats["requests"] = 0
+        measure("warm cache", warm, single)
+        server.stop()
+
+    return results
+
+
+def bench_archive(count: int, length: int, formats=("json", "ndjson"), codecs=("gzip", "lzma"),
+                  block_size: int = 1 << 16, lookups: int = 200) -> list:
+    """Compression ratio, full-verify throughput and single-record lookup latency, raw vs archived"""
+    import random
+    from archive import write_archive, ArchiveReader
+    from log_index import LogIndex
+    from test_signing_service import LocalTestSigningService
+    from test_siem_verifier import LocalSIEMVerifier
+
+    lines = list(synthetic_lines(count, length))
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        verifier = LocalSIEMVerifier(verbose=False)
+
+    for output_format in formats:
+        with contextlib.redirect_stdout(io.StringIO()):
+            service = LocalTestSigningService(verbose=False, output_format=output_format)
+            raw = service.save_signed_batch([service.create_rfc5848_structure(line) for line in lines])
+
+        variants = [("raw", raw)]
+        for codec in codecs:
+            start = time.perf_counter()
+            path = write_archive(raw, os.path.join(use_scratch_data_dir(), f"{os.path.basename(raw)}.{codec}.sarc"),
+                                 codec=codec, block_size=block_size)
+            variants.append((codec, path, time.perf_counter() - start))
+
+        for variant in variants:
+            codec, path = variant[:2]
+            index = LogIndex(":memory:")
+            index.index_file(path)
+            locations = index.conn.execute("SELECT path, offset, length FROM messages").fetchall()
+            sample = random.Random(0).sample(locations, min(lookups, len(locations)))
+
+            start = time.perf_counter()
+            summary = verifier.verify_file(path)
+            verify_seconds = time.perf_counter() - start
+
+            def lookup(location):
+                context = verifier.batch_context(location[0], {}, index)
+                return verifier.verify_batch_message(verifier.read_record(*location, context), context)
+
+            latencies = timed_calls(lookup, sample)
+            result = {
+                "format": output_format,
+                "codec": codec,
+                "messages": count,
+                "bytes": os.path.getsize(path),
+                "ratio": os.path.getsize(raw) / os.path.getsize(path),
+                "compress_s": variant[2] if len(variant) > 2 else 0.0,
+                "valid": summary['valid'],
+                "verify_lines_per_s": count / verify_seconds,
+                "lookup_p50_ms": percentile(latencies, 50) * 1000,
+                "lookup_p99_ms": percentile(latencies, 99) * 1000
+            }
+            if codec != "raw":
+                with ArchiveReader(path) as reader:
+                    result["blocks"] = len(reader.index["blocks"])
+            results.append(result)
+            index.close()
+
+    shutil.rmtree(os.path.join(use_scratch_data_dir(), "signed_logs"), ignore_errors=True)
+    return results
+
+
+def bench_replay_filter(ids: int, error_rate: float, probes: int = 100000) -> dict:
+    """Bloom filter memory per million message_ids, measured false-positive rate and speed vs a set"""
+    import hashlib
+    import tracemalloc
+    from replay_filter import ReplayFilter
+
+    def message_ids(start, count):
+        return (hashlib.sha256(str(i).encode()).hexdigest()[:16] for i in range(start, start + count))
+
+    replay_filter = ReplayFilter(ids, error_rate)
+    start = time.perf_counter()
+    for message_id in message_ids(0, ids):
+        replay_filter.check_and_add(message_id)
+    add_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    false_positives = sum(message_id in replay_filter for message_id in message_ids(ids, probes))
+    probe_seconds = time.perf_counter() - start
+
+    # The same IDs in a Python set, for comparison
+    tracemalloc.start()
+    exact = set(message_ids(0, ids))
+    set_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del exact
+
+    return {
+        "ids": ids,
+        "target_error_rate": error_rate,
+        "measured_error_rate": false_positives / probes,
+        "layers": len(replay_filter.layers),
+        "filter_bytes": replay_filter.nbytes,
+        "filter_mib_per_million": replay_filter.nbytes / ids * 1e6 / 2**20,
+        "set_mib_per_million": set_bytes / ids * 1e6 / 2**20,
+        "adds_per_s": ids / add_seconds,
+        "probes_per_s": probes / probe_seconds
+    }
+
+
+def bench_field_filter(count: int, length: int, formats=("json", "ndjson"), hosts=("firewall",),
+                       programs=("auth",)) -> list:
+    """Full verify vs verify with a host/program filter, and the sign-time cost of field extraction"""
+    from syslog_fields import parse_fields, FieldFilter
+    from test_signing_service import LocalTestSigningService
+    from test_siem_verifier import LocalSIEMVerifier
+
+    lines = list(synthetic_lines(count, length))
+    start = time.perf_counter()
+    for line in lines:
+        parse_fields(line)
+    parse_us = (time.perf_counter() - start) / count * 1e6
+
+    match = FieldFilter(hosts=hosts, programs=programs)
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        verifier = LocalSIEMVerifier(verbose=False)
+    for output_format in formats:
+        with contextlib.redirect_stdout(io.StringIO()):
+            service = LocalTestSigningService(verbose=False, output_format=output_format)
+            path = service.save_signed_batch([service.create_rfc5848_structure(line) for line in lines])
+
+        for name, file_filter in (("all", None), ("filtered", match)):
+            start = time.perf_counter()
+            summary = verifier.verify_file(path, match=file_filter)
+            seconds = time.perf_counter() - start
+            results.append({
+                "format": output_format,
+                "mode": name,
+                "lines": count,
+                "verified": summary['valid'] + summary['invalid'],
+                "filtered": summary['filtered'],
+                "seconds": seconds,
+                "lines_per_s": count / seconds,
+                "parse_us_per_line": parse_us
+            })
+    return results
+
+
+def bench_multi_source(noisy_lines: int, quiet_lines: int, quiet_sources: int, length: int,
+                       workers: int, quantum: int) -> list:
+    """One noisy and several quiet sources signed together: when each source drains, and its lines/s"""
+    import threading
+    from config.test_config import DEFAULT_KEY_ID
+    from multi_source import MultiSourceSigner, load_sources
+
+    data_dir = tempfile.mkdtemp(prefix="multi_", dir=use_scratch_data_dir())
+    try:
+        counts = {"noisy": noisy_lines}
+        counts.update({f"quiet{i}": quiet_lines for i in range(quiet_sources)})
+        entries = []
+        for name, count in counts.items():
+            path = os.path.join(data_dir, f"{name}.log")
+            with open(path, 'w') as f:
+                for line in synthetic_lines(count, length):
+                    f.write(line + "\n")
+            # All sources share the default key so the benchmark leaves keys/ untouched
+            entries.append({"name": name, "buffer": path, "key_id": DEFAULT_KEY_ID,
+                            "partition": os.path.join(data_dir, name), "batch": {"max_messages": 1000}})
+        sources_file = os.path.join(data_dir, "sources.json")
+        with open(sources_file, 'w') as f:
+            json.dump({"sources": entries}, f)
+
+        sources = load_sources(sources_file)
+        for source in sources:
+            # Offsets live with this run's buffers: a later run may reuse their inodes
+            source["state_dir"] = os.path.join(data_dir, "state", source["name"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            signer = MultiSourceSigner(sources, workers, quantum, poll_interval=0.05)
+        drained = {}
+        start = time.perf_counter()
+
+        def watch():
+            while len(drained) < len(counts):
+                for f in signer.followers:
+                    if f.name not in drained and f.stats["lines"] >= counts[f.name] and f.writer is None:
+                        drained[f.name] = time.perf_counter() - start
+                time.sleep(0.005)
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        watcher.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = signer.run(report_interval=3600, exit_when_idle=True)
+        watcher.join(1.0)
+        total = time.perf_counter() - start
+
+        return [{
+            "source": name,
+            "lines": report[name]["lines"],
+            "batches": report[name]["batches"],
+            "drained_s": drained.get(name, total),
+            "lines_per_s": report[name]["lines"] / drained.get(name, total),
+            "workers": workers,
+            "quantum": quantum
+        } for name in counts]
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def run_entry_point(name: str, lines: int, length: int) -> dict:
+    """Wall time and peak RSS of one entry point draining `lines` lines, in a fresh interpreter"""
+    # ru_maxrss is KiB on Linux, the platform these budgets are for
+    code = FOOTPRINT_ENTRY_POINTS[name] + (
+        "\nimport json, resource"
+        "\nprint(json.dumps({'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))"
+    )
+    with tempfile.TemporaryDirectory(prefix=f"footprint_{name}_", dir=use_scratch_data_dir()) as data_dir:
+        with open(os.path.join(data_dir, "test_logs.txt"), 'w') as f:
+            for line in synthetic_lines(lines, length):
+                f.write(line + "\n")
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=BASE_DIR, check=True, capture_output=True, text=True,
+            env=dict(os.environ, SIGNER_DATA_DIR=data_dir)
+        ).stdout
+        seconds = time.perf_counter() - start
+    return dict(json.loads(out.strip().splitlines()[-1]), seconds=seconds)
+
+
+def bench_footprint(names, count: int, length: int, repeat: int = 5) -> list:
+    """Cold start (empty buffer, median of repeat runs) and peak RSS / lines/s signing count lines"""
+    results = []
+    for name in names:
+        startups = sorted(run_entry_point(name, 0, length)["seconds"] for _ in range(repeat))
+        runs = sorted((run_entry_point(name, count, length) for _ in range(repeat)), key=lambda r: r["seconds"])
+        run = runs[len(runs) // 2]
+        results.append({
+            "entry_point": name,
+            "startup_ms": startups[len(startups) // 2] * 1000,
+            "lines": count,
+            "lines_per_s": count / run["seconds"],
+            "peak_rss_mb": max(r["peak_rss_mb"] for r in runs)
+        })
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Signing / verification benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    mem = sub.add_parser("verifier-memory", help="Verifier peak RSS as batch size grows")
+    # The full sweep writes a ~7.5 GB batch at 10M and takes about 22 minutes on one core (see README.md)
+    mem.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000, 10000000],
+                     help="Messages per batch (pass e.g. 1000 10000 for a quick run)")
+    mem.add_argument("--modes", nargs="+", choices=["stream", "load"], default=["stream", "load"],
+                     help="stream = incremental parser, load = json.load baseline")
+    mem.add_argument("--load-max", type=int, default=100000,
+                     help="Largest batch for the load baseline (json.load holds the whole batch)")
+    mem.add_argument("--workdir", default=None, help="Where to write the synthetic batches")
+    mem.add_argument("--output", default=None, help="Write results as JSON")
+
+    recv = sub.add_parser("receiver", help="Syslog receiver vs. buffer-file ingestion throughput")
+    recv.add_argument("--lines", type=int, default=20000)
+    recv.add_argument("--line-length", type=int, default=80)
+    recv.add_argument("--paths", nargs="+", choices=["udp", "tcp", "file"], default=["udp", "tcp", "file"])
+    recv.add_argument("--output", default=None, help="Write results as JSON")
+
+    flush = sub.add_parser("flush-latency", help="Receive-to-disk latency of the adaptive flush controller")
+    flush.add_argument("--rates", type=int, nargs="+", default=[10, 100000], help="Offered lines/s")
+    flush.add_argument("--seconds", type=float, default=3.0, help="Sending time per rate")
+    flush.add_argument("--line-length", type=int, default=80)
+    flush.add_argument("--output", default=None, help="Write results as JSON")
+
+    keys = sub.add_parser("key-server", help="Key server lookups/s, cold and warm cache")
+    keys.add_argument("--keys", type=int, default=100, help="Keys in the registry")
+    keys.add_argument("--lookups", type=int, default=5000)
+    keys.add_argument("--batch-size", type=int, default=100)
+    keys.add_argument("--output", default=None, help="Write results as JSON")
+
+    suite = sub.add_parser("suite", help="Sign/verify hot paths: lines/s, p50/p99 latency, peak RSS")
+    suite.add_argument("--paths", nargs="+", choices=HOT_PATHS, default=HOT_PATHS)
+    suite.add_argument("--lines", type=int, default=5000)
+    suite.add_argument("--line-length", type=int, default=80)
+    suite.add_argument("--batch-size", type=int, default=500, help="Lines per batch for batch/file paths")
+    suite.add_argument("--repeat", type=int, default=5, help="Runs per path (medians and spread are kept)")
+    suite.add_argument("--baseline", default=BASELINE_FILE, help="Baseline results to compare against")
+    # Medians of 5 runs still move by up to ~25% between sessions on a 1-CPU host
+    suite.add_argument("--threshold", type=float, default=0.3,
+                       help="Allowed regression as a fraction (0.3 = 30%%); the measured spread can widen it")
+    suite.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    suite.add_argument("--output", default=None, help="Write results as JSON")
+
+    overhead = sub.add_parser("metrics-overhead", help="Per-message cost of the metrics timers")
+    overhead.add_argument("--lines", type=int, default=2000)
+    overhead.add_argument("--line-length", type=int, default=80)
+    overhead.add_argument("--rounds", type=int, default=15)
+    overhead.add_argument("--output", default=None, help="Write results as JSON")
+
+    arc = sub.add_parser("archive", help="Archive tier: compression ratio and verify/lookup speed vs raw batches")
+    arc.add_argument("--lines", type=int, default=20000)
+    arc.add_argument("--line-length", type=int, default=80)
+    arc.add_argument("--formats", nargs="+", choices=["json", "ndjson"], default=["json", "ndjson"])
+    arc.add_argument("--codecs", nargs="+", choices=["gzip", "lzma"], default=["gzip", "lzma"])
+    arc.add_argument("--block-size", type=int, default=1 << 16)
+    arc.add_argument("--lookups", type=int, default=200, help="Random single-record lookups per file")
+    arc.add_argument("--output", default=None, help="Write results as JSON")
+
+    replay = sub.add_parser("replay-filter", help="Replay filter memory per million IDs and false-positive rate")
+    replay.add_argument("--ids", type=int, nargs="+", default=[1000000])
+    replay.add_argument("--error-rate", type=float, default=0.001)
+    replay.add_argument("--probes", type=int, default=100000, help="Unseen IDs probed for false positives")
+    replay.add_argument("--output", default=None, help="Write results as JSON")
+
+    fields = sub.add_parser("field-filter", help="Verify throughput with and without a host/program filter")
+    fields.add_argument("--lines", type=int, default=20000)
+    fields.add_argument("--line-length", type=int, default=80)
+    fields.add_argument("--formats", nargs="+", choices=["json", "ndjson"], default=["json", "ndjson"])
+    fields.add_argument("--host", nargs="+", default=["firewall"])
+    fields.add_argument("--program", nargs="+", default=["auth"])
+    fields.add_argument("--output", default=None, help="Write results as JSON")
+
+    multi = sub.add_parser("multi-source", help="Fairness: quiet sources next to a noisy one, per-source lines/s")
+    multi.add_argument("--noisy-lines", type=int, default=20000)
+    multi.add_argument("--quiet-lines", type=int, default=500)
+    multi.add_argument("--quiet-sources", type=int, default=3)
+    multi.add_argument("--line-length", type=int, default=80)
+    multi.add_argument("--workers", type=int, default=2)
+    multi.add_argument("--quantum", type=int, nargs="+", default=[256, 1000000],
+                       help="Lines per turn; a huge quantum approximates first-come-first-served")
+    multi.add_argument("--output", default=None, help="Write results as JSON")
+
+    foot = sub.add_parser("footprint", help="Cold start and peak RSS of lite_signer.py vs the full service")
+    foot.add_argument("--entry-points", nargs="+", choices=sorted(FOOTPRINT_ENTRY_POINTS), default=["lite", "full"])
+    foot.add_argument("--lines", type=int, default=20000)
+    foot.add_argument("--line-length", type=int, default=80)
+    foot.add_argument("--repeat", type=int, default=5, help="Runs per measurement (median is kept)")
+    foot.add_argument("--output", default=None, help="Write results as JSON")
+
+    hot = sub.add_parser("_child-hot-path")
+    hot.add_argument("name")
+    hot.add_argument("lines", type=int)
+    hot.add_argument("line_length", type=int)
+    hot.add_argument("batch_size", type=int)
+
+    child = sub.add_parser("_child-verify")
+    child.add_argument("path")
+    child.add_argument("mode")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.command == "_child-verify":
+        _child_verify(args.path, args.mode)
+    elif args.command == "_child-hot-path":
+        # Fresh buffer/output/state per run so earlier runs do not skew this one
+        with tempfile.TemporaryDirectory(prefix="hot_", dir=use_scratch_data_dir()) as data_dir:
+            os.environ["SIGNER_DATA_DIR"] = data_dir
+            _child_hot_path(args.name, args.lines, args.line_length, args.batch_size)
+    elif args.command == "suite":
+        print(f"📂 Scratch data dir: {use_scratch_data_dir()}")
+        results = bench_hot_paths(args.paths, args.lines, args.line_length, args.batch_size, args.repeat)
+        if args.save_baseline:
+            with open(args.baseline, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"💾 Saved baseline to {args.baseline}")
+        elif os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+            for difference in host_differences(baseline):
+                print(f"⚠️ Baseline host differs ({difference}); regressions may be the machine, not the code")
+            regressions = compare_to_baseline(results, baseline, args.threshold)
+            for r in regressions:
+                print(f"❌ {r['name']} {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} "
+                      f"(allowed {r['allowed']:.0%})")
+            if regressions:
+                if args.output:
+                    with open(args.output, 'w') as f:
+                        json.dump(results, f, indent=2)
+                sys.exit(1)
+            print(f"✓ No regressions beyond {args.threshold:.0%} or the measured spread against {args.baseline}")
+    elif args.command == "verifier-memory":
+        results = bench_verifier_memory(args.sizes, args.modes, args.workdir, args.load_max)
+        incomplete = [r for r in results if r['valid'] != r['messages'] or r['file_errors']]
+        for r in incomplete:
+            print(f"❌ {r['messages']} messages ({r['mode']}): {r['valid']} valid, {r['file_errors']} file errors")
+        if incomplete:
+            sys.exit(1)
+    elif args.command == "receiver":
+        print(f"📂 Scratch data dir: {use_scratch_data_dir()}")
+        results = []
+        print(f"{'path':>6} {'lines':>8} {'handled':>8} {'spilled':>8} {'seconds':>8} {'lines/s':>10}")
+        for path in args.paths:
+            if path == "file":
+                result = bench_file_buffer(args.lines, args.line_length)
+            else:
+                result = bench_receiver(args.lines, args.line_length, path)
+            results.append(result)
+            print(f"{result['path']:>6} {result['lines']:>8} {result['handled']:>8} {result['spilled']:>8} "
+                  f"{result['seconds']:>8.2f} {result['lines_per_s']:>10.0f}")
+    elif args.command == "flush-latency":
+        print(f"📂 Scratch data dir: {use_scratch_data_dir()}")
+        results = []
+        print(f"{'rate':>8} {'lines':>8} {'batches':>8} {'achieved/s':>11} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for rate in args.rates:
+            result = bench_flush_latency(rate, args.seconds, args.line_length)
+            results.append(result)
+            print(f"{result['rate']:>8} {result['lines']:>8} {result['batches']:>8} "
+                  f"{result['achieved_lines_per_s']:>11.0f} {result['p50_ms']:>8.1f} "
+                  f"{result['p99_ms']:>8.1f} {result['max_ms']:>8.1f}")
+    elif args.command == "metrics-overhead":
+        print(f"📂 Scratch data dir: {use_scratch_data_dir()}")
+        results = bench_metrics_overhead(args.lines, args.line_length, args.rounds)
+
+    elif args.command == "archive":
+        print(f"📂 Scratch data dir: {use_scratch_data_dir()}")
+        results = bench_archive(args.lines, args.line_length, args.formats, args.codecs, args.block_size, args.lookups)
+        print(f"{'format':>7} {'codec':>6} {'MiB':>7} {'ratio':>6} {'compress s':>11} {'verify lines/s':>15} "
+              f"{'lookup p50 ms':>14} {'p99 ms':>7}")
+        for r in results:
+            print(f"{r['format']:>7} {r['codec']:>6} {r['bytes'] / 2**20:>7.2f} {r['ratio']:>6.1f} "
+                  f"{r['compress_s']:>11.2f} {r['verify_lines_per_s']:>15.0f} "
+                  f"{r['lookup_p50_ms']:>14.3f} {r['lookup_p99_ms']:>7.3f}")
+    elif args.command == "replay-filter":
+        results = []
+        print(f"{'IDs':>10} {'target FP':>10} {'measured FP':>12} {'filter MiB/M':>13} {'set MiB/M':>10} "
+              f"{'adds/s':>9} {'probes/s':>9}")
+        for ids in args.ids:
+            r = bench_replay_filter(ids, args.error_rate, args.probes)
+            results.append(r)
+            print(f"{r['ids']:>10} {r['target_error_rate']:>10.4f} {r['measured_error_rate']:>12.5f} "
+                  f"{r['filter_mib_per_million']:>13.2f} {r['set_mib_per_million']:>10.1f} "
+                  f"{r['adds_per_s']:>9.0f} {r['probes_per_s']:>9.0f}")
+    elif args.command == "field-filter":
+        print(f"📂 Scratch data dir: {use_scratch_data_dir()}")
+        results = bench_field_filter(args.lines, args.line_length, args.formats, args.host, args.program)
+        print(f"Field extraction: {results[0]['parse_us_per_line']:.2f} us/line at sign time")
+        print(f"{'format':>7} {'mode':>9} {'verified':>9} {'filtered':>9} {'seconds':>8} {'lines/s':>10}")
+        for r in results:
+            print(f"{r['format']:>7} {r['mode']:>9} {r['verified']:>9} {r['filtered']:>9} "
+                  f"{r['seconds']:>8.2f} {r['lines_per_s']:>10.0f}")
+    elif args.command == "multi-source":
+        print(f"📂 Scratch data dir: {use_scratch_data_dir()}")
+        results = []
+        print(f"{'quantum':>8} {'source':>8} {'lines':>7} {'batches':>8} {'drained s':>10} {'lines/s':>9}")
+        for quantum in args.quantum:
+            for r in bench_multi_source(args.noisy_lines, args.quiet_lines, args.quiet_sources,
+                                        args.line_length, args.workers, quantum):
+                results.append(r)
+                print(f"{quantum:>8} {r['source']:>8} {r['lines']:>7} {r['batches']:>8} "
+                      f"{r['drained_s']:>10.2f} {r['lines_per_s']:>9.0f}")
+    elif args.command == "footprint":
+        print(f"📂 Scratch data dir: {use_scratch_data_dir()}")
+        results = bench_footprint(args.entry_points, args.lines, args.line_length, args.repeat)
+        print(f"{'entry point':>12} {'startup ms':>11} {'lines':>7} {'lines/s':>9} {'peak RSS MiB':>13}")
+        for r in results:
+            print(f"{r['entry_point']:>12} {r['startup_ms']:>11.1f} {r['lines']:>7} {r['lines_per_s']:>9.0f} "
+                  f"{r['peak_rss_mb']:>13.1f}")
+        over = [
+            f"{r['entry_point']} {metric} {r[metric]:.1f} > {budget}"
+            for r in results if r["entry_point"] == "lite"
+            for metric, budget in FOOTPRINT_BUDGETS.items() if r[metric] > budget
+        ]
+        for line in over:
+            print(f"❌ Over budget: {line}")
+        if over:
+            sys.exit(1)
+        print(f"✓ lite_signer.py within budget: {FOOTPRINT_BUDGETS}")
+    elif args.command == "key-server":
+        results = bench_key_server(args.keys, args.lookups, args.batch_size)
+        print(f"{'mode':>22} {'lookups':>8} {'requests':>9} {'seconds':>8} {'lookups/s':>11}")
+        for result in results:
+            print(f"{result['mode']:>22} {result['lookups']:>8} {result['requests']:>9} "
+                  f"{result['seconds']:>8.2f} {result['lookups_per_s']:>11.0f}")
+
+    if not args.command.startswith("_child") and args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Follow the log buffer file like `tail -F` with a persisted byte offset."""
+import os
+import json
+import signal
+import threading
+from contextlib import contextmanager
+
+
+def write_json_atomic(path: str, data: dict):
+    """Write JSON via temp file + fsync + rename so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(os.path.dirname(path))
+
+
+def fsync_dir(path: str):
+    """Persist a rename by syncing its directory entry (no-op where unsupported)"""
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def stop_on_signals(stop: threading.Event, signals=(signal.SIGINT, signal.SIGTERM)):
+    """Turn SIGINT/SIGTERM into stop.set() instead of KeyboardInterrupt
+
+    A follow loop checks the event between batches, so a signal can never
+    interrupt a half-published batch. Only the main thread can install
+    handlers; elsewhere this is a no-op.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield stop
+        return
+    previous = {sig: signal.signal(sig, lambda signum, frame: stop.set()) for sig in signals}
+    try:
+        yield stop
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+class BufferTailer:
+    """Incrementally read complete lines from a growing, rotating buffer file.
+
+    The committed position (inode + byte offset) lives in a checkpoint file
+    and only moves forward after the caller has durably written the batch
+    built from the lines. Committing is two-phase: the target offset and the
+    batch filename are recorded first, so a crash between writing the batch
+    and committing the offset is resolved on restart by checking whether the
+    batch file exists. Lines are therefore neither lost nor duplicated.
+    """
+
+    def __init__(self, path: str, checkpoint_file: str, chunk_size: int = 1 << 20):
+        self.path = path
+        self.checkpoint_file = checkpoint_file
+        self.chunk_size = chunk_size
+
+        self.fh = None
+        self.inode = None
+        self.committed = 0   # offset of the first line not yet durably signed
+        self.position = 0    # offset of the first line not yet handed out
+        self.partial = b""   # bytes after position without a trailing newline yet
+
+        self.load_checkpoint()
+
+    def load_checkpoint(self):
+        """Restore the committed position, finishing any interrupted commit"""
+        if not os.path.exists(self.checkpoint_file):
+            return
+
+        with open(self.checkpoint_file, 'r') as f:
+            state = json.load(f)
+
+        self.inode = state.get("inode")
+        self.committed = state.get("offset", 0)
+
+        pending = state.get("pending")
+        if pending and os.path.exists(pending["batch_file"]):
+            # Batch reached disk before the crash: its lines are already signed
+            self.inode = pending["inode"]
+            self.committed = pending["offset"]
+            self.save_checkpoint()
+        elif pending:
+            self.save_checkpoint()
+
+        self.position = self.committed
+
+    def save_checkpoint(self, pending: dict = None):
+        write_json_atomic(self.checkpoint_file, {
+            "inode": self.inode,
+            "offset": self.committed,
+            "pending": pending
+        })
+
+    def open(self) -> bool:
+        """Open the buffer file, resuming from the checkpoint if it is the same file"""
+        try:
+            fh = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+
+        st = os.fstat(fh.fileno())
+        if st.st_ino != self.inode or st.st_size < self.committed:
+            # New file (rotated) or truncated in place: start from the top
+            self.inode = st.st_ino
+            self.committed = 0
+            self.save_checkpoint()
+
+        self.fh = fh
+        self.position = self.committed
+        self.partial = b""
+        fh.seek(self.position)
+        return True
+
+    def close(self):
+        if self.fh:
+            self.fh.close()
+            self.fh = None
+
+    def rotated(self) -> bool:
+        """True when the path now names a different file than the open handle"""
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return False
+
+    def read_lines(self, max_lines: int) -> list:
+        """Return up to max_lines new complete lines (never spans two files)
+
+        After a rotation the new file is only opened once everything read
+        from the old one is committed; until then this returns [].
+        """
+        if self.fh is None and not self.open():
+            return []
+
+        st = os.fstat(self.fh.fileno())
+        if st.st_size < self.position + len(self.partial):
+            # Truncated while open: whatever was not read yet is gone
+            print(f"⚠️ Buffer truncated under reader at offset {self.position}, restarting from 0")
+            self.committed = 0
+            self.save_checkpoint()
+            self.position = 0
+            self.partial = b""
+            self.fh.seek(0)
+
+        lines = []
+        while len(lines) < max_lines:
+            chunk = self.fh.read(self.chunk_size)
+            if not chunk:
+                break
+
+            data = self.partial + chunk
+            start = 0
+            while len(lines) < max_lines:
+                end = data.find(b"\n", start)
+                if end < 0:
+                    break
+                lines.append(data[start:end])
+                start = end + 1
+
+            self.position += start
+            self.partial = data[start:]
+            if len(lines) >= max_lines and self.partial:
+                # Leave the unread remainder in the file for the next call
+                self.fh.seek(self.position)
+                self.partial = b""
+
+        if not lines and self.rotated():
+            # Old file fully drained; a final unterminated line still counts
+            if self.partial:
+                lines.append(self.partial)
+                self.position += len(self.partial)
+                self.partial = b""
+            elif self.position != self.committed:
+                # Lines of the old file are still in an open batch. Opening the
+                # new file would checkpoint its inode at offset 0, so a crash
+                # before that batch is published would lose them: wait until
+                # the caller flushes and commits.
+                pass
+            else:
+                self.close()
+                if self.open():
+                    return self.read_lines(max_lines)
+
+        return [line.decode('utf-8', errors='replace') for line in lines]
+
+    def begin_commit(self, batch_file: str):
+        """Record the offset that becomes committed once batch_file exists"""
+        self.save_checkpoint(pending={
+            "inode": self.inode,
+            "offset": self.position,
+            "batch_file": batch_file
+        })
+
+    def commit(self):
+        """Mark everything handed out so far as durably signed"""
+        self.committed = self.position
+        self.save_checkpoint()
@@ -3,15 +3,130 @@ import os
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Buffer, output and state can live elsewhere (e.g. for benchmarks); keys stay here
+DATA_DIR = os.environ.get("SIGNER_DATA_DIR", BASE_DIR)
+
 # Local paths for testing
-LOCAL_BUFFER_FILE = os.path.join(BASE_DIR, "test_logs.txt")
-LOCAL_SIGNED_DIR = os.path.join(BASE_DIR, "signed_logs")
+LOCAL_BUFFER_FILE = os.path.join(DATA_DIR, "test_logs.txt")
+LOCAL_SIGNED_DIR = os.path.join(DATA_DIR, "signed_logs")
 LOCAL_KEY_DIR = os.path.join(BASE_DIR, "keys")
+LOCAL_STATE_DIR = os.path.join(DATA_DIR, "state")
+
+
+def ensure_dirs():
+    """Create the output, key and state directories; entry points call this instead of import-time side effects"""
+    for path in (LOCAL_SIGNED_DIR, LOCAL_KEY_DIR, LOCAL_STATE_DIR):
+        os.makedirs(path, exist_ok=True)
 
-# Ensure directories exist
-os.makedirs(LOCAL_SIGNED_DIR, exist_ok=True)
-os.makedirs(LOCAL_KEY_DIR, exist_ok=True)
 
 # Key files for testing
 TEST_KEY_FILE = os.path.join(LOCAL_KEY_DIR, "test_signing.key")
-TEST_PUBLIC_KEY_FILE = os.path.join(LOCAL_KEY_DIR, "test_signing.pub")
\ No newline at end of file
+TEST_PUBLIC_KEY_FILE = os.path.join(LOCAL_KEY_DIR, "test_signing.pub")
+
+# Key registry: key_id -> public key file, for verifying across rotations
+KEY_MANIFEST_FILE = os.path.join(LOCAL_KEY_DIR, "manifest.json")
+DEFAULT_KEY_ID = "test_signer_v1"
+
+# Local key server (test_key_server.py). Set KEY_SERVER_URL, e.g.
+# "http://127.0.0.1:8765", to have the verifier fetch keys from it
+KEY_SERVER_HOST = "127.0.0.1"
+KEY_SERVER_PORT = 8765
+KEY_SERVER_URL = None
+KEY_CACHE_TTL = 300
+
+# Signing mode: "message" signs every log line, "merkle" signs one
+# Merkle root per batch and stores an inclusion proof with each message
+SIGNING_MODE = "message"
+
+# Tail-follow ingestion of the buffer file
+BUFFER_CHECKPOINT_FILE = os.path.join(LOCAL_STATE_DIR, "buffer_offset.json")
+FOLLOW_BATCH_LINES = 1000
+FOLLOW_POLL_INTERVAL = 0.5
+
+# Signing worker processes used by process_buffer (1 = single-threaded)
+SIGNING_WORKERS = 1
+
+# Batch output format: "json" (indented, one document per batch) or
+# "ndjson" (compact header + one record per line, streamed as signed)
+OUTPUT_FORMAT = "json"
+
+# Store facility, severity, host and program parsed from each line's
+# syslog header next to the signed payload (unsigned, derived fields)
+EXTRACT_FIELDS = True
+
+# Persistent index over signed batches (message_id / timestamp -> file offset)
+LOG_INDEX_FILE = os.path.join(LOCAL_STATE_DIR, "log_index.sqlite")
+INDEX_ON_WRITE = True
+
+# Store of batch files that already verified cleanly (incremental re-audits)
+VERIFY_CHECKPOINT_FILE = os.path.join(LOCAL_STATE_DIR, "verified.sqlite")
+
+# Bulk verification splits message-mode compact batches larger than this
+# into byte ranges, so a few large batches still keep every worker busy
+VERIFY_SPLIT_BYTES = 1 << 20
+
+# Cross-batch hash chain (sequence number + previous batch hash per batch)
+HASH_CHAIN = True
+CHAIN_TIP_FILE = os.path.join(LOCAL_STATE_DIR, "chain_tip.json")
+
+# Syslog receiver (UDP + TCP) feeding the signer directly
+SYSLOG_HOST = "127.0.0.1"
+SYSLOG_PORT = 5514
+RECEIVER_QUEUE_SIZE = 10000
+RECEIVER_BATCH_LINES = 1000
+RECEIVER_MAX_LATENCY = 1.0
+RECEIVER_SPILL_FILE = os.path.join(LOCAL_STATE_DIR, "receiver_spill.log")
+
+# Metrics: counters and latency histograms (SIGNER_METRICS=0 turns the
+# per-message timers off), Prometheus text on METRICS_PORT with
+# --metrics-port, and a periodic JSON dump in daemon mode
+METRICS_ENABLED = os.environ.get("SIGNER_METRICS", "1") != "0"
+METRICS_SAMPLE_EVERY = 16
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+METRICS_DUMP_INTERVAL = 60
+SIGNER_METRICS_FILE = os.path.join(LOCAL_STATE_DIR, "signer_metrics.json")
+VERIFIER_METRICS_FILE = os.path.join(LOCAL_STATE_DIR, "verifier_metrics.json")
+LOG_LEVEL = os.environ.get("SIGNER_LOG_LEVEL", "INFO")
+
+# Daemon flush controller: a batch closes on whichever limit is hit first;
+# with FLUSH_ADAPTIVE the message limit tracks the input rate so a batch
+# holds about FLUSH_TARGET_LATENCY seconds of traffic
+FLUSH_MAX_MESSAGES = 10000
+FLUSH_MAX_BYTES = 8 * 1024 * 1024
+FLUSH_MAX_AGE = 1.0
+FLUSH_TARGET_LATENCY = 0.5
+FLUSH_ADAPTIVE = True
+
+# Archive tier (archive.py): closed batches older than ARCHIVE_MIN_AGE
+# seconds are rewritten as independently compressed blocks ("gzip" or
+# "lzma"); with ARCHIVE_ENABLED the daemon compacts every ARCHIVE_INTERVAL
+ARCHIVE_ENABLED = False
+ARCHIVE_CODEC = "gzip"
+ARCHIVE_BLOCK_SIZE = 64 * 1024
+ARCHIVE_MIN_AGE = 3600
+ARCHIVE_INTERVAL = 300
+
+# Replay / duplicate detection in bulk verification: a Bloom filter over
+# message_ids sized for REPLAY_EXPECTED_IDS (it grows past that), with
+# filter hits confirmed through the lookup index
+REPLAY_CHECK = True
+REPLAY_FILTER_FILE = os.path.join(LOCAL_STATE_DIR, "replay_filter.bin")
+REPLAY_EXPECTED_IDS = 1_000_000
+REPLAY_ERROR_RATE = 0.001
+
+# Multi-source signing (multi_source.py): SOURCES_FILE lists the inputs,
+# each with its own key_id, partition and batch policy; SOURCE_WORKERS
+# threads serve them round-robin, SOURCE_QUANTUM lines per turn
+SOURCES_FILE = os.path.join(BASE_DIR, "config", "sources.json")
+SOURCE_WORKERS = 4
+SOURCE_QUANTUM = 256
+SOURCE_REPORT_INTERVAL = 10.0
+SOURCE_STATS_FILE = os.path.join(LOCAL_STATE_DIR, "sources_stats.json")
+
+# Low-footprint signer (lite_signer.py) for constrained routers: compact
+# output only, at most LITE_READ_LINES input lines in memory at a time,
+# and a hard address-space cap of LITE_MEMORY_LIMIT_MB (None = no cap)
+LITE_MEMORY_LIMIT_MB = None
+LITE_READ_LINES = 256
+LITE_READ_CHUNK = 64 * 1024
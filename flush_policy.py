@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Batch flush controller: close a batch on size, bytes or age, adapting size to the input rate."""
+import time
+
+
+class FlushPolicy:
+    """Decide when the open batch should be closed.
+
+    A batch is flushed as soon as any limit is hit: max_messages,
+    max_bytes, or max_age seconds since its first message. With adaptive
+    set, the message limit follows the observed input rate (an EWMA), so
+    a batch holds about target_latency seconds of traffic: at 10 lines/s
+    batches close on age with a handful of messages, and at 100k lines/s
+    they close on size long before max_age. Either way, receive-to-disk
+    latency stays near target_latency instead of depending on when a
+    polling loop happens to run.
+    """
+
+    def __init__(self, max_messages=10000, max_bytes=8 << 20, max_age=1.0,
+                 min_messages=1, target_latency=None, adaptive=True, smoothing=0.3):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.min_messages = min_messages
+        self.target_latency = target_latency if target_latency is not None else max_age / 2
+        self.adaptive = adaptive
+        self.smoothing = smoothing
+
+        self.rate = None
+        self.batch_limit = max_messages
+        self.reset()
+
+    def reset(self):
+        self.opened_at = None
+        self.messages = 0
+        self.bytes = 0
+
+    def add(self, nbytes: int, now: float = None):
+        """Account for one message added to the open batch"""
+        if self.opened_at is None:
+            self.opened_at = time.monotonic() if now is None else now
+        self.messages += 1
+        self.bytes += nbytes
+
+    def remaining(self) -> int:
+        """Messages that still fit before a size-triggered flush"""
+        return max(1, self.batch_limit - self.messages)
+
+    def time_left(self, now: float = None) -> float:
+        """Seconds until the open batch reaches max_age (max_age if nothing is open)"""
+        if self.opened_at is None:
+            return self.max_age
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.opened_at + self.max_age - now)
+
+    def due(self, now: float = None) -> str:
+        """Reason the open batch should be flushed now, or "" if it can stay open"""
+        if self.messages == 0:
+            return ""
+        if self.messages >= self.batch_limit:
+            return "messages"
+        if self.bytes >= self.max_bytes:
+            return "bytes"
+        if self.time_left(now) <= 0:
+            return "age"
+        return ""
+
+    def flushed(self, now: float = None):
+        """Record a completed flush and retune the batch size to the input rate"""
+        now = time.monotonic() if now is None else now
+        if self.opened_at is not None and self.adaptive:
+            elapsed = max(now - self.opened_at, 1e-3)
+            rate = self.messages / elapsed
+            self.rate = rate if self.rate is None else (
+                self.smoothing * rate + (1 - self.smoothing) * self.rate
+            )
+            target = int(self.rate * self.target_latency)
+            self.batch_limit = max(self.min_messages, min(self.max_messages, target))
+        self.reset()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Cross-batch hash chain: each batch links to the hash of the previous one."""
+import os
+import json
+import hashlib
+
+from buffer_tail import write_json_atomic
+
+GENESIS_HASH = "0" * 64
+
+
+def compute_batch_hash(batch_id: str, sequence: int, prev_hash: str,
+                       content_digest: str, message_count: int) -> str:
+    """Hash that identifies a batch in the chain (and is what gets signed)"""
+    data = f"{batch_id}|{sequence}|{prev_hash}|{content_digest}|{message_count}"
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class ContentDigest:
+    """Streaming digest over the leaf hashes of a batch, in message order"""
+
+    def __init__(self):
+        self.sha = hashlib.sha256()
+
+    def update(self, leaf: bytes):
+        self.sha.update(leaf)
+
+    def hexdigest(self) -> str:
+        return self.sha.hexdigest()
+
+
+class ChainTip:
+    """Cached head of the chain so appending a batch is O(1).
+
+    The tip lives in a small JSON file. A new link is first recorded as
+    pending together with its batch file; commit() makes it the tip once the
+    batch is published. On load, a pending link whose batch file exists is
+    adopted, so a crash between publishing and committing cannot fork the
+    chain, and no archive rescan is needed at startup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sequence = -1
+        self.batch_hash = GENESIS_HASH
+        self.batch_file = None
+        self.pending = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r') as f:
+            state = json.load(f)
+
+        self.sequence = state["sequence"]
+        self.batch_hash = state["batch_hash"]
+        self.batch_file = state.get("batch_file")
+
+        pending = state.get("pending")
+        if pending and os.path.exists(pending["batch_file"]):
+            self.sequence = pending["sequence"]
+            self.batch_hash = pending["batch_hash"]
+            self.batch_file = pending["batch_file"]
+            self.save()
+        elif pending:
+            self.save()
+
+    def save(self):
+        write_json_atomic(self.path, {
+            "sequence": self.sequence,
+            "batch_hash": self.batch_hash,
+            "batch_file": self.batch_file,
+            "pending": self.pending
+        })
+
+    def next_link(self, batch_id: str, message_count: int, content_digest: str, batch_file: str) -> dict:
+        """Build the (unsigned) chain block for the next batch and mark it pending"""
+        sequence = self.sequence + 1
+        batch_hash = compute_batch_hash(batch_id, sequence, self.batch_hash, content_digest, message_count)
+
+        self.pending = {"sequence": sequence, "batch_hash": batch_hash, "batch_file": batch_file}
+        self.save()
+
+        return {
+            "sequence": sequence,
+            "prev_hash": self.batch_hash,
+            "content_digest": content_digest,
+            "message_count": message_count,
+            "batch_hash": batch_hash
+        }
+
+    def commit(self):
+        """Advance the tip to the pending link once its batch is on disk"""
+        if self.pending is None:
+            return
+        self.sequence = self.pending["sequence"]
+        self.batch_hash = self.pending["batch_hash"]
+        self.batch_file = self.pending["batch_file"]
+        self.pending = None
+        self.save()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Registry of signer public keys: key_id -> VerifyKey, backed by a key directory and manifest."""
+import os
+import json
+from datetime import datetime
+
+from nacl.signing import VerifyKey
+
+from buffer_tail import write_json_atomic
+
+
+class KeyLookupError(Exception):
+    """A record names a key that is unknown, revoked or does not match the registry"""
+
+
+class KeyRegistry:
+    """Resolve key_id to a cached VerifyKey.
+
+    The manifest is a small JSON file next to the keys:
+
+        {"keys": {"test_signer_v1": {"file": "test_signing.pub",
+                                     "algorithm": "ed25519",
+                                     "status": "active", "added": "..."}}}
+
+    File names are relative to the manifest's directory. Keys marked
+    "revoked" resolve to an error. Without a manifest, default_key_file is
+    served as default_key_id, so existing single-key setups keep working.
+
+    resolve() also checks the public key a record carries inline against
+    the registry. Results are cached per (key_id, embedded key) pair, so
+    each key is decoded once per run and a mismatching record is rejected
+    with a dict lookup before any signature work.
+    """
+
+    def __init__(self, manifest_file: str, default_key_id: str = None, default_key_file: str = None):
+        self.manifest_file = manifest_file
+        self.key_dir = os.path.dirname(manifest_file)
+        self.default_key_id = default_key_id
+        self.default_key_file = default_key_file
+        self.entries = {}
+        self.raw_keys = {}
+        self.verify_keys = {}
+        self.resolved = {}
+        self.load()
+
+    def load(self):
+        """(Re)read the manifest; the new entries replace the old in one assignment"""
+        entries = {}
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, 'r') as f:
+                entries = json.load(f).get("keys", {})
+        elif self.default_key_id and self.default_key_file and os.path.exists(self.default_key_file):
+            entries = {self.default_key_id: {
+                "file": os.path.relpath(self.default_key_file, self.key_dir),
+                "algorithm": "ed25519",
+                "status": "active"
+            }}
+        self.entries = entries
+        self.raw_keys = {}
+        self.verify_keys = {}
+        self.resolved = {}
+
+    def key_ids(self) -> list:
+        return sorted(self.entries)
+
+    def public_key_bytes(self, key_id: str) -> bytes:
+        if key_id not in self.raw_keys:
+            entry = self.entries.get(key_id)
+            if entry is None:
+                raise KeyLookupError(f"Unknown key_id: {key_id}")
+            with open(os.path.join(self.key_dir, entry["file"]), 'rb') as f:
+                self.raw_keys[key_id] = f.read()
+        return self.raw_keys[key_id]
+
+    def verify_key(self, key_id: str) -> VerifyKey:
+        """Decoded key, without status or embedded-key checks"""
+        if key_id not in self.verify_keys:
+            self.verify_keys[key_id] = VerifyKey(self.public_key_bytes(key_id))
+        return self.verify_keys[key_id]
+
+    def resolve(self, key_id: str, embedded_hex: str = None) -> VerifyKey:
+        """VerifyKey for key_id; raises KeyLookupError if it cannot be trusted"""
+        if key_id is None:
+            key_id = self.default_key_id
+        cache_key = (key_id, embedded_hex)
+        result = self.resolved.get(cache_key)
+        if result is None:
+            result = self._resolve(key_id, embedded_hex)
+            self.resolved[cache_key] = result
+        if isinstance(result, KeyLookupError):
+            raise result.with_traceback(None)
+        return result
+
+    def _resolve(self, key_id: str, embedded_hex: str):
+        try:
+            entry = self.entries.get(key_id)
+            if entry is None:
+                raise KeyLookupError(f"Unknown key_id: {key_id}")
+            if entry.get("status") == "revoked":
+                raise KeyLookupError(f"Key {key_id} is revoked")
+
+            raw = self.public_key_bytes(key_id)
+            if embedded_hex is not None and embedded_hex != raw.hex():
+                raise KeyLookupError(f"Embedded public key does not match registry for {key_id}")
+            return self.verify_key(key_id)
+        except KeyLookupError as e:
+            return e
+        except Exception as e:
+            return KeyLookupError(f"Failed to load key {key_id}: {e}")
+
+    def register(self, key_id: str, public_key: bytes, filename: str = None, status: str = "active"):
+        """Add or update a key: writes the key file if missing and the manifest atomically"""
+        filename = filename or f"{key_id}.pub"
+        path = os.path.join(self.key_dir, filename)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(public_key)
+
+        entries = dict(self.entries)
+        entries[key_id] = {
+            "file": filename,
+            "algorithm": "ed25519",
+            "status": status,
+            "added": self.entries.get(key_id, {}).get("added", datetime.utcnow().isoformat() + "Z")
+        }
+        write_json_atomic(self.manifest_file, {"keys": entries})
+        self.load()
+
+
+if __name__ == "__main__":
+    import argparse
+    from config.test_config import KEY_MANIFEST_FILE, DEFAULT_KEY_ID, TEST_PUBLIC_KEY_FILE, ensure_dirs
+
+    parser = argparse.ArgumentParser(description="Manage the signer key registry")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Show registered keys")
+    add = sub.add_parser("add", help="Register a public key file under a key_id")
+    add.add_argument("key_id")
+    add.add_argument("public_key_file")
+    revoke = sub.add_parser("revoke", help="Mark a key as revoked")
+    revoke.add_argument("key_id")
+    args = parser.parse_args()
+    ensure_dirs()
+
+    registry = KeyRegistry(KEY_MANIFEST_FILE, DEFAULT_KEY_ID, TEST_PUBLIC_KEY_FILE)
+    if args.command == "add":
+        with open(args.public_key_file, 'rb') as f:
+            registry.register(args.key_id, f.read())
+        print(f"✓ Registered {args.key_id}")
+    elif args.command == "revoke":
+        entry = registry.entries[args.key_id]
+        registry.register(args.key_id, registry.public_key_bytes(args.key_id), entry["file"], status="revoked")
+        print(f"✓ Revoked {args.key_id}")
+
+    for key_id in registry.key_ids():
+        entry = registry.entries[key_id]
+        print(f"   {key_id}: {entry['file']} ({entry.get('status', 'active')})")
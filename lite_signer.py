@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Low-footprint signer for OpenWRT-class routers (little RAM, slow flash).
+
+Signs the buffer file into the same compact batches, hash chain and
+buffer offsets as `test_signing_service.py --follow --output-format
+ndjson`, so either can run on the same data directory, but:
+
+- only what signing needs is imported: no metrics, HTTP server, lookup
+  index or archive codecs. Batches are indexed later by the verifier.
+- each line becomes one SignedRecord (__slots__, fields as a tuple) that
+  is written to the open batch straight away. At most LITE_READ_LINES
+  input lines are held at once; merkle mode keeps 32 bytes per message.
+- LITE_MEMORY_LIMIT_MB caps the address space (RLIMIT_AS), so a runaway
+  process fails with MemoryError instead of waking the OOM killer.
+"""
+import os
+import hashlib
+import threading
+from datetime import datetime
+
+from config.test_config import *
+from batch_format import (
+    CompactBatchWriter, SignedRecord, COMPACT_EXTENSION, ROOT_SIGNATURE_VERSION, root_signing_data
+)
+from buffer_tail import BufferTailer, stop_on_signals
+from flush_policy import FlushPolicy
+from hash_chain import ChainTip
+from syslog_fields import parse_fields
+
+from nacl.signing import SigningKey
+
+
+def set_memory_limit(megabytes: float) -> bool:
+    """Cap this process's address space; returns False where RLIMIT_AS is unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return False
+    limit = int(megabytes * 2**20)
+    hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return True
+
+
+class LiteSigner:
+    """Tail the buffer and stream signed records into compact batches"""
+
+    def __init__(self, signing_mode=SIGNING_MODE, buffer_file=LOCAL_BUFFER_FILE, signed_dir=LOCAL_SIGNED_DIR,
+                 key_id=DEFAULT_KEY_ID, key_file=TEST_KEY_FILE, public_key_file=TEST_PUBLIC_KEY_FILE,
+                 state_dir=LOCAL_STATE_DIR, read_lines=LITE_READ_LINES):
+        if signing_mode not in ("message", "merkle"):
+            raise ValueError(f"Unknown signing mode: {signing_mode}")
+        ensure_dirs()
+        os.makedirs(signed_dir, exist_ok=True)
+        os.makedirs(state_dir, exist_ok=True)
+
+        self.signing_mode = signing_mode
+        self.signed_dir = signed_dir
+        self.key_id = key_id
+        self.read_lines = read_lines
+        self.batch_counter = 0
+        self.private_key = self.load_key(key_file, public_key_file)
+        self.public_key_hex = self.private_key.verify_key.encode().hex()
+        self.chain = ChainTip(os.path.join(state_dir, os.path.basename(CHAIN_TIP_FILE))) if HASH_CHAIN else None
+        self.tailer = BufferTailer(
+            buffer_file, os.path.join(state_dir, os.path.basename(BUFFER_CHECKPOINT_FILE)), chunk_size=LITE_READ_CHUNK
+        )
+
+    def load_key(self, key_file: str, public_key_file: str) -> SigningKey:
+        """Load the signing key; a new key is generated and registered like the full service does"""
+        if os.path.exists(key_file):
+            with open(key_file, 'rb') as f:
+                return SigningKey(f.read())
+
+        from key_registry import KeyRegistry
+
+        private_key = SigningKey.generate()
+        with open(key_file, 'wb') as f:
+            f.write(private_key.encode())
+        with open(public_key_file, 'wb') as f:
+            f.write(private_key.verify_key.encode())
+        registry = KeyRegistry(KEY_MANIFEST_FILE)
+        if self.key_id not in registry.entries:
+            registry.register(self.key_id, private_key.verify_key.encode(), os.path.basename(public_key_file))
+        print("✓ Generated new test keys")
+        return private_key
+
+    def make_record(self, line: str) -> SignedRecord:
+        timestamp = datetime.utcnow().isoformat() + "Z"
+        message_id = hashlib.sha256(f"{timestamp}{line}".encode()).hexdigest()[:16]
+        fields = parse_fields(line) if EXTRACT_FIELDS else None
+        if self.signing_mode == "merkle":
+            return SignedRecord(message_id, timestamp, line, None, fields)
+        signature = self.private_key.sign(f"{message_id}{timestamp}{line}".encode()).signature
+        return SignedRecord(message_id, timestamp, line, signature, fields)
+
+    def sign_root(self, batch_id: str, tree_size: int, root: str) -> dict:
+        """Same batch_signature block as LocalTestSigningService.sign_merkle_root"""
+        signature = self.private_key.sign(root_signing_data(batch_id, tree_size, root)).signature
+        return {
+            "algorithm": "ed25519",
+            "hash": "sha256-merkle",
+            "version": ROOT_SIGNATURE_VERSION,
+            "key_id": self.key_id,
+            "tree_size": tree_size,
+            "root": root,
+            "value": signature.hex()
+        }
+
+    def chain_link(self, batch_id: str, message_count: int, content_digest: str, filename: str) -> dict:
+        link = self.chain.next_link(batch_id, message_count, content_digest, filename)
+        link["key_id"] = self.key_id
+        link["signature"] = self.private_key.sign(bytes.fromhex(link["batch_hash"])).signature.hex()
+        return link
+
+    def open_writer(self) -> CompactBatchWriter:
+        """Next batch, named like the full service's batches"""
+        now = datetime.utcnow()
+        while True:
+            self.batch_counter += 1
+            stem = f"{now.strftime('%Y%m%d_%H%M%S')}_{now.microsecond:06d}_{os.getpid()}_{self.batch_counter}"
+            filename = os.path.join(self.signed_dir, f"test_logs_{stem}{COMPACT_EXTENSION}")
+            if not os.path.exists(filename):
+                break
+        return CompactBatchWriter(
+            filename, f"test_batch_{stem}", self.key_id, self.public_key_hex,
+            signing_mode=self.signing_mode, sign_root=self.sign_root,
+            chain_link=self.chain_link if self.chain is not None else None
+        )
+
+    def run(self, follow=False, poll_interval=FOLLOW_POLL_INTERVAL, policy=None) -> int:
+        """Sign the buffer until it is drained (or forever with follow); returns batches written
+
+        The offset is committed only after each batch is published, as in
+        follow_buffer().
+        """
+        if policy is None:
+            policy = FlushPolicy(FLUSH_MAX_MESSAGES, FLUSH_MAX_BYTES, FLUSH_MAX_AGE,
+                                 target_latency=FLUSH_TARGET_LATENCY, adaptive=FLUSH_ADAPTIVE)
+        tailer = self.tailer
+        writer = None
+        batches = 0
+
+        def flush():
+            tailer.begin_commit(writer.path)
+            count = writer.count
+            writer.close()
+            if self.chain is not None:
+                self.chain.commit()
+            tailer.commit()
+            policy.flushed()
+            print(f"💾 Saved {count} signed messages to {writer.path}")
+
+        stop = threading.Event()
+        try:
+            with stop_on_signals(stop):
+                while not stop.is_set():
+                    lines = tailer.read_lines(min(policy.remaining(), self.read_lines))
+                    for line in lines:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            record = self.make_record(line)
+                        except Exception as e:
+                            print(f"⚠️ Failed to sign line: {e}")
+                            continue
+                        if writer is None:
+                            writer = self.open_writer()
+                        writer.write_record(record)
+                        policy.add(len(line))
+
+                    if writer is not None and (policy.due() or (not lines and not follow)):
+                        flush()
+                        writer = None
+                        batches += 1
+                    elif writer is None and lines:
+                        # Only blank or unsignable lines: move past them
+                        tailer.commit()
+                    elif not lines:
+                        if not follow:
+                            break
+                        stop.wait(min(poll_interval, policy.time_left()) if writer else poll_interval)
+
+                if stop.is_set():
+                    print("\n⏹️ Stopped following buffer")
+                    if writer is not None:
+                        flush()
+                        writer = None
+                        batches += 1
+        finally:
+            if writer is not None:
+                writer.abort()
+            tailer.close()
+        return batches
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Low-footprint signer for constrained routers")
+    parser.add_argument("--follow", action="store_true", help="Keep following the buffer instead of exiting when drained")
+    parser.add_argument("--signing-mode", choices=["message", "merkle"], default=SIGNING_MODE)
+    parser.add_argument("--memory-limit", type=float, default=LITE_MEMORY_LIMIT_MB,
+                        help="Hard address-space cap in MiB")
+    args = parser.parse_args()
+
+    if args.memory_limit and not set_memory_limit(args.memory_limit):
+        print("⚠️ Memory limit not supported on this platform")
+    batches = LiteSigner(signing_mode=args.signing_mode).run(follow=args.follow)
+    print(f"✓ Wrote {batches} batches")
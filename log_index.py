@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Persistent SQLite index over signed batch files (message_id / time range -> file + byte offset)."""
+import os
+import sys
+import sqlite3
+
+from batch_format import (
+    list_batch_files, is_compact_batch, iter_compact_spans, read_compact_header, JsonBatchReader
+)
+from merkle import leaf_hash
+
+
+class LogIndex:
+    """Map message_id and signing timestamp to (file, byte offset, length).
+
+    Batches are added one at a time with index_file() as the signer
+    publishes them, and the whole index can be rebuilt from the archive.
+    Files whose size and mtime are unchanged since they were indexed are
+    skipped, so re-indexing a directory only touches new batches.
+
+    For compact Merkle batches, which carry no per-record proofs, each
+    record's leaf hash is stored too, so a lookup can rebuild an inclusion
+    proof without reading the rest of the batch.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # One connection may be used by successive threads (multi_source.py
+        # workers), but never by two at once
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                message_count INTEGER NOT NULL,
+                first_ts TEXT,
+                last_ts TEXT
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                message_id TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                path TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                leaf BLOB
+            );
+            CREATE INDEX IF NOT EXISTS messages_by_id ON messages (message_id);
+            CREATE INDEX IF NOT EXISTS messages_by_ts ON messages (timestamp);
+            CREATE INDEX IF NOT EXISTS messages_by_path ON messages (path);
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(messages)")}
+        if "leaf" not in columns:
+            # Index created before leaf hashes were stored; rows get them when their file is re-indexed
+            self.conn.execute("ALTER TABLE messages ADD COLUMN leaf BLOB")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def is_current(self, path: str) -> bool:
+        st = os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime_ns FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return row is not None and row == (st.st_size, st.st_mtime_ns)
+
+    def iter_spans(self, path: str):
+        """Yield (message_id, timestamp, offset, length, leaf) for every record in a batch
+
+        leaf is the record's Merkle leaf hash for compact Merkle batches, else None.
+        """
+        if is_compact_batch(path):
+            merkle = read_compact_header(path).get('signing_mode') == "merkle"
+            for record, offset, length in iter_compact_spans(path):
+                leaf = leaf_hash(f"{record['id']}{record['ts']}{record['msg']}".encode()) if merkle else None
+                yield record['id'], record['ts'], offset, length, leaf
+        else:
+            reader = JsonBatchReader(path)
+            for message in reader:
+                offset, length = reader.last_span
+                yield message['message_id'], message['timestamp'], offset, length, None
+
+    def index_file(self, path: str, force: bool = False) -> int:
+        """Index one batch file; returns the number of records added"""
+        path = os.path.abspath(path)
+        if not force and self.is_current(path):
+            return 0
+
+        st = os.stat(path)
+        rows = [(mid, ts, path, offset, length, leaf) for mid, ts, offset, length, leaf in self.iter_spans(path)]
+        timestamps = [row[1] for row in rows]
+
+        with self.conn:
+            self.conn.execute("DELETE FROM messages WHERE path = ?", (path,))
+            self.conn.executemany(
+                "INSERT INTO messages (message_id, timestamp, path, offset, length, leaf) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, len(rows),
+                 min(timestamps) if timestamps else None,
+                 max(timestamps) if timestamps else None)
+            )
+        return len(rows)
+
+    def index_directory(self, directory: str) -> int:
+        """Index every batch in a directory that is new or changed"""
+        added = 0
+        files = list_batch_files(directory)
+        for path in files:
+            added += self.index_file(path)
+
+        # Forget batches that no longer exist
+        known = {os.path.abspath(path) for path in files}
+        stale = [row[0] for row in self.conn.execute("SELECT path FROM files") if row[0] not in known]
+        for path in stale:
+            self.forget(path)
+        return added
+
+    def forget(self, path: str):
+        path = os.path.abspath(path)
+        with self.conn:
+            self.conn.execute("DELETE FROM messages WHERE path = ?", (path,))
+            self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def move(self, old: str, new: str) -> bool:
+        """Point an indexed batch at a new file with identical content (e.g. its archive)
+
+        Offsets are unchanged, so no records are re-read. Returns False
+        if old was not indexed.
+        """
+        old, new = os.path.abspath(old), os.path.abspath(new)
+        st = os.stat(new)
+        with self.conn:
+            moved = self.conn.execute(
+                "UPDATE files SET path = ?, size = ?, mtime_ns = ? WHERE path = ?",
+                (new, st.st_size, st.st_mtime_ns, old)
+            ).rowcount
+            if moved:
+                self.conn.execute("UPDATE messages SET path = ? WHERE path = ?", (new, old))
+        return bool(moved)
+
+    def rebuild(self, directory: str) -> int:
+        """Drop everything and index the directory from scratch"""
+        with self.conn:
+            self.conn.execute("DELETE FROM messages")
+            self.conn.execute("DELETE FROM files")
+        return self.index_directory(directory)
+
+    def lookup_message(self, message_id: str) -> list:
+        """All locations of a message_id as (path, offset, length)"""
+        return self.conn.execute(
+            "SELECT path, offset, length FROM messages WHERE message_id = ? ORDER BY path, offset",
+            (message_id,)
+        ).fetchall()
+
+    def file_messages(self, path: str) -> list:
+        """(message_id, offset) of every indexed record in one batch, in file order"""
+        return self.conn.execute(
+            "SELECT message_id, offset FROM messages WHERE path = ? ORDER BY offset", (os.path.abspath(path),)
+        ).fetchall()
+
+    def file_leaves(self, path: str) -> list:
+        """(offset, leaf hash) of every indexed record in one batch, in file order"""
+        return self.conn.execute(
+            "SELECT offset, leaf FROM messages WHERE path = ? ORDER BY offset", (os.path.abspath(path),)
+        ).fetchall()
+
+    def lookup_range(self, start: str, end: str) -> list:
+        """Records with start <= timestamp < end (ISO strings, prefixes allowed)"""
+        return self.conn.execute(
+            "SELECT path, offset, length FROM messages WHERE timestamp >= ? AND timestamp < ? "
+            "ORDER BY timestamp, path, offset",
+            (start, end)
+        ).fetchall()
+
+    def stats(self) -> dict:
+        files, = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        messages, = self.conn.execute("SELECT COUNT(*) FROM messages").fetchone()
+        return {"files": files, "messages": messages}
+
+
+if __name__ == "__main__":
+    from config.test_config import LOCAL_SIGNED_DIR, LOG_INDEX_FILE, ensure_dirs
+
+    ensure_dirs()
+    directory = sys.argv[1] if len(sys.argv) > 1 else LOCAL_SIGNED_DIR
+    index = LogIndex(LOG_INDEX_FILE)
+    count = index.rebuild(directory)
+    print(f"✓ Indexed {count} messages from {index.stats()['files']} batch files in {directory}")
+    index.close()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Merkle tree helpers for batch signatures (RFC 6962 style hashing)."""
+import hashlib
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(data: bytes) -> bytes:
+    """Hash a single leaf (domain separated from interior nodes)"""
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    """Hash two child nodes into their parent"""
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_levels(leaves: list) -> list:
+    """Build every level of the tree, leaves first, root last.
+
+    An unpaired node at the end of a level is carried up unchanged,
+    which gives the same root as the RFC 6962 split rule.
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parent = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parent.append(level[-1])
+        levels.append(parent)
+    return levels
+
+
+def merkle_root(leaves: list) -> bytes:
+    """Compute the root hash for a list of leaf hashes"""
+    return build_levels(leaves)[-1][0]
+
+
+def inclusion_proof(levels: list, index: int) -> list:
+    """Return the audit path (sibling hashes, bottom-up) for a leaf"""
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(level[sibling])
+        index >>= 1
+    return path
+
+
+def root_from_proof(leaf: bytes, index: int, tree_size: int, path: list) -> bytes:
+    """Recompute the root from a leaf and its audit path (RFC 9162 2.1.3.2)"""
+    if index >= tree_size:
+        raise ValueError("Leaf index outside of tree")
+
+    fn, sn = index, tree_size - 1
+    node = leaf
+    for sibling in path:
+        if sn == 0:
+            raise ValueError("Audit path is too long")
+        if fn & 1 or fn == sn:
+            node = node_hash(sibling, node)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            node = node_hash(node, sibling)
+        fn >>= 1
+        sn >>= 1
+
+    if sn != 0:
+        raise ValueError("Audit path is too short")
+    return node
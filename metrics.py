@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""In-process counters and latency histograms, a Prometheus-text endpoint, and rate-limited logging."""
+import sys
+import time
+import logging
+import threading
+from bisect import bisect_left
+
+from config.test_config import METRICS_ENABLED, METRICS_SAMPLE_EVERY
+
+# 1 us .. ~17 s, doubling
+DEFAULT_BUCKETS = [1e-6 * 2 ** i for i in range(25)]
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: dict = None):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Gauge(Counter):
+    """Current value (queue depth, backlog) rather than a running total"""
+
+    def set(self, value):
+        self.value = value
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (seconds), Prometheus style"""
+
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing quantile q (an estimate)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + [float("inf")], self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """Named metrics for one process.
+
+    Counters are updated per batch or per file, so they are always on.
+    Per-message latencies go through timed(), which times only every
+    `every`-th call: histogram counts are therefore samples, while the
+    matching counters hold exact totals. With enabled=False timed()
+    returns the function unchanged, so the hot path pays nothing.
+    """
+
+    def __init__(self, enabled: bool = True, sample_every: int = 16):
+        self.enabled = enabled
+        self.sample_every = sample_every
+        self.metrics = {}
+        self.started = time.time()
+
+    def counter(self, name: str, help: str, labels: dict = None) -> Counter:
+        key = (name, tuple(sorted((labels or {}).items())))
+        if key not in self.metrics:
+            self.metrics[key] = Counter(name, help, labels)
+        return self.metrics[key]
+
+    def gauge(self, name: str, help: str, labels: dict = None) -> Gauge:
+        key = (name, tuple(sorted((labels or {}).items())))
+        if key not in self.metrics:
+            self.metrics[key] = Gauge(name, help, labels)
+        return self.metrics[key]
+
+    def histogram(self, name: str, help: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        key = (name, ())
+        if key not in self.metrics:
+            self.metrics[key] = Histogram(name, help, buckets)
+        return self.metrics[key]
+
+    def timed(self, fn, histogram: Histogram):
+        """Wrap fn so every sample_every-th call is timed into histogram"""
+        if not self.enabled:
+            return fn
+        clock = time.perf_counter
+        every = self.sample_every
+        # Start one short of a sample so the first call is always timed
+        calls = every - 1
+
+        def wrapper(*args):
+            nonlocal calls
+            calls += 1
+            if calls % every:
+                return fn(*args)
+            start = clock()
+            result = fn(*args)
+            histogram.observe(clock() - start)
+            return result
+
+        return wrapper
+
+    def timed_iter(self, iterable, histogram: Histogram):
+        """Yield from iterable, observing the total time spent producing items once it is exhausted"""
+        if not self.enabled:
+            yield from iterable
+            return
+        clock = time.perf_counter
+        iterator = iter(iterable)
+        spent = 0.0
+        while True:
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                spent += clock() - start
+            yield item
+        histogram.observe(spent)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        seen = set()
+        for metric in self.metrics.values():
+            kind = "histogram" if isinstance(metric, Histogram) else "gauge" if isinstance(metric, Gauge) else "counter"
+            if metric.name not in seen:
+                seen.add(metric.name)
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {kind}")
+            if kind != "histogram":
+                labels = ",".join(f'{k}="{v}"' for k, v in sorted(metric.labels.items()))
+                lines.append(f"{metric.name}{{{labels}}} {metric.value}" if labels else f"{metric.name} {metric.value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.bounds, metric.counts):
+                cumulative += count
+                lines.append(f'{metric.name}_bucket{{le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric.name}_bucket{{le="+Inf"}} {metric.count}')
+            lines.append(f"{metric.name}_sum {metric.sum}")
+            lines.append(f"{metric.name}_count {metric.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Compact JSON-friendly view: counter values and histogram count/sum/p50/p99"""
+        result = {"uptime_s": round(time.time() - self.started, 3)}
+        for metric in self.metrics.values():
+            if isinstance(metric, Histogram):
+                result[metric.name] = {
+                    "count": metric.count,
+                    "sum": metric.sum,
+                    "p50": metric.quantile(0.5),
+                    "p99": metric.quantile(0.99)
+                }
+            elif metric.labels:
+                label = ",".join(f"{k}={v}" for k, v in sorted(metric.labels.items()))
+                result[f"{metric.name}{{{label}}}"] = metric.value
+            else:
+                result[metric.name] = metric.value
+        return result
+
+    def serve(self, host: str, port: int):
+        """Serve GET /metrics on a daemon thread (http.server is only imported here)"""
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                data = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        return httpd
+
+    def dump(self, path: str):
+        from buffer_tail import write_json_atomic
+        write_json_atomic(path, self.snapshot())
+
+    def start_dump(self, path: str, interval: float) -> threading.Event:
+        """Write snapshot() to path every interval seconds; set the returned event to stop"""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.dump(path)
+
+        threading.Thread(target=loop, daemon=True).start()
+        return stop
+
+
+METRICS = MetricsRegistry(METRICS_ENABLED, METRICS_SAMPLE_EVERY)
+
+
+class RateLimitFilter(logging.Filter):
+    """Let at most `burst` records per message template through every `interval` seconds
+
+    Suppressed records are counted and reported on the next record that
+    passes, so a flood of identical warnings costs one line per interval.
+    """
+
+    def __init__(self, burst: int = 10, interval: float = 10.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.windows = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        key = (record.name, record.msg)
+        start, passed, suppressed = self.windows.get(key, (now, 0, 0))
+        if now - start >= self.interval:
+            start, passed = now, 0
+        if passed >= self.burst:
+            self.windows[key] = (start, passed, suppressed + 1)
+            return False
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        self.windows[key] = (start, passed + 1, 0)
+        return True
+
+
+class StdoutHandler(logging.StreamHandler):
+    """Write to the current sys.stdout, where the rest of the output goes"""
+
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+def get_logger(name: str, level: str = "INFO") -> logging.Logger:
+    """Leveled, rate-limited logger that prints messages as-is (like the existing prints)
+
+    Pass values as logging arguments ("... %s", value) rather than
+    f-strings so repeated messages share a template and can be rate-limited.
+    """
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = StdoutHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler.addFilter(RateLimitFilter())
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level)
+    return logger
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Multi-source signer: one process tail-follows many device buffers, each
+with its own key_id, output partition and batch policy, on a fixed pool
+of worker threads.
+
+Sources are listed in a JSON file (SOURCES_FILE):
+
+    {"sources": [
+        {"name": "ap-lobby", "buffer": "buffers/ap-lobby.log", "key_id": "ap_lobby_v1",
+         "partition": "ap-lobby", "batch": {"max_messages": 2000, "max_age": 2.0}},
+        ...
+    ]}
+
+Relative buffer paths are resolved against the data directory and
+partitions against signed_logs. key_id defaults to the source name and
+its key pair is created in keys/ (and registered) on first use. Each
+source keeps its own buffer offset and hash chain under
+state/sources/<name>/, so every partition verifies as its own chain.
+"""
+import os
+import sys
+import json
+import time
+import heapq
+import argparse
+import threading
+from collections import deque
+
+from config.test_config import *
+from buffer_tail import BufferTailer, write_json_atomic, stop_on_signals
+from flush_policy import FlushPolicy
+from metrics import METRICS, get_logger
+from test_signing_service import LocalTestSigningService
+
+log = get_logger("multi_source", LOG_LEVEL)
+
+SOURCE_LINES = "signer_source_lines_total"
+SOURCE_BACKLOG = "signer_source_backlog_bytes"
+
+
+def load_sources(path: str) -> list:
+    """Read and validate the source list; returns one dict per source with resolved paths"""
+    with open(path, 'r') as f:
+        entries = json.load(f)["sources"]
+
+    sources = []
+    seen = set()
+    for entry in entries:
+        name = entry["name"]
+        partition = os.path.join(LOCAL_SIGNED_DIR, entry.get("partition", name))
+        if name in seen or partition in {s["signed_dir"] for s in sources}:
+            raise ValueError(f"Duplicate source name or partition: {name}")
+        seen.add(name)
+
+        key_id = entry.get("key_id", name)
+        sources.append({
+            "name": name,
+            "buffer_file": os.path.join(DATA_DIR, entry["buffer"]),
+            "signed_dir": partition,
+            "key_id": key_id,
+            "key_file": os.path.join(LOCAL_KEY_DIR, entry.get("key_file", f"{key_id}.key")),
+            "public_key_file": os.path.join(LOCAL_KEY_DIR, entry.get("public_key_file", f"{key_id}.pub")),
+            "state_dir": os.path.join(LOCAL_STATE_DIR, "sources", name),
+            "signing_mode": entry.get("signing_mode", SIGNING_MODE),
+            "output_format": entry.get("output_format", OUTPUT_FORMAT),
+            "batch": entry.get("batch", {})
+        })
+    return sources
+
+
+class SourceFollower:
+    """Tail-follow one source buffer in bounded steps.
+
+    step() reads at most max_lines, signs them into the source's open
+    batch and publishes the batch when its FlushPolicy says so, with the
+    same two-phase offset commit as follow_buffer(). A follower is only
+    ever stepped by one worker at a time.
+    """
+
+    def __init__(self, source: dict):
+        self.name = source["name"]
+        os.makedirs(source["signed_dir"], exist_ok=True)
+        os.makedirs(source["state_dir"], exist_ok=True)
+        self.service = LocalTestSigningService(
+            signing_mode=source["signing_mode"], verbose=False, output_format=source["output_format"],
+            buffer_file=source["buffer_file"], signed_dir=source["signed_dir"], key_id=source["key_id"],
+            key_file=source["key_file"], public_key_file=source["public_key_file"],
+            state_dir=source["state_dir"]
+        )
+        batch = source["batch"]
+        self.policy = FlushPolicy(
+            max_messages=batch.get("max_messages", FLUSH_MAX_MESSAGES),
+            max_bytes=batch.get("max_bytes", FLUSH_MAX_BYTES),
+            max_age=batch.get("max_age", FLUSH_MAX_AGE),
+            target_latency=batch.get("target_latency", FLUSH_TARGET_LATENCY),
+            adaptive=batch.get("adaptive", FLUSH_ADAPTIVE)
+        )
+        self.tailer = BufferTailer(self.service.buffer_file, self.service.buffer_checkpoint_file, chunk_size=1 << 16)
+        self.build_message = self.service.message_builder()
+        self.writer = None
+        self.filename = None
+        self.drain = False
+
+        labels = {"source": self.name}
+        self.lines_metric = METRICS.counter(SOURCE_LINES, "Lines signed per source", labels)
+        self.backlog_metric = METRICS.gauge(SOURCE_BACKLOG, "Unread bytes in each source buffer", labels)
+        self.stats = {"lines": 0, "failed": 0, "batches": 0, "errors": 0, "steps": 0, "busy_s": 0.0}
+
+    def backlog(self) -> int:
+        """Bytes in the buffer not yet read (the source's queue depth)"""
+        try:
+            if self.tailer.fh is not None:
+                return max(0, os.fstat(self.tailer.fh.fileno()).st_size - self.tailer.position)
+            return max(0, os.path.getsize(self.service.buffer_file) - self.tailer.committed)
+        except OSError:
+            return 0
+
+    def step(self, max_lines: int) -> int:
+        """Sign up to max_lines new lines; returns how many lines were read"""
+        start = time.perf_counter()
+        lines = self.tailer.read_lines(min(self.policy.remaining(), max_lines))
+        signed = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = self.build_message(line)
+            except Exception as e:
+                self.stats["failed"] += 1
+                log.warning("⚠️ [%s] Failed to sign line: %s", self.name, e)
+                continue
+            if self.writer is None:
+                self.filename = self.service.next_batch_filename()
+                self.writer = self.service.open_batch_writer(self.filename)
+            self.writer.write(message)
+            self.policy.add(len(line))
+            signed += 1
+
+        if self.writer is not None and (self.policy.due() or (not lines and self.drain)):
+            self.flush()
+        elif self.writer is None and lines:
+            # Only blank or unsignable lines: move past them
+            self.tailer.commit()
+
+        self.stats["lines"] += signed
+        self.stats["steps"] += 1
+        self.stats["busy_s"] += time.perf_counter() - start
+        self.lines_metric.inc(signed)
+        self.backlog_metric.set(self.backlog())
+        return len(lines)
+
+    def flush(self):
+        try:
+            self.tailer.begin_commit(self.filename)
+            self.service.finish_batch(self.writer)
+            self.tailer.commit()
+        except Exception:
+            self.recover()
+            raise
+        self.policy.flushed()
+        self.writer = None
+        self.stats["batches"] += 1
+
+    def recover(self):
+        """Drop the open batch after a failed flush and resume from disk, as a restart would
+
+        The buffer offset and chain tip are reloaded, so a batch that was
+        published before the failure is kept and anything else is signed
+        again from the committed offset into a fresh batch on the next step.
+        """
+        writer, self.writer = self.writer, None
+        self.policy.reset()
+        writer.abort()
+        self.tailer.close()
+        self.tailer.load_checkpoint()
+        if self.service.chain is not None:
+            self.service.chain.pending = None
+            self.service.chain.load()
+
+    def idle_delay(self, poll_interval: float) -> float:
+        """How long to leave an idle source before polling it again"""
+        if self.writer is not None:
+            return min(poll_interval, self.policy.time_left())
+        return poll_interval
+
+    def close(self):
+        """Publish the open batch (its offset commits with it) and release the buffer"""
+        try:
+            if self.writer is not None:
+                self.flush()
+        finally:
+            if self.writer is not None:
+                self.writer.abort()
+            self.tailer.close()
+
+
+class FairScheduler:
+    """Round-robin run queue of sources for a pool of workers.
+
+    A worker takes the source at the head, runs one step of at most
+    `quantum` lines and puts it back at the tail, so every busy source
+    gets a turn per round however much its neighbours have queued. A
+    source that had nothing to read sleeps until its next poll (or its
+    open batch's deadline). A source is never handed to two workers at
+    once, which keeps each source's batches in order.
+    """
+
+    def __init__(self, followers: list):
+        self.cond = threading.Condition()
+        self.ready = deque(followers)
+        self.sleeping = []
+        self.sequence = 0
+
+    def take(self, stop: threading.Event, timeout: float = 0.5):
+        with self.cond:
+            while not stop.is_set():
+                now = time.monotonic()
+                while self.sleeping and self.sleeping[0][0] <= now:
+                    self.ready.append(heapq.heappop(self.sleeping)[2])
+                if self.ready:
+                    return self.ready.popleft()
+                wait = self.sleeping[0][0] - now if self.sleeping else timeout
+                self.cond.wait(min(wait, timeout))
+        return None
+
+    def put(self, follower: SourceFollower, delay: float = 0.0):
+        with self.cond:
+            if delay > 0:
+                self.sequence += 1
+                heapq.heappush(self.sleeping, (time.monotonic() + delay, self.sequence, follower))
+            else:
+                self.ready.append(follower)
+            self.cond.notify()
+
+
+class MultiSourceSigner:
+    """Sign many sources on `workers` threads with fair round-robin scheduling.
+
+    Ed25519 signing runs in libsodium with the GIL released, so workers
+    overlap on multi-core hosts. Per-source throughput, backlog and open
+    batch size are reported every report_interval seconds and written to
+    SOURCE_STATS_FILE.
+    """
+
+    def __init__(self, sources: list, workers=SOURCE_WORKERS, quantum=SOURCE_QUANTUM,
+                 poll_interval=FOLLOW_POLL_INTERVAL):
+        self.followers = [SourceFollower(source) for source in sources]
+        self.workers = workers
+        self.quantum = quantum
+        self.poll_interval = poll_interval
+        self.scheduler = FairScheduler(self.followers)
+        self.stop = threading.Event()
+        self.last_report = (time.monotonic(), {f.name: 0 for f in self.followers})
+
+    def worker(self):
+        while not self.stop.is_set():
+            follower = self.scheduler.take(self.stop)
+            if follower is None:
+                break
+            try:
+                read = follower.step(self.quantum)
+            except Exception as e:
+                # Keep the other sources running; retry this one after a poll interval
+                follower.stats["errors"] += 1
+                log.warning("⚠️ [%s] Step failed: %s", follower.name, e)
+                read = 0
+            self.scheduler.put(follower, 0 if read else follower.idle_delay(self.poll_interval))
+
+    def errors(self) -> int:
+        return sum(f.stats["errors"] for f in self.followers)
+
+    def idle(self) -> bool:
+        return all(f.writer is None and f.backlog() == 0 for f in self.followers)
+
+    def report(self) -> dict:
+        """Per-source stats since start, plus lines/s since the previous report"""
+        now = time.monotonic()
+        since, previous = self.last_report
+        elapsed = max(now - since, 1e-9)
+        result = {}
+        for f in self.followers:
+            result[f.name] = dict(
+                f.stats,
+                lines_per_s=(f.stats["lines"] - previous[f.name]) / elapsed,
+                backlog_bytes=f.backlog(),
+                open_messages=f.policy.messages,
+                key_id=f.service.key_id,
+                partition=f.service.signed_dir
+            )
+        self.last_report = (now, {f.name: f.stats["lines"] for f in self.followers})
+        return result
+
+    def print_report(self, report: dict):
+        log.info("%-16s %10s %9s %8s %12s %8s", "source", "lines", "lines/s", "batches", "backlog B", "open")
+        for name, s in report.items():
+            log.info("%-16s %10d %9.0f %8d %12d %8d", name, s["lines"], s["lines_per_s"], s["batches"],
+                     s["backlog_bytes"], s["open_messages"])
+
+    def run(self, report_interval=SOURCE_REPORT_INTERVAL, exit_when_idle=False, duration=None) -> dict:
+        """Run until interrupted (or idle / duration for benchmarks); returns the final report"""
+        threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        print(f"🔀 Signing {len(self.followers)} sources on {self.workers} workers "
+              f"({self.quantum} lines per turn)")
+
+        started = time.monotonic()
+        next_report = started + report_interval
+        if exit_when_idle:
+            for f in self.followers:
+                f.drain = True
+        try:
+            with stop_on_signals(self.stop):
+                while not self.stop.wait(0.05):
+                    now = time.monotonic()
+                    if now >= next_report:
+                        report = self.report()
+                        self.print_report(report)
+                        write_json_atomic(SOURCE_STATS_FILE, report)
+                        next_report = now + report_interval
+                    if exit_when_idle and self.idle():
+                        break
+                    if duration is not None and now - started >= duration:
+                        break
+                else:
+                    print("\n⏹️ Stopping sources")
+        finally:
+            self.stop.set()
+            with self.scheduler.cond:
+                self.scheduler.cond.notify_all()
+            for thread in threads:
+                thread.join()
+            for f in self.followers:
+                f.close()
+
+        report = self.report()
+        write_json_atomic(SOURCE_STATS_FILE, report)
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sign many device buffers in one process")
+    parser.add_argument("--sources", default=SOURCES_FILE, help="JSON list of sources")
+    parser.add_argument("--workers", type=int, default=SOURCE_WORKERS)
+    parser.add_argument("--quantum", type=int, default=SOURCE_QUANTUM, help="Lines per source per turn")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Stop once every buffer is drained")
+    args = parser.parse_args()
+
+    signer = MultiSourceSigner(load_sources(args.sources), args.workers, args.quantum)
+    report = signer.run(exit_when_idle=args.exit_when_idle)
+    signer.print_report(report)
+    sys.exit(1 if signer.errors() else 0)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Replay and duplicate detection for signed records: a persisted Bloom filter over message_ids."""
+import os
+import json
+import math
+import hashlib
+
+from buffer_tail import fsync_dir
+from archive import ARCHIVE_EXTENSION
+from verify_checkpoint import file_fingerprint
+
+FILTER_FORMAT = "replay-bloom"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, backed by a bytearray.
+
+    Sized for `capacity` keys at false-positive rate `error_rate`
+    (about 1.2 bytes per key at 0.1%). Bit positions come from double
+    hashing one BLAKE2b digest, so each key costs a single hash.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001, bits: bytearray = None, count: int = 0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.size = (size + 7) // 8 * 8
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray(self.size // 8)
+        self.count = count
+
+    def positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self.positions(key))
+
+    def add(self, key: str) -> bool:
+        """Set key's bits; returns True if they were all set already (key possibly seen)"""
+        bits = self.bits
+        seen = True
+        for p in self.positions(key):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                seen = False
+        if not seen:
+            self.count += 1
+        return seen
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class ReplayFilter:
+    """Scalable Bloom filter: when the newest layer reaches its capacity a
+    layer twice as large with half the error rate is added, so the overall
+    false-positive rate stays below about twice error_rate however many IDs
+    arrive. Persisted as one JSON header line followed by the raw bits.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.layers = [BloomFilter(capacity, error_rate / 2)]
+        self.scanned = {}
+
+    def check_and_add(self, key: str) -> bool:
+        """True if key may have been seen before (a candidate replay)"""
+        if any(key in layer for layer in self.layers[:-1]):
+            return True
+        if self.layers[-1].add(key):
+            return True
+        if self.layers[-1].full:
+            last = self.layers[-1]
+            self.layers.append(BloomFilter(last.capacity * 2, last.error_rate / 2))
+        return False
+
+    def __contains__(self, key: str) -> bool:
+        return any(key in layer for layer in self.layers)
+
+    @property
+    def count(self) -> int:
+        return sum(layer.count for layer in self.layers)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(layer.bits) for layer in self.layers)
+
+    def save(self, path: str):
+        """Write via temp file + fsync + rename"""
+        header = {
+            "format": FILTER_FORMAT,
+            "version": 1,
+            "layers": [[layer.capacity, layer.error_rate, layer.count] for layer in self.layers],
+            "scanned": self.scanned
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(json.dumps(header, separators=(",", ":")).encode() + b"\n")
+            for layer in self.layers:
+                f.write(layer.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        fsync_dir(os.path.dirname(path))
+
+    @classmethod
+    def load(cls, path: str, capacity: int = 1_000_000, error_rate: float = 0.001) -> "ReplayFilter":
+        """Load a saved filter, or create an empty one sized for capacity IDs"""
+        result = cls(capacity, error_rate)
+        if not os.path.exists(path):
+            return result
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get("format") != FILTER_FORMAT:
+                raise ValueError(f"Not a replay filter: {path}")
+            result.layers = []
+            for layer_capacity, layer_error_rate, count in header["layers"]:
+                layer = BloomFilter(layer_capacity, layer_error_rate, count=count)
+                if f.readinto(layer.bits) != len(layer.bits):
+                    raise ValueError(f"Truncated replay filter: {path}")
+                result.layers.append(layer)
+        # Entries from before batches were keyed by path + fingerprint are rescanned once
+        result.scanned = {key: entry for key, entry in header["scanned"].items() if isinstance(entry, dict)}
+        return result
+
+
+class ReplayDetector:
+    """Flag signed records whose message_id already appears elsewhere.
+
+    Every scanned batch's IDs go through the filter. A filter hit is only
+    a candidate: it is confirmed against the lookup index, which holds
+    the exact location of every indexed record, and reported only if the
+    same message_id exists at another file or offset. Misses, the vast
+    majority, never touch the disk.
+
+    Batches are remembered by full path (without the archive suffix, so
+    partitions never shadow each other) together with their file
+    fingerprint. A batch is added once and scanned again only when its
+    file changes, e.g. records were appended or it was archived. A batch
+    with replays is not marked and is checked again on the next run.
+    """
+
+    def __init__(self, filter_file: str, index, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.filter_file = filter_file
+        self.index = index
+        self.filter = ReplayFilter.load(filter_file, capacity, error_rate)
+        self.stats = {"checked": 0, "candidates": 0, "replays": 0}
+
+    @staticmethod
+    def batch_key(path: str) -> str:
+        path = os.path.abspath(path)
+        return path[:-len(ARCHIVE_EXTENSION)] if path.endswith(ARCHIVE_EXTENSION) else path
+
+    def scan_file(self, path: str) -> list:
+        """Check and add every record of one batch; returns the confirmed replays"""
+        key = self.batch_key(path)
+        fingerprint = list(file_fingerprint(path))
+        if self.filter.scanned.get(key, {}).get("fingerprint") == fingerprint:
+            return []
+
+        path = os.path.abspath(path)
+        self.index.index_file(path)
+        replays = []
+        count = 0
+        for message_id, offset in self.index.file_messages(path):
+            count += 1
+            if not self.filter.check_and_add(message_id):
+                continue
+            self.stats["candidates"] += 1
+            others = [
+                (other_path, other_offset)
+                for other_path, other_offset, _ in self.index.lookup_message(message_id)
+                if (other_path, other_offset) != (path, offset)
+            ]
+            if others:
+                replays.append({
+                    "message_id": message_id,
+                    "file": path,
+                    "offset": offset,
+                    "error": f"Replayed record: also in {os.path.basename(others[0][0])} at offset {others[0][1]}"
+                })
+        self.stats["checked"] += count
+        self.stats["replays"] += len(replays)
+        if not replays:
+            self.filter.scanned[key] = {"count": count, "fingerprint": fingerprint}
+        return replays
+
+    def scan(self, paths) -> list:
+        """Scan batches in name order and persist the filter"""
+        replays = []
+        for path in sorted(paths):
+            replays.extend(self.scan_file(path))
+        self.filter.save(self.filter_file)
+        return replays
+
+
+if __name__ == "__main__":
+    from config.test_config import REPLAY_FILTER_FILE, REPLAY_EXPECTED_IDS, REPLAY_ERROR_RATE
+
+    replay_filter = ReplayFilter.load(REPLAY_FILTER_FILE, REPLAY_EXPECTED_IDS, REPLAY_ERROR_RATE)
+    print(f"🧮 Replay filter: {replay_filter.count} IDs from {len(replay_filter.scanned)} batches, "
+          f"{replay_filter.nbytes / 2**20:.1f} MiB in {len(replay_filter.layers)} layer(s)")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Multi-core signing pipeline: reader -> signing worker processes -> ordered writer."""
+import os
+import queue
+import threading
+import multiprocessing as mp
+
+
+def _signing_worker(options: dict, in_queue, out_queue):
+    """Worker process: load the parent's key once, then sign chunks of lines"""
+    from test_signing_service import LocalTestSigningService
+
+    service = LocalTestSigningService(verbose=False, **options)
+    build_message = service.message_builder()
+
+    while True:
+        item = in_queue.get()
+        if item is None:
+            break
+
+        seq, lines = item
+        messages = []
+        for line in lines:
+            try:
+                messages.append(build_message(line))
+            except Exception:
+                messages.append(None)  # keeps messages aligned with the chunk's line positions
+        out_queue.put((seq, messages))
+
+
+class SigningPipeline:
+    """Sign a stream of log lines on a pool of worker processes.
+
+    A reader thread cuts the input into chunks and feeds a bounded queue,
+    worker processes sign chunks independently, and the writer (the calling
+    thread) restores input order and streams messages into the service's
+    batch writer, closing a batch every batch_lines messages. At most
+    max_in_flight chunks exist between reader and writer, so a slow worker
+    or writer throttles the reader instead of growing memory.
+
+    Input lines come with their end position, and each batch is published
+    with the position just past its last line, so the caller can commit
+    progress batch by batch.
+    """
+
+    def __init__(self, service, workers=None, chunk_lines=256, batch_lines=1000, max_in_flight=None):
+        self.service = service
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_lines = chunk_lines
+        self.batch_lines = batch_lines
+        self.max_in_flight = max_in_flight or self.workers * 4
+
+        self.stats = {"lines": 0, "signed": 0, "failed": 0, "batches": 0}
+
+    @staticmethod
+    def _put(in_queue, item, state) -> bool:
+        """Queue an item; gives up (False) once the writer has stopped the run"""
+        while True:
+            try:
+                in_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if state["stop"]:
+                    return False
+
+    def _send(self, in_queue, in_flight, item, state) -> bool:
+        while not in_flight.acquire(timeout=0.5):
+            if state["stop"]:
+                return False
+        return self._put(in_queue, item, state)
+
+    def _reader(self, lines, in_queue, in_flight, state):
+        seq = 0
+        chunk = []
+        ends = []
+        try:
+            for line, end in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                chunk.append(line)
+                ends.append(end)
+                if len(chunk) >= self.chunk_lines:
+                    # Positions stay in this process; workers only see the lines
+                    state["ends"][seq] = ends
+                    if not self._send(in_queue, in_flight, (seq, chunk), state):
+                        return
+                    seq += 1
+                    chunk = []
+                    ends = []
+            if chunk:
+                state["ends"][seq] = ends
+                if not self._send(in_queue, in_flight, (seq, chunk), state):
+                    return
+                seq += 1
+        except Exception as e:
+            state["error"] = e
+        finally:
+            state["chunks"] = seq
+            for _ in range(self.workers):
+                if not self._put(in_queue, None, state):
+                    break
+
+    @staticmethod
+    def _check_workers(procs, state, next_seq: int):
+        """Raise if a worker died: its chunk would never arrive and the run would hang"""
+        for proc in procs:
+            if proc.exitcode not in (None, 0):
+                raise RuntimeError(f"Signing worker {proc.pid} exited with code {proc.exitcode}")
+        outstanding = state["chunks"] is None or next_seq < state["chunks"]
+        exited = [proc for proc in procs if proc.exitcode is not None]
+        # Workers only exit cleanly after the reader's end-of-input markers
+        if outstanding and exited and (state["chunks"] is None or len(exited) == len(procs)):
+            raise RuntimeError(f"{len(exited)} signing worker(s) exited with chunks still outstanding")
+
+    def run(self, lines, publish=None) -> list:
+        """Sign every (line, end) pair from the iterable; return the batch files written in order
+
+        publish(writer, end) publishes a full batch and returns its path; end
+        is the position just past the batch's last line. It defaults to the
+        service's finish_batch.
+        """
+        if publish is None:
+            publish = lambda writer, end: self.service.finish_batch(writer)
+        ctx = mp.get_context()
+        in_queue = ctx.Queue(maxsize=self.workers * 2)
+        out_queue = ctx.Queue(maxsize=self.workers * 2)
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        state = {"chunks": None, "error": None, "stop": False, "ends": {}}
+
+        # Records must carry the key_id and key the parent's batch headers and chain links name
+        options = {
+            "signing_mode": self.service.signing_mode,
+            "output_format": self.service.output_format,
+            "key_id": self.service.key_id,
+            "key_file": self.service.key_file,
+            "public_key_file": self.service.public_key_file
+        }
+        procs = [
+            ctx.Process(target=_signing_worker, args=(options, in_queue, out_queue), daemon=True)
+            for _ in range(self.workers)
+        ]
+        for proc in procs:
+            proc.start()
+
+        reader = threading.Thread(target=self._reader, args=(lines, in_queue, in_flight, state), daemon=True)
+        reader.start()
+
+        written = []
+        pending = {}
+        writer = None
+        last_end = None
+        next_seq = 0
+
+        try:
+            while state["chunks"] is None or next_seq < state["chunks"]:
+                try:
+                    seq, messages = out_queue.get(timeout=0.5)
+                except queue.Empty:
+                    self._check_workers(procs, state, next_seq)
+                    continue
+
+                pending[seq] = messages
+                # Writer stage: emit chunks strictly in input order
+                while next_seq in pending:
+                    messages = pending.pop(next_seq)
+                    ends = state["ends"].pop(next_seq)
+                    next_seq += 1
+                    in_flight.release()
+
+                    failures = messages.count(None)
+                    self.stats["lines"] += len(messages)
+                    self.stats["signed"] += len(messages) - failures
+                    self.stats["failed"] += failures
+
+                    for message, end in zip(messages, ends):
+                        if message is None:
+                            continue
+                        if writer is None:
+                            writer = self.service.open_batch_writer()
+                        writer.write(message)
+                        last_end = end
+                        if writer.count >= self.batch_lines:
+                            written.append(publish(writer, last_end))
+                            writer = None
+
+            if writer is not None:
+                written.append(publish(writer, last_end))
+                writer = None
+
+        finally:
+            # On failure the open batch is discarded; published batches keep their progress
+            if writer is not None:
+                writer.abort()
+            state["stop"] = True
+            reader.join(timeout=1)
+            for proc in procs:
+                proc.join(timeout=5 if state["chunks"] is not None and next_seq >= state["chunks"] else 0.1)
+                if proc.is_alive():
+                    proc.terminate()
+
+        if state["error"]:
+            raise state["error"]
+
+        self.stats["batches"] = len(written)
+        return written
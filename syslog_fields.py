@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Syslog header fields (facility, severity, host, program) parsed from RFC 3164 / RFC 5424 lines."""
+import re
+
+FIELD_NAMES = ("facility", "severity", "host", "program")
+
+FACILITIES = {
+    "kern": 0, "user": 1, "mail": 2, "daemon": 3, "auth": 4, "syslog": 5, "lpr": 6, "news": 7,
+    "uucp": 8, "cron": 9, "authpriv": 10, "ftp": 11, "ntp": 12, "audit": 13, "alert": 14, "clock": 15,
+    "local0": 16, "local1": 17, "local2": 18, "local3": 19, "local4": 20, "local5": 21, "local6": 22, "local7": 23
+}
+SEVERITIES = {
+    "emerg": 0, "alert": 1, "crit": 2, "err": 3, "warning": 4, "notice": 5, "info": 6, "debug": 7
+}
+
+# <PRI>VERSION TIMESTAMP HOSTNAME APP-NAME ...
+RFC5424 = re.compile(r"<(\d{1,3})>\d{1,2} \S+ (\S+) (\S+)")
+# <PRI>[TIMESTAMP ]HOSTNAME TAG[pid]: ...  (BSD or ISO timestamp)
+RFC3164 = re.compile(
+    r"<(\d{1,3})>(?:[A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d |\d{4}-\d\d-\d\dT\S+ )?"
+    r"(\S+) ([^\s:\[]+)(?:\[[^\]]*\])?:"
+)
+# <PRI>[TIMESTAMP ]TAG[pid]: ...  (local logs without a hostname)
+RFC3164_NO_HOST = re.compile(
+    r"<(\d{1,3})>(?:[A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d |\d{4}-\d\d-\d\dT\S+ )?"
+    r"([^\s:\[]+)(?:\[[^\]]*\])?:"
+)
+PRI_ONLY = re.compile(r"<(\d{1,3})>")
+
+_cache = {}
+_CACHE_LIMIT = 1 << 16
+
+
+def parse_fields(line: str):
+    """(facility, severity, host, program) for a syslog line, or None without a <PRI>
+
+    host and program are None when the header does not carry them. Results
+    are cached per (PRI, host, program), so lines from the same source
+    share one tuple and one copy of each string.
+    """
+    match = RFC5424.match(line)
+    if match:
+        host, program = match.group(2, 3)
+        host = None if host == "-" else host
+        program = None if program == "-" else program
+    else:
+        match = RFC3164.match(line)
+        if match:
+            host, program = match.group(2, 3)
+        else:
+            match = RFC3164_NO_HOST.match(line)
+            if match:
+                host, program = None, match.group(2)
+            else:
+                match = PRI_ONLY.match(line)
+                if not match:
+                    return None
+                host = program = None
+
+    pri = match.group(1)
+    key = (pri, host, program)
+    fields = _cache.get(key)
+    if fields is None:
+        value = int(pri)
+        if value > 191:
+            return None
+        if len(_cache) >= _CACHE_LIMIT:
+            _cache.clear()
+        fields = _cache[key] = (value >> 3, value & 7, host, program)
+    return fields
+
+
+def fields_dict(fields) -> dict:
+    return dict(zip(FIELD_NAMES, fields))
+
+
+def message_fields(message: dict):
+    """Stored fields of a signed message as a tuple, derived from the text for older records"""
+    stored = message.get('fields')
+    if stored is not None:
+        return tuple(stored.get(name) for name in FIELD_NAMES)
+    return parse_fields(message.get('original_message', ""))
+
+
+def check_fields(message: dict):
+    """Error text if a message's stored fields disagree with its (signed) text, else None"""
+    stored = message.get('fields')
+    if stored is None:
+        return None
+    if stored != fields_dict(parse_fields(message['original_message']) or (None,) * len(FIELD_NAMES)):
+        return "Derived fields do not match the signed message - possible tampering"
+    return None
+
+
+def parse_level(value: str, names: dict) -> int:
+    """Facility or severity given as a name ("auth", "err") or number"""
+    return int(value) if value.isdigit() else names[value.lower()]
+
+
+class FieldFilter:
+    """Select records by facility, maximum severity (0 = emerg), host and program.
+
+    Unset criteria match everything; set ones must all match. Records
+    without a parseable header only match an empty filter.
+    """
+
+    def __init__(self, facilities=None, max_severity=None, hosts=None, programs=None):
+        self.facilities = set(facilities) if facilities else None
+        self.max_severity = max_severity
+        self.hosts = set(hosts) if hosts else None
+        self.programs = set(programs) if programs else None
+
+    def __bool__(self) -> bool:
+        return any(c is not None for c in (self.facilities, self.max_severity, self.hosts, self.programs))
+
+    def matches(self, message: dict) -> bool:
+        fields = message_fields(message)
+        if fields is None:
+            return not self
+        facility, severity, host, program = fields
+        return ((self.facilities is None or facility in self.facilities)
+                and (self.max_severity is None or severity <= self.max_severity)
+                and (self.hosts is None or host in self.hosts)
+                and (self.programs is None or program in self.programs))
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""Asyncio syslog listener (RFC 5424 / RFC 3164 over UDP and TCP) feeding the signer directly."""
+import os
+import json
+import time
+import asyncio
+import threading
+import socket
+
+from flush_policy import FlushPolicy
+from buffer_tail import write_json_atomic
+from metrics import METRICS, get_logger
+from config.test_config import LOG_LEVEL
+
+log = get_logger("receiver", LOG_LEVEL)
+
+HANDLER_ERRORS = METRICS.counter("receiver_handler_errors_total", "Batches the signer failed to handle (retried)")
+
+
+class SyslogReceiver:
+    """Receive syslog lines and hand them to handler(lines) in batches.
+
+    UDP datagrams carry one message each. TCP accepts both RFC 6587
+    framings: octet counting ("<len> <msg>") and newline-terminated
+    messages. Received lines go into a bounded asyncio queue. When the
+    queue is full, lines are appended to spill_file if one is configured.
+    Otherwise UDP lines are dropped and counted, and TCP readers wait, which
+    pushes back on the sender. Once spilling starts, new lines keep going
+    to the spill file until the consumer has replayed it, so the order
+    is preserved. Spilled lines are only dropped from the file, and the
+    replay offset saved next to it, after the handler has returned for
+    them; spill file I/O runs on its own thread, off the event loop.
+
+    handler runs in a single worker thread, so batches are signed in
+    arrival order without blocking the event loop. Batch boundaries come
+    from policy (a FlushPolicy); without one, a batch closes at
+    batch_lines lines or max_latency seconds. If the handler raises, the
+    batch is kept and retried with backoff, and stats["handler_errors"]
+    counts the failures.
+    """
+
+    def __init__(self, handler, host="127.0.0.1", port=5514, queue_size=10000,
+                 batch_lines=1000, max_latency=1.0, spill_file=None, udp=True, tcp=True,
+                 policy=None):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.policy = policy or FlushPolicy(max_messages=batch_lines, max_age=max_latency, adaptive=False)
+        self.spill_file = spill_file
+        self.udp = udp
+        self.tcp = tcp
+
+        self.queue = None
+        self.loop = None
+        self.spilling = False
+        self.spill_offset_file = f"{spill_file}.offset.json" if spill_file else None
+        self.spill_offset = 0     # replay offset covered by signed batches (persisted)
+        self.spill_read = 0       # replay offset handed to the consumer
+        self.spill_pending = []   # spilled lines not yet passed to the I/O thread
+        self.spill_count = 0
+        self.spill_fh = None
+        self.pending = []         # lines of the open batch, not yet handled
+        self.transports = []
+        self.servers = []
+        self.consumer = None
+        self.ready = threading.Event()
+        self.stopped = None
+
+        self.stats = {"received": 0, "dropped": 0, "spilled": 0, "handled": 0, "batches": 0,
+                      "handler_errors": 0}
+
+    # Ingress -------------------------------------------------------------
+
+    def submit(self, line: str):
+        """Queue one received line without blocking (UDP path)"""
+        if not line:
+            return
+        self.stats["received"] += 1
+        if not self.spilling:
+            try:
+                self.queue.put_nowait(line)
+                return
+            except asyncio.QueueFull:
+                pass
+        if self.spill_file:
+            self.spill(line)
+        else:
+            self.stats["dropped"] += 1
+
+    async def submit_wait(self, line: str):
+        """Queue one received line, waiting for space unless spilling (TCP path)"""
+        if not line:
+            return
+        if self.spill_file:
+            self.submit(line)
+            return
+        self.stats["received"] += 1
+        await self.queue.put(line)
+
+    def spill(self, line: str):
+        """Queue a line for the spill file; lines are written in batches on the I/O thread"""
+        self.spilling = True
+        self.spill_pending.append(line.replace("\n", " ") + "\n")
+        self.spill_count += 1
+        self.stats["spilled"] += 1
+        if len(self.spill_pending) == 1:
+            self.loop.call_soon(self.flush_spill)
+
+    def flush_spill(self):
+        if self.spill_pending:
+            data, self.spill_pending = "".join(self.spill_pending), []
+            self.io_executor.submit(self.write_spill, data)
+
+    def write_spill(self, data: str):
+        """Append to the spill file through one long-lived handle (I/O thread)"""
+        try:
+            if self.spill_fh is None:
+                self.spill_fh = open(self.spill_file, 'a', encoding='utf-8')
+            self.spill_fh.write(data)
+            self.spill_fh.flush()
+        except OSError as e:
+            lost = data.count("\n")
+            self.stats["dropped"] += lost
+            log.error("❌ Failed to spill %d lines: %s", lost, e)
+
+    def read_spill(self, offset: int, max_lines: int):
+        """(lines, end offset) of up to max_lines spilled lines from offset (I/O thread)"""
+        lines = []
+        with open(self.spill_file, 'rb') as f:
+            f.seek(offset)
+            while len(lines) < max_lines:
+                line = f.readline()
+                if not line:
+                    break
+                lines.append(line.rstrip(b"\n").decode('utf-8', errors='replace'))
+                offset += len(line)
+        return lines, offset
+
+    def commit_spill(self, offset: int) -> bool:
+        """Persist the replay offset once its lines are signed (I/O thread)
+
+        When everything written so far is signed, the file is truncated
+        first and the offset reset afterwards; an offset past the end of
+        the file is treated as 0 on load. Returns True if truncated.
+        """
+        truncated = offset >= os.path.getsize(self.spill_file)
+        if truncated:
+            # The append handle keeps writing at the (new) end
+            open(self.spill_file, 'w').close()
+            offset = 0
+        write_json_atomic(self.spill_offset_file, {"offset": offset})
+        return truncated
+
+    def load_spill_offset(self) -> int:
+        try:
+            with open(self.spill_offset_file, 'r') as f:
+                offset = json.load(f)["offset"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return 0
+        return offset if offset <= os.path.getsize(self.spill_file) else 0
+
+    async def run_io(self, fn, *args):
+        return await self.loop.run_in_executor(self.io_executor, fn, *args)
+
+    async def handle_tcp(self, reader, writer):
+        try:
+            while True:
+                first = await reader.read(1)
+                if not first:
+                    break
+                if first.isdigit():
+                    # Octet counting: "<length> <message>"
+                    rest = await reader.readuntil(b" ")
+                    length = int(first + rest[:-1])
+                    data = await reader.readexactly(length)
+                else:
+                    data = first + await reader.readline()
+                await self.submit_wait(data.decode('utf-8', errors='replace').strip())
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # Consumer ------------------------------------------------------------
+
+    async def collect(self, lines: list):
+        """Add lines to the open batch: from the spill file while spilling, else from the queue"""
+        policy = self.policy
+        if self.spilling and self.queue.empty():
+            self.flush_spill()
+            spilled, self.spill_read = await self.run_io(self.read_spill, self.spill_read, policy.remaining())
+            for line in spilled:
+                lines.append(line)
+                policy.add(len(line))
+            if not spilled:
+                if self.spill_read == self.spill_offset:
+                    # Everything spilled is signed: reset the file and go back to the queue
+                    await self.commit_spill_offset(self.spill_read)
+                else:
+                    await asyncio.sleep(min(0.05, policy.time_left()))
+            return
+
+        try:
+            line = await asyncio.wait_for(self.queue.get(), timeout=policy.time_left())
+            lines.append(line)
+            policy.add(len(line))
+            while not policy.due():
+                line = self.queue.get_nowait()
+                lines.append(line)
+                policy.add(len(line))
+        except (asyncio.TimeoutError, asyncio.QueueEmpty):
+            pass
+
+    async def commit_spill_offset(self, offset: int):
+        count = self.spill_count
+        self.flush_spill()
+        if await self.run_io(self.commit_spill, offset):
+            self.spill_offset = self.spill_read = 0
+            # Lines spilled since the truncate check are already in the new file
+            if self.spill_count == count:
+                self.spilling = False
+        else:
+            self.spill_offset = offset
+
+    async def consume(self):
+        """Collect lines into batches and run the handler off the event loop
+
+        A batch the handler fails on (e.g. disk full) is kept and retried
+        with exponential backoff, so nothing received is silently lost and
+        spilled lines stay in the spill file until they are signed.
+        """
+        policy = self.policy
+        lines = self.pending
+        failures = 0
+        while True:
+            if not (lines and policy.due()):
+                await self.collect(lines)
+
+            if lines and policy.due():
+                spill_end = self.spill_read if self.spilling else None
+                try:
+                    await self.loop.run_in_executor(self.executor, self.handler, list(lines))
+                except Exception as e:
+                    failures += 1
+                    self.stats["handler_errors"] += 1
+                    HANDLER_ERRORS.inc()
+                    log.error("❌ Failed to handle a batch of %d lines (attempt %d): %s", len(lines), failures, e)
+                    await asyncio.sleep(min(0.5 * 2 ** (failures - 1), 30))
+                    continue
+                failures = 0
+                policy.flushed()
+                self.stats["handled"] += len(lines)
+                self.stats["batches"] += 1
+                lines.clear()
+                if spill_end is not None and spill_end != self.spill_offset:
+                    await self.commit_spill_offset(spill_end)
+
+    # Lifecycle -----------------------------------------------------------
+
+    async def start(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.io_executor = ThreadPoolExecutor(max_workers=1)
+        self.stopped = asyncio.Event()
+        if self.spill_file and os.path.exists(self.spill_file):
+            # Lines spilled before a restart and not yet signed are replayed first
+            self.spill_offset = self.spill_read = self.load_spill_offset()
+            if os.path.getsize(self.spill_file) > self.spill_offset:
+                self.spilling = True
+
+        if self.udp:
+            receiver = self
+
+            class SyslogUDP(asyncio.DatagramProtocol):
+                def datagram_received(self, data, addr):
+                    receiver.submit(data.decode('utf-8', errors='replace').strip())
+
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 << 20)
+            sock.bind((self.host, self.port))
+            transport, _ = await self.loop.create_datagram_endpoint(SyslogUDP, sock=sock)
+            self.transports.append(transport)
+            # Port 0 picks a free port; TCP then binds the same number
+            self.port = sock.getsockname()[1]
+
+        if self.tcp:
+            server = await asyncio.start_server(self.handle_tcp, self.host, self.port)
+            self.servers.append(server)
+            self.port = server.sockets[0].getsockname()[1]
+
+        self.consumer = asyncio.create_task(self.consume())
+        self.ready.set()
+
+    async def drain(self, timeout=None):
+        """Wait until everything received so far has been handled"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.stats["handled"] + self.stats["dropped"] < self.stats["received"]:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.01)
+        return True
+
+    async def stop(self):
+        for transport in self.transports:
+            transport.close()
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        if not await self.drain(timeout=30) and self.pending:
+            log.error("❌ Stopping with %d received lines unsigned (%d handler errors)",
+                      len(self.pending), self.stats["handler_errors"])
+        if self.consumer:
+            self.consumer.cancel()
+        self.executor.shutdown(wait=True)
+        if self.spill_file:
+            self.flush_spill()
+        self.io_executor.shutdown(wait=True)
+        if self.spill_fh is not None:
+            self.spill_fh.close()
+        self.stopped.set()
+
+    async def serve(self):
+        """Run until stop() is called (or the task is cancelled)"""
+        await self.start()
+        await self.stopped.wait()
+
+    def run_in_thread(self) -> threading.Thread:
+        """Start the receiver on its own event loop thread (for tests and benchmarks)"""
+        thread = threading.Thread(target=lambda: asyncio.run(self.serve()), daemon=True)
+        thread.start()
+        self.ready.wait()
+        return thread
+
+    def stop_from_thread(self, thread: threading.Thread):
+        asyncio.run_coroutine_threadsafe(self.stop(), self.loop).result()
+        thread.join()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Local key distribution service: serves signer public keys and rotation
+metadata from the key registry over HTTP on localhost, plus the caching
+client the verifier uses to fetch them.
+
+Endpoints (JSON):
+    GET  /keys            all keys with status/added (no key material)
+    GET  /keys/<key_id>   one key, including the hex public key
+    POST /keys/batch      {"key_ids": [...]} -> {"keys": {...}, "missing": [...]}
+"""
+import os
+import json
+import time
+import threading
+import argparse
+import http.client
+from urllib.parse import urlsplit, quote, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from config.test_config import *
+from key_registry import KeyRegistry, KeyLookupError
+from nacl.signing import VerifyKey
+
+
+class KeyServer:
+    """HTTP/1.1 key server backed by a KeyRegistry.
+
+    Connections are kept alive between requests. The manifest is re-read
+    when its mtime changes, so rotations (key_registry.py add/revoke) are
+    served without a restart.
+    """
+
+    def __init__(self, registry: KeyRegistry, host=KEY_SERVER_HOST, port=KEY_SERVER_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.lock = threading.Lock()
+        self.manifest_mtime = self.current_mtime()
+        self.httpd = None
+        self.requests = 0
+
+    def current_mtime(self):
+        try:
+            return os.stat(self.registry.manifest_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        """Swap in a freshly loaded registry when the manifest changed
+
+        Requests in flight keep using the registry they started with, so a
+        reload never shows them a half-loaded (empty) key set.
+        """
+        mtime = self.current_mtime()
+        if mtime == self.manifest_mtime:
+            return
+        with self.lock:
+            if mtime == self.manifest_mtime:
+                return
+            current = self.registry
+            self.registry = KeyRegistry(current.manifest_file, current.default_key_id, current.default_key_file)
+            self.manifest_mtime = mtime
+
+    def key_entry(self, registry: KeyRegistry, key_id: str, with_key: bool = True):
+        entry = registry.entries.get(key_id)
+        if entry is None:
+            return None
+        result = {
+            "key_id": key_id,
+            "algorithm": entry.get("algorithm", "ed25519"),
+            "status": entry.get("status", "active"),
+            "added": entry.get("added")
+        }
+        if with_key:
+            result["public_key"] = registry.public_key_bytes(key_id).hex()
+        return result
+
+    def handle(self, method: str, path: str, body: bytes):
+        """Return (status, payload) for one request"""
+        with self.lock:
+            self.requests += 1
+        self.refresh()
+        registry = self.registry
+
+        if method == "GET" and path == "/keys":
+            return 200, {
+                "default_key_id": registry.default_key_id,
+                "keys": [self.key_entry(registry, key_id, with_key=False) for key_id in registry.key_ids()]
+            }
+        if method == "GET" and path.startswith("/keys/"):
+            entry = self.key_entry(registry, unquote(path[len("/keys/"):]))
+            return (200, entry) if entry else (404, {"error": "Unknown key_id"})
+        if method == "POST" and path == "/keys/batch":
+            key_ids = json.loads(body or b"{}").get("key_ids", [])
+            keys = {}
+            missing = []
+            for key_id in key_ids:
+                entry = self.key_entry(registry, key_id)
+                if entry:
+                    keys[key_id] = entry
+                else:
+                    missing.append(key_id)
+            return 200, {"keys": keys, "missing": missing}
+        return 404, {"error": "Not found"}
+
+    def make_handler(self):
+        server = self
+
+        class KeyRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; avoid Nagle + delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def respond(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                try:
+                    status, payload = server.handle(method, self.path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self.respond("GET")
+
+            def do_POST(self):
+                self.respond("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return KeyRequestHandler
+
+    def start(self):
+        self.httpd = ThreadingHTTPServer((self.host, self.port), self.make_handler())
+        self.httpd.daemon_threads = True
+        # Port 0 picks a free port
+        self.port = self.httpd.server_address[1]
+        return self
+
+    def serve_forever(self):
+        if self.httpd is None:
+            self.start()
+        self.httpd.serve_forever()
+
+    def run_in_thread(self) -> threading.Thread:
+        """Serve on a background thread (for tests and benchmarks)"""
+        if self.httpd is None:
+            self.start()
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class KeyServerClient:
+    """Caching key client with the same resolve() interface as KeyRegistry.
+
+    One keep-alive connection is reused for every request (and reopened
+    once if the server closed it). Entries, including unknown key_ids, are
+    cached for ttl seconds; get_keys() fetches all uncached key_ids in a
+    single batch request.
+    """
+
+    def __init__(self, url=f"http://{KEY_SERVER_HOST}:{KEY_SERVER_PORT}", ttl=KEY_CACHE_TTL,
+                 timeout=5.0, default_key_id=DEFAULT_KEY_ID):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.ttl = ttl
+        self.timeout = timeout
+        self.default_key_id = default_key_id
+        self.conn = None
+        self.cache = {}
+        self.verify_keys = {}
+        self.stats = {"requests": 0, "hits": 0, "misses": 0}
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def request(self, method: str, path: str, payload=None) -> tuple:
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                self.stats["requests"] += 1
+                return response.status, json.loads(data)
+            except (http.client.HTTPException, ConnectionError):
+                # Stale keep-alive connection: reconnect once
+                self.close()
+                if attempt:
+                    raise
+
+    def cached(self, key_id: str):
+        """(hit, entry) from the TTL cache; entry is None for known-missing keys"""
+        item = self.cache.get(key_id)
+        if item is not None and item[0] > time.monotonic():
+            return True, item[1]
+        return False, None
+
+    def get_keys(self, key_ids) -> dict:
+        """Entries for many key_ids, fetching the uncached ones in one request"""
+        result = {}
+        fetch = []
+        for key_id in key_ids:
+            hit, entry = self.cached(key_id)
+            if hit:
+                self.stats["hits"] += 1
+                result[key_id] = entry
+            else:
+                fetch.append(key_id)
+
+        if fetch:
+            self.stats["misses"] += len(fetch)
+            status, payload = self.request("POST", "/keys/batch", {"key_ids": fetch})
+            if status != 200:
+                raise KeyLookupError(f"Key server error: {payload.get('error')}")
+            expires = time.monotonic() + self.ttl
+            for key_id in fetch:
+                entry = payload["keys"].get(key_id)
+                self.cache[key_id] = (expires, entry)
+                result[key_id] = entry
+        return result
+
+    def get_key(self, key_id: str):
+        hit, entry = self.cached(key_id)
+        if hit:
+            self.stats["hits"] += 1
+            return entry
+
+        self.stats["misses"] += 1
+        status, payload = self.request("GET", f"/keys/{quote(key_id, safe='')}")
+        if status not in (200, 404):
+            raise KeyLookupError(f"Key server error: {payload.get('error')}")
+        entry = payload if status == 200 else None
+        self.cache[key_id] = (time.monotonic() + self.ttl, entry)
+        return entry
+
+    def key_ids(self) -> list:
+        status, payload = self.request("GET", "/keys")
+        if status != 200:
+            raise KeyLookupError(f"Key server error: {payload.get('error')}")
+        return [entry["key_id"] for entry in payload["keys"]]
+
+    def prefetch(self) -> dict:
+        """Warm the cache with every key the server knows (two requests)"""
+        return self.get_keys(self.key_ids())
+
+    def verify_key(self, key_id: str) -> VerifyKey:
+        entry = self.get_key(key_id)
+        if entry is None:
+            raise KeyLookupError(f"Unknown key_id: {key_id}")
+        return self.decode(entry)
+
+    def decode(self, entry: dict) -> VerifyKey:
+        """VerifyKey for a fetched entry, decoded once per key material"""
+        cache_key = (entry["key_id"], entry["public_key"])
+        if cache_key not in self.verify_keys:
+            self.verify_keys[cache_key] = VerifyKey(bytes.fromhex(entry["public_key"]))
+        return self.verify_keys[cache_key]
+
+    def resolve(self, key_id: str, embedded_hex: str = None) -> VerifyKey:
+        """VerifyKey for key_id; raises KeyLookupError if it cannot be trusted"""
+        if key_id is None:
+            key_id = self.default_key_id
+        entry = self.get_key(key_id)
+        if entry is None:
+            raise KeyLookupError(f"Unknown key_id: {key_id}")
+        if entry["status"] == "revoked":
+            raise KeyLookupError(f"Key {key_id} is revoked")
+        if embedded_hex is not None and embedded_hex != entry["public_key"]:
+            raise KeyLookupError(f"Embedded public key does not match registry for {key_id}")
+        return self.decode(entry)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local key distribution server")
+    parser.add_argument("--host", default=KEY_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=KEY_SERVER_PORT)
+    args = parser.parse_args()
+
+    registry = KeyRegistry(KEY_MANIFEST_FILE, DEFAULT_KEY_ID, TEST_PUBLIC_KEY_FILE)
+    server = KeyServer(registry, args.host, args.port).start()
+    print(f"🔑 Serving {len(registry.key_ids())} key(s) on http://{server.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ Key server stopped")
@@ -158,31 +158,76 @@
 
 #!/usr/bin/env python3
 import json
+import time
 import os
-import glob
+import math
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from config.test_config import *
+from merkle import leaf_hash, root_from_proof, merkle_root, build_levels, inclusion_proof
+from verify_checkpoint import VerificationCheckpoint, file_fingerprint, file_sha256
+from hash_chain import GENESIS_HASH, ContentDigest, compute_batch_hash
+from batch_format import (
+    is_compact_batch, iter_compact_batch, read_compact_trailer,
+    load_batch, signing_data, JsonBatchReader, read_compact_header,
+    compact_record_to_message, read_last_line,
+    list_batch_files, open_batch, iter_compact_range, root_signing_data
+)
 
+from key_registry import KeyRegistry, KeyLookupError
+from syslog_fields import FieldFilter, check_fields, parse_level, FACILITIES, SEVERITIES
+from metrics import METRICS
 from nacl.signing import VerifyKey
 from nacl.exceptions import BadSignatureError
 
+# Per-stage verifier metrics (bulk-verify worker processes keep their own
+# histograms; the counters are aggregated in the parent)
+PARSE_SECONDS = METRICS.histogram("verifier_parse_seconds", "Time spent parsing records, per batch file")
+VERIFY_SECONDS = METRICS.histogram("verifier_verify_seconds", "Signature verification time per message (sampled)")
+FILE_SECONDS = METRICS.histogram("verifier_file_seconds", "Time to verify one batch file")
+FILES_VERIFIED = METRICS.counter("verifier_files_total", "Batch files verified")
+MESSAGES_VALID = METRICS.counter("verifier_messages_total", "Messages verified", {"result": "valid"})
+MESSAGES_INVALID = METRICS.counter("verifier_messages_total", "Messages verified", {"result": "invalid"})
+FILE_ERRORS = METRICS.counter("verifier_file_errors_total", "Batch files with structural or chain errors")
+MESSAGES_REPLAYED = METRICS.counter("verifier_replayed_messages_total", "Records whose message_id already appears in another location")
+
 
 class LocalSIEMVerifier:
-    def __init__(self):
+    def __init__(self, verbose=True, key_server=KEY_SERVER_URL):
+        ensure_dirs()
+        self.verbose = verbose
+        self.key_server = key_server
         self.public_key = None
+        self.keys = None
+        # Batch root signatures already checked: (batch_id, key_id, root, signature)
+        self.verified_roots = set()
+        self.verify_message = METRICS.timed(self.verify_message, VERIFY_SECONDS)
         self.load_public_key()
     
     def load_public_key(self):
-        """Load public key from local test file"""
+        """Load the key registry, or connect to the key server if one is configured"""
         try:
-            with open(TEST_PUBLIC_KEY_FILE, 'rb') as f:
-                key_data = f.read()
-                self.public_key = VerifyKey(key_data)
-            print("✓ Loaded test public key successfully")
+            if self.key_server:
+                from test_key_server import KeyServerClient
+                self.keys = KeyServerClient(self.key_server)
+                key_ids = list(self.keys.prefetch())
+            else:
+                self.keys = KeyRegistry(KEY_MANIFEST_FILE, DEFAULT_KEY_ID, TEST_PUBLIC_KEY_FILE)
+                key_ids = self.keys.key_ids()
+            if not key_ids:
+                raise FileNotFoundError(f"No keys in {KEY_MANIFEST_FILE} or {TEST_PUBLIC_KEY_FILE}")
+            self.public_key = self.keys.verify_key(DEFAULT_KEY_ID if DEFAULT_KEY_ID in key_ids else key_ids[0])
+            if self.verbose:
+                print(f"✓ Loaded {len(key_ids)} public key(s): {', '.join(key_ids)}")
             return True
         except Exception as e:
             print(f"❌ Failed to load public key: {e}")
             return False
     
+    def key_for(self, key_id: str, key_info: dict = None) -> VerifyKey:
+        """Registry key for key_id; raises KeyLookupError if an embedded key disagrees"""
+        return self.keys.resolve(key_id, key_info.get('public_key') if key_info else None)
+    
     def verify_message(self, signed_message: dict) -> dict:
         """Verify a single signed message"""
         try:
@@ -201,21 +246,621 @@ class LocalSIEMVerifier:
             # Recreate signing data (must match signer)
             signing_data = f"{signed_message['message_id']}{signed_message['timestamp']}{signed_message['original_message']}".encode()
             
+            key = self.key_for(signed_message['signature'].get('key_id'), signed_message.get('public_key_info'))
+            
             # Verify signature
             signature_bytes = bytes.fromhex(signed_message['signature']['value'])
-            self.public_key.verify(signing_data, signature_bytes)
+            key.verify(signing_data, signature_bytes)
             
             return {"valid": True, "message": "Signature verified successfully"}
             
+        except KeyLookupError as e:
+            return {"valid": False, "error": str(e)}
         except BadSignatureError:
             return {"valid": False, "error": "Invalid signature - possible tampering"}
         except Exception as e:
             return {"valid": False, "error": f"Verification failed: {str(e)}"}
     
+    def verify_batch_signature(self, batch_id: str, batch_signature: dict, key_info: dict = None) -> dict:
+        """Verify the Ed25519 signature over a Merkle batch root (cached per signed bytes)"""
+        try:
+            if not self.public_key:
+                return {"valid": False, "error": "No public key available"}
+            
+            for field in ('tree_size', 'root', 'value'):
+                if field not in batch_signature:
+                    return {"valid": False, "error": f"Missing batch signature field: {field}"}
+            
+            tree_size = batch_signature['tree_size']
+            if not isinstance(tree_size, int) or isinstance(tree_size, bool) or tree_size < 1:
+                return {"valid": False, "error": f"Invalid tree_size: {tree_size!r}"}
+            version = batch_signature.get('version', 1)
+            if version not in (1, 2):
+                return {"valid": False, "error": f"Unsupported batch signature version: {version!r}"}
+            
+            key = self.key_for(batch_signature.get('key_id'), key_info)
+            
+            # Keyed on exactly what the signature covers, so no unsigned field can ride on a cache hit
+            signing_data = root_signing_data(batch_id, tree_size, batch_signature['root'], version)
+            cache_key = (key.encode(), signing_data, batch_signature['value'])
+            if cache_key in self.verified_roots:
+                return {"valid": True, "message": "Batch root verified successfully"}
+            
+            key.verify(signing_data, bytes.fromhex(batch_signature['value']))
+            self.verified_roots.add(cache_key)
+            
+            return {"valid": True, "message": "Batch root verified successfully"}
+            
+        except KeyLookupError as e:
+            return {"valid": False, "error": str(e)}
+        except BadSignatureError:
+            return {"valid": False, "error": "Invalid batch root signature - possible tampering"}
+        except Exception as e:
+            return {"valid": False, "error": f"Batch verification failed: {str(e)}"}
+    
+    def verify_merkle_message(self, signed_message: dict, batch_id: str, batch_signature: dict,
+                              key_info: dict = None) -> dict:
+        """Verify a single message from a Merkle batch using its inclusion proof"""
+        try:
+            required_fields = ['message_id', 'timestamp', 'original_message', 'proof']
+            for field in required_fields:
+                if field not in signed_message:
+                    return {"valid": False, "error": f"Missing field: {field}"}
+            
+            root_result = self.verify_batch_signature(batch_id, batch_signature, key_info)
+            if not root_result['valid']:
+                return root_result
+            
+            proof = signed_message['proof']
+            signing_data = f"{signed_message['message_id']}{signed_message['timestamp']}{signed_message['original_message']}".encode()
+            computed_root = root_from_proof(
+                leaf_hash(signing_data),
+                proof['index'],
+                batch_signature['tree_size'],
+                [bytes.fromhex(node) for node in proof['path']]
+            )
+            
+            if computed_root.hex() != batch_signature['root']:
+                return {"valid": False, "error": "Inclusion proof mismatch - possible tampering"}
+            
+            return {"valid": True, "message": "Inclusion proof verified successfully"}
+            
+        except Exception as e:
+            return {"valid": False, "error": f"Verification failed: {str(e)}"}
+    
+    def verify_batch_message(self, signed_message: dict, batch_data: dict) -> dict:
+        """Verify a message in the context of its batch (per-message or Merkle signed)"""
+        if 'batch_signature' in batch_data:
+            return self.verify_merkle_message(
+                signed_message, batch_data.get('batch_id', ''), batch_data['batch_signature'],
+                batch_data.get('public_key_info')
+            )
+        return self.verify_message(signed_message)
+    
+    def verify_file(self, path: str, with_digest: bool = False, match: FieldFilter = None,
+                    signatures: bool = True) -> dict:
+        """Verify every message in one batch file without per-message output
+        
+        With with_digest, a file that verifies cleanly is also reported in
+        summary['verified'] with its fingerprint and SHA-256 so it can be
+        checkpointed. With a FieldFilter, only matching messages are
+        verified; the rest are counted in summary['filtered'] before any
+        signature work (the batch's chain digest still covers them all).
+        With signatures=False a split message-mode compact batch is only
+        checked as a whole (trailer, count, chain digest); its record
+        signatures are left to verify_record_range().
+        """
+        summary = new_summary(files=1)
+        start = time.perf_counter()
+        
+        try:
+            if with_digest:
+                fingerprint = file_fingerprint(path)
+                digest = file_sha256(path)
+            
+            if is_compact_batch(path):
+                self.verify_compact_file(path, summary, match, signatures)
+            else:
+                self.verify_json_file(path, summary, match)
+        
+        except Exception as e:
+            summary['file_errors'].append({"file": path, "error": str(e)})
+        FILE_SECONDS.observe(time.perf_counter() - start)
+        
+        clean = not summary['invalid'] and not summary['file_errors']
+        if with_digest and clean and file_fingerprint(path) == fingerprint:
+            summary['verified'].append({
+                "path": path,
+                "fingerprint": fingerprint,
+                "sha256": digest,
+                "message_count": summary['valid']
+            })
+        
+        return summary
+    
+    def verify_json_file(self, path: str, summary: dict, match: FieldFilter = None) -> dict:
+        """Stream-verify an indented JSON batch"""
+        # Stream the messages array: memory stays flat regardless of batch size
+        reader = JsonBatchReader(path)
+        if not reader.in_messages:
+            reader.close()
+            summary['file_errors'].append({"file": path, "error": "Invalid batch file format"})
+            return summary
+        
+        link = reader.header.get('chain')
+        digest = ContentDigest() if link else None
+        count = 0
+
+        # A proof only shows its own message is in the tree: dropped or repeated
+        # messages are caught by requiring each index 0..tree_size-1 exactly once
+        batch_signature = reader.header.get('batch_signature')
+        seen = None
+        bad_indices = 0
+        if batch_signature is not None and self.verify_batch_signature(
+                reader.header.get('batch_id', ''), batch_signature, reader.header.get('public_key_info'))['valid']:
+            tree_size = batch_signature['tree_size']
+            seen = bytearray((tree_size + 7) // 8)
+        
+        for message in METRICS.timed_iter(reader, PARSE_SECONDS):
+            if digest:
+                digest.update(leaf_hash(signing_data(message)))
+            count += 1
+            if seen is not None:
+                proof = message.get('proof')
+                index = proof.get('index') if isinstance(proof, dict) else None
+                if not isinstance(index, int) or not 0 <= index < tree_size or seen[index >> 3] & (1 << (index & 7)):
+                    bad_indices += 1
+                else:
+                    seen[index >> 3] |= 1 << (index & 7)
+            if match and not match.matches(message):
+                summary['filtered'] += 1
+                continue
+            self.record_result(summary, path, message, self.verify_batch_message(message, reader.header))
+        
+        if seen is not None:
+            if count != tree_size:
+                summary['file_errors'].append({
+                    "file": path,
+                    "error": f"Message count {count} does not match tree_size ({tree_size})"
+                })
+            if bad_indices:
+                summary['file_errors'].append({
+                    "file": path,
+                    "error": f"{bad_indices} proof indices repeated or outside the tree - messages duplicated"
+                })
+        
+        if link:
+            self.check_chain_content(summary, path, reader.header.get('batch_id', ''), link, count, digest)
+        
+        return summary
+    
+    def check_chain_content(self, summary: dict, path: str, batch_id: str, link: dict, count: int, digest):
+        """Check that a batch's messages match its signed chain block"""
+        result = self.verify_chain_link(batch_id, link)
+        if not result['valid']:
+            summary['file_errors'].append({"file": path, "error": result['error']})
+        elif link['message_count'] != count or link['content_digest'] != digest.hexdigest():
+            summary['file_errors'].append({
+                "file": path,
+                "error": "Chain content digest mismatch - messages added, removed or reordered"
+            })
+    
+    def record_result(self, summary: dict, path: str, message: dict, result: dict):
+        if result['valid'] and 'fields' in message:
+            error = check_fields(message)
+            if error:
+                result = {"valid": False, "error": error}
+        if result['valid']:
+            summary['valid'] += 1
+        else:
+            summary['invalid'] += 1
+            summary['failed'].append({
+                "file": path,
+                "message_id": message.get('message_id'),
+                "error": result['error']
+            })
+    
+    def verify_compact_file(self, path: str, summary: dict, match: FieldFilter = None,
+                            signatures: bool = True) -> dict:
+        """Stream-verify a compact (.ndjson) batch, one record at a time"""
+        trailer = read_compact_trailer(path)
+        if trailer is None:
+            summary['file_errors'].append({"file": path, "error": "Incomplete compact batch (no trailer)"})
+            return summary
+        
+        records = METRICS.timed_iter(iter_compact_batch(path), PARSE_SECONDS)
+        header = next(records)
+        count = 0
+        digest = ContentDigest()
+        
+        if header.get('signing_mode') != "merkle":
+            for message in records:
+                count += 1
+                digest.update(leaf_hash(signing_data(message)))
+                if not signatures:
+                    continue
+                if match and not match.matches(message):
+                    summary['filtered'] += 1
+                    continue
+                self.record_result(summary, path, message, self.verify_message(message))
+        else:
+            # Only the 32-byte leaf hashes are kept; the root is signed once.
+            # Every leaf is needed for the root, so a filter only limits what is reported.
+            selected = []
+            leaves = []
+            for message in records:
+                leaves.append(leaf_hash(signing_data(message)))
+                digest.update(leaves[-1])
+                if match and not match.matches(message):
+                    summary['filtered'] += 1
+                    continue
+                selected.append((message['message_id'], check_fields(message)))
+            count = len(leaves)
+            
+            batch_signature = trailer.get('batch_signature', {})
+            result = self.verify_batch_signature(header['batch_id'], batch_signature, header)
+            if result['valid'] and (not leaves or merkle_root(leaves).hex() != batch_signature['root']):
+                result = {"valid": False, "error": "Merkle root mismatch - possible tampering"}
+            
+            for message_id, fields_error in selected:
+                self.record_result(summary, path, {"message_id": message_id},
+                                   {"valid": False, "error": fields_error} if fields_error and result['valid'] else result)
+        
+        if count != trailer['message_count']:
+            summary['file_errors'].append({
+                "file": path,
+                "error": f"Record count {count} does not match trailer ({trailer['message_count']})"
+            })
+        
+        if 'chain' in trailer:
+            self.check_chain_content(summary, path, header['batch_id'], trailer['chain'], count, digest)
+        
+        return summary
+    
+    def verify_record_range(self, path: str, start: int, end: int, match: FieldFilter = None) -> dict:
+        """Verify the signatures of the records of a compact batch whose lines start in [start, end)"""
+        summary = new_summary()
+        try:
+            header = read_compact_header(path)
+            for record in iter_compact_range(path, start, end):
+                message = compact_record_to_message(record, header)
+                if match and not match.matches(message):
+                    summary['filtered'] += 1
+                    continue
+                self.record_result(summary, path, message, self.verify_message(message))
+        except Exception as e:
+            summary['file_errors'].append({"file": path, "error": str(e)})
+        return summary
+    
+    def split_file(self, path: str, workers: int) -> list:
+        """Byte ranges for verifying one large message-mode compact batch in parallel ([] to keep it whole)"""
+        try:
+            with open_batch(path) as f:
+                # Uncompressed size: ranges are offsets into the batch, also for archives
+                size = f.seek(0, os.SEEK_END)
+            if size < 2 * VERIFY_SPLIT_BYTES or not is_compact_batch(path):
+                return []
+            if read_compact_header(path).get('signing_mode') == "merkle":
+                # One signature over the root: nothing to spread
+                return []
+        except Exception:
+            return []
+        
+        parts = min(workers * 4, size // VERIFY_SPLIT_BYTES)
+        step = math.ceil(size / parts)
+        return [(path, start, min(start + step, size)) for start in range(0, size, step)]
+    
+    def verify_item(self, item, with_digest: bool = False, match: FieldFilter = None) -> dict:
+        """One unit of bulk verification: a file path, or (path, start, end) for part of a split file
+        
+        (path, None, None) checks the split file as a whole without its
+        record signatures.
+        """
+        if isinstance(item, str):
+            return self.verify_file(item, with_digest, match)
+        path, start, end = item
+        if start is None:
+            return self.verify_file(path, with_digest, match, signatures=False)
+        return self.verify_record_range(path, start, end, match)
+    
+    def verify_chain_link(self, batch_id: str, link: dict) -> dict:
+        """Check a chain block's hash and signature (not its neighbours)"""
+        try:
+            if not self.public_key:
+                return {"valid": False, "error": "No public key available"}
+            
+            expected = compute_batch_hash(
+                batch_id, link['sequence'], link['prev_hash'], link['content_digest'], link['message_count']
+            )
+            if expected != link['batch_hash']:
+                return {"valid": False, "error": "Chain block hash mismatch - possible tampering"}
+            
+            key = self.key_for(link.get('key_id'))
+            key.verify(bytes.fromhex(link['batch_hash']), bytes.fromhex(link['signature']))
+            return {"valid": True, "message": "Chain block verified successfully"}
+        
+        except KeyLookupError as e:
+            return {"valid": False, "error": str(e)}
+        except BadSignatureError:
+            return {"valid": False, "error": "Invalid chain signature - possible tampering"}
+        except Exception as e:
+            return {"valid": False, "error": f"Chain verification failed: {str(e)}"}
+    
+    def read_chain_link(self, path: str):
+        """Return (batch_id, chain block or None) reading only the batch header/trailer"""
+        if is_compact_batch(path):
+            header = read_compact_header(path)
+            trailer = json.loads(read_last_line(path))
+            return header.get('batch_id', ''), trailer.get('chain') if trailer.get('trailer') else None
+        
+        reader = JsonBatchReader(path)
+        reader.close()
+        return reader.header.get('batch_id', ''), reader.header.get('chain')
+    
+    def verify_chain(self, paths, expected_tip: dict = None) -> dict:
+        """Check chain continuity over the batches of one chain, reading headers only
+        
+        Reports broken links (bad hash/signature), gaps and duplicates in the
+        sequence, and prev_hash values that do not match the preceding batch.
+        Batches written before chaining existed are listed as unchained.
+        Passing the signer's cached tip (sequence, batch_hash) also catches
+        batches deleted from the end of the chain. Each directory holds its
+        own chain; run_chain_verification() groups files accordingly.
+        """
+        results = {"batches": 0, "unchained": [], "errors": [], "tip": None}
+        links = []
+        
+        for path in collect_batch_files(paths):
+            try:
+                batch_id, link = self.read_chain_link(path)
+            except Exception as e:
+                results['errors'].append({"file": path, "error": f"Unreadable header: {e}"})
+                continue
+            
+            if link is None:
+                results['unchained'].append(path)
+                continue
+            
+            result = self.verify_chain_link(batch_id, link)
+            if not result['valid']:
+                results['errors'].append({"file": path, "error": result['error']})
+                continue
+            links.append((link['sequence'], link['prev_hash'], link['batch_hash'], path))
+        
+        links.sort()
+        results['batches'] = len(links)
+        expected_seq, expected_prev = 0, GENESIS_HASH
+        for sequence, prev_hash, batch_hash, path in links:
+            if sequence < expected_seq:
+                results['errors'].append({"file": path, "error": f"Duplicate sequence {sequence}"})
+                continue
+            if sequence > expected_seq:
+                missing = f"{expected_seq}" if sequence - 1 == expected_seq else f"{expected_seq}..{sequence - 1}"
+                results['errors'].append({"file": path, "error": f"Gap: sequence {missing} missing"})
+            elif prev_hash != expected_prev:
+                results['errors'].append({
+                    "file": path,
+                    "error": f"Sequence {sequence} does not link to the previous batch - reordered or replaced"
+                })
+            expected_seq, expected_prev = sequence + 1, batch_hash
+        
+        if links:
+            sequence, _, batch_hash, path = links[-1]
+            results['tip'] = {"sequence": sequence, "batch_hash": batch_hash, "file": path}
+        
+        if expected_tip and expected_tip.get('sequence', -1) >= 0:
+            tip = results['tip'] or {"sequence": -1, "batch_hash": GENESIS_HASH}
+            if (tip['sequence'], tip['batch_hash']) != (expected_tip['sequence'], expected_tip['batch_hash']):
+                results['errors'].append({
+                    "file": expected_tip.get('batch_file') or "",
+                    "error": f"Chain ends at sequence {tip['sequence']} but the signer's tip is "
+                             f"{expected_tip['sequence']} - batches missing from the end"
+                })
+        
+        return results
+    
+    def verify_files(self, paths, workers=None, chunk_size=None, progress=None,
+                     checkpoint=None, rehash=False, replay=None, match=None) -> dict:
+        """Verify many batch files (or whole directories) on a process pool
+        
+        Files are handed to workers in chunks of chunk_size, by default
+        sized for about four chunks per worker. Message-mode compact batches
+        of at least 2 * VERIFY_SPLIT_BYTES are split into byte ranges that
+        are verified as separate tasks. Only aggregated counts and the
+        failing message_ids are returned. progress, if given, is called as
+        progress(files_done, files_total) each time files complete.
+        
+        With a VerificationCheckpoint, files that verified cleanly before and
+        are unchanged (same size, mtime, ctime and inode; plus the same
+        SHA-256 when rehash is set) are skipped, and newly clean files are
+        recorded. Files that fail are dropped from the checkpoint.
+        
+        With a ReplayDetector, the verified files' message_ids are checked
+        against every batch seen before; confirmed duplicates are listed in
+        totals['replayed'] and their files count as failed.
+        
+        With a FieldFilter only matching messages are verified. That is a
+        query, not an audit: no file is skipped, checkpointed or added to
+        the replay filter.
+        """
+        if match:
+            checkpoint = replay = None
+        files = all_files = collect_batch_files(paths)
+        totals = new_summary()
+        totals['replayed'] = []
+        if checkpoint is not None:
+            totals['missing'] = checkpoint.missing(files)
+            pending = [path for path in files if not checkpoint.is_verified(path, rehash)]
+            totals['skipped'] = len(files) - len(pending)
+            files = pending
+        if not files and replay is None:
+            return totals
+        
+        with_digest = checkpoint is not None
+        workers = workers or os.cpu_count() or 1
+        whole = files
+        parts = []
+        if workers > 1:
+            whole = []
+            for path in files:
+                ranges = self.split_file(path, workers)
+                if ranges:
+                    parts.append([(path, None, None)])
+                    parts.extend([part] for part in ranges)
+                else:
+                    whole.append(path)
+        
+        chunk_size = chunk_size or max(1, math.ceil(len(whole) / (workers * 4)))
+        tasks = [whole[i:i + chunk_size] for i in range(0, len(whole), chunk_size)] + parts
+        done = 0
+        
+        if workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                summary = merge_summaries(new_summary(), [self.verify_item(item, with_digest, match) for item in task])
+                merge_summaries(totals, [count_summary(summary)])
+                done += summary['files']
+                if progress and summary['files']:
+                    progress(done, len(files))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_verify_worker,
+                                     initargs=(self.key_server,)) as pool:
+                futures = [pool.submit(_verify_task, task, with_digest, match) for task in tasks]
+                for future in as_completed(futures):
+                    summary = count_summary(future.result())
+                    merge_summaries(totals, [summary])
+                    done += summary['files']
+                    if progress and summary['files']:
+                        progress(done, len(files))
+        
+        if replay is not None:
+            # All files, not just pending ones: batches checkpointed before the
+            # filter existed are added once; unchanged, already-scanned batches are skipped
+            broken = {os.path.abspath(f['file']) for f in totals['file_errors']}
+            totals['replayed'] = replay.scan([path for path in all_files if os.path.abspath(path) not in broken])
+            MESSAGES_REPLAYED.inc(len(totals['replayed']))
+        
+        if checkpoint is not None:
+            replayed_files = {os.path.abspath(f['file']) for f in totals['replayed']}
+            checkpoint.record([entry for entry in totals['verified'] if os.path.abspath(entry['path']) not in replayed_files])
+            failed_files = {f['file'] for f in totals['failed']} | {f['file'] for f in totals['file_errors']} | replayed_files
+            checkpoint.forget(sorted(failed_files))
+        
+        return totals
+    
+    def batch_context(self, path: str, cache: dict, index=None) -> dict:
+        """Header fields needed to verify a single record of a batch
+        
+        Compact Merkle batches carry no per-record proofs. Their tree is
+        rebuilt from the leaf hashes in the lookup index (the batch itself
+        is only read for its header and trailer); a tampered index simply
+        fails the signed root.
+        """
+        if path not in cache:
+            if is_compact_batch(path):
+                header = read_compact_header(path)
+                context = {"compact": True, "batch_id": header['batch_id'], "header": header}
+                if header.get('signing_mode') == "merkle":
+                    context.update(self.merkle_context(path, header, index))
+            else:
+                reader = JsonBatchReader(path)
+                reader.close()
+                context = dict(reader.header, compact=False)
+            cache[path] = context
+        return cache[path]
+    
+    def merkle_context(self, path: str, header: dict, index=None) -> dict:
+        if index is None:
+            from log_index import LogIndex
+            index = LogIndex(LOG_INDEX_FILE)
+        
+        trailer = read_compact_trailer(path)
+        if trailer is None:
+            raise ValueError("Incomplete compact batch (no trailer)")
+        spans = index.file_leaves(path)
+        if len(spans) != trailer['message_count'] or any(leaf is None for _, leaf in spans):
+            # Not indexed yet, or indexed before leaf hashes were stored
+            index.index_file(path, force=True)
+            spans = index.file_leaves(path)
+        
+        return {
+            "batch_signature": trailer.get('batch_signature', {}),
+            "public_key_info": {
+                "key_id": header['key_id'],
+                "algorithm": header['algorithm'],
+                "public_key": header['public_key']
+            },
+            "levels": build_levels([leaf for _, leaf in spans]),
+            "positions": {offset: position for position, (offset, _) in enumerate(spans)}
+        }
+    
+    def read_record(self, path: str, offset: int, length: int, context: dict) -> dict:
+        """Read one signed message straight from its byte range (one block for archived batches)"""
+        with open_batch(path) as f:
+            f.seek(offset)
+            record = json.loads(f.read(length))
+        
+        if not context['compact']:
+            return record
+        message = compact_record_to_message(record, context['header'])
+        if 'levels' in context:
+            position = context['positions'][offset]
+            message['proof'] = {
+                "index": position,
+                "path": [node.hex() for node in inclusion_proof(context['levels'], position)]
+            }
+        return message
+    
+    def lookup(self, message_id: str = None, start: str = None, end: str = None, index=None,
+               match: FieldFilter = None) -> dict:
+        """Find records through the index and verify only those
+        
+        Pass a message_id, or a start/end pair of ISO timestamps (prefixes
+        such as "2025-08-25T14:32" work; end is exclusive). Records that do
+        not match the FieldFilter are dropped before verification.
+        """
+        if index is None:
+            from log_index import LogIndex
+            index = LogIndex(LOG_INDEX_FILE)
+        
+        if message_id is not None:
+            locations = index.lookup_message(message_id)
+        elif start is not None and end is not None:
+            locations = index.lookup_range(start, end)
+        else:
+            raise ValueError("lookup needs a message_id or a start/end range")
+        
+        results = {"matches": len(locations), "valid": 0, "invalid": 0, "filtered": 0, "records": []}
+        contexts = {}
+        for path, offset, length in locations:
+            entry = {"file": path, "offset": offset}
+            try:
+                context = self.batch_context(path, contexts, index)
+                message = self.read_record(path, offset, length, context)
+                if match and not match.matches(message):
+                    results['filtered'] += 1
+                    continue
+                result = self.verify_batch_message(message, context)
+                fields_error = check_fields(message) if result['valid'] else None
+                if fields_error:
+                    result = {"valid": False, "error": fields_error}
+                entry.update({
+                    "message_id": message['message_id'],
+                    "timestamp": message['timestamp'],
+                    "original_message": message['original_message']
+                })
+            except Exception as e:
+                result = {"valid": False, "error": f"Lookup failed: {e}"}
+            
+            entry.update(result)
+            results['valid' if result['valid'] else 'invalid'] += 1
+            results['records'].append(entry)
+        
+        return results
+    
     def test_verification(self):
         """Test verification with the latest signed batch"""
         # Find the most recent signed file
-        signed_files = glob.glob(os.path.join(LOCAL_SIGNED_DIR, "*.json"))
+        signed_files = collect_batch_files(LOCAL_SIGNED_DIR)
         if not signed_files:
             print("❌ No signed files found. Run test_signing_service.py first.")
             return
@@ -224,8 +869,7 @@ class LocalSIEMVerifier:
         print(f"🔍 Testing verification of: {os.path.basename(latest_file)}")
         
         try:
-            with open(latest_file, 'r') as f:
-                batch_data = json.load(f)
+            batch_data = load_batch(latest_file)
             
             if 'messages' not in batch_data:
                 print("❌ Invalid batch file format")
@@ -235,8 +879,17 @@ class LocalSIEMVerifier:
             
             results = {"valid": 0, "invalid": 0, "errors": []}
             
+            if 'batch_signature' in batch_data:
+                root_result = self.verify_batch_signature(batch_data.get('batch_id', ''), batch_data['batch_signature'])
+                if root_result['valid']:
+                    print(f"✓ Batch root signature: Valid ({batch_data['batch_signature']['tree_size']} leaves)")
+                    if batch_data['batch_signature']['tree_size'] != len(batch_data['messages']):
+                        print("❌ Message count does not match the signed tree size - messages removed or duplicated")
+                else:
+                    print(f"❌ Batch root signature: {root_result['error']}")
+            
             for i, message in enumerate(batch_data['messages']):
-                result = self.verify_message(message)
+                result = self.verify_batch_message(message, batch_data)
                 
                 if result['valid']:
                     results['valid'] += 1
@@ -258,12 +911,12 @@ class LocalSIEMVerifier:
                     print(f"   - {error}")
             
             # Test tampering detection
-            self.test_tampering_detection(batch_data['messages'][0])
+            self.test_tampering_detection(batch_data['messages'][0], batch_data)
             
         except Exception as e:
             print(f"❌ Failed to process batch file: {e}")
     
-    def test_tampering_detection(self, original_message: dict):
+    def test_tampering_detection(self, original_message: dict, batch_data: dict = None):
         """Test that tampering is detected"""
         print(f"\n🔒 Testing tampering detection...")
         
@@ -271,7 +924,10 @@ class LocalSIEMVerifier:
         tampered_message = original_message.copy()
         tampered_message['original_message'] += " TAMPERED!"
         
-        result = self.verify_message(tampered_message)
+        if batch_data is not None:
+            result = self.verify_batch_message(tampered_message, batch_data)
+        else:
+            result = self.verify_message(tampered_message)
         
         if not result['valid'] and "tampering" in result['error'].lower():
             print("✓ Tampering correctly detected!")
@@ -281,13 +937,252 @@ class LocalSIEMVerifier:
             print(f"   Got: {result}")
 
 
+def collect_batch_files(paths) -> list:
+    """Expand files and directories into a sorted list of batch files"""
+    if isinstance(paths, str):
+        paths = [paths]
+    
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(list_batch_files(path))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def new_summary(files: int = 0) -> dict:
+    return {"files": files, "valid": 0, "invalid": 0, "filtered": 0, "failed": [], "file_errors": [], "verified": []}
+
+
+def merge_summaries(totals: dict, summaries: list) -> dict:
+    """Add per-file verification summaries into an aggregate"""
+    for summary in summaries:
+        totals['files'] += summary['files']
+        totals['valid'] += summary['valid']
+        totals['invalid'] += summary['invalid']
+        totals['filtered'] += summary['filtered']
+        totals['failed'].extend(summary['failed'])
+        totals['file_errors'].extend(summary['file_errors'])
+        totals['verified'].extend(summary['verified'])
+    return totals
+
+
+def count_summary(summary: dict) -> dict:
+    """Add a verification summary to the metrics counters; returns it unchanged"""
+    FILES_VERIFIED.inc(summary['files'])
+    MESSAGES_VALID.inc(summary['valid'])
+    MESSAGES_INVALID.inc(summary['invalid'])
+    FILE_ERRORS.inc(len(summary['file_errors']))
+    return summary
+
+
+# Per-process verifier for the bulk verification pool (key loaded once per worker)
+_worker_verifier = None
+
+
+def _init_verify_worker(key_server=None):
+    global _worker_verifier
+    _worker_verifier = LocalSIEMVerifier(verbose=False, key_server=key_server)
+
+
+def _verify_task(items: list, with_digest: bool = False, match: FieldFilter = None) -> dict:
+    return merge_summaries(new_summary(), [_worker_verifier.verify_item(item, with_digest, match) for item in items])
+
+
+def print_progress(done: int, total: int):
+    """Progress callback for bulk verification (one line per chunk)"""
+    print(f"   ... verified {done}/{total} files", flush=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local SIEM verifier")
+    parser.add_argument("--verify-all", nargs="*", metavar="PATH",
+                        help="Bulk verify batch files or directories (default: signed_logs)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Verification processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Batch files per worker task (default: about four tasks per worker)")
+    parser.add_argument("--progress", action="store_true",
+                        help="Report progress once per completed chunk")
+    parser.add_argument("--incremental", action="store_true",
+                        help="With --verify-all: skip batches already verified and unchanged")
+    parser.add_argument("--no-replay-check", dest="replay_check", action="store_false", default=REPLAY_CHECK,
+                        help="With --verify-all: skip replay / duplicate message_id detection")
+    parser.add_argument("--rehash", action="store_true",
+                        help="With --incremental: also re-hash skipped files to catch content changes")
+    parser.add_argument("--verify-chain", nargs="*", metavar="PATH",
+                        help="Check hash-chain continuity over batch headers (default: signed_logs)")
+    parser.add_argument("--lookup-id", metavar="MESSAGE_ID",
+                        help="Verify a single message found through the index")
+    parser.add_argument("--lookup-range", nargs=2, metavar=("START", "END"),
+                        help="Verify all messages with START <= timestamp < END (ISO, prefixes allowed)")
+    parser.add_argument("--rebuild-index", action="store_true",
+                        help="Rebuild the lookup index from signed_logs before looking up")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics on this port while verifying")
+    parser.add_argument("--key-server", default=KEY_SERVER_URL, metavar="URL",
+                        help="Fetch public keys from a key server (e.g. http://127.0.0.1:8765)")
+    fields = parser.add_argument_group("field filters (--verify-all and lookups: verify only matching records)")
+    fields.add_argument("--facility", nargs="+", metavar="NAME", help="Syslog facilities, e.g. auth authpriv or 4")
+    fields.add_argument("--max-severity", metavar="LEVEL", help="Most verbose severity to keep, e.g. warning or 4")
+    fields.add_argument("--host", nargs="+", help="Originating hosts")
+    fields.add_argument("--program", nargs="+", help="Program / app names")
+    return parser.parse_args()
+
+
+def field_filter(args) -> FieldFilter:
+    return FieldFilter(
+        facilities=[parse_level(name, FACILITIES) for name in args.facility] if args.facility else None,
+        max_severity=parse_level(args.max_severity, SEVERITIES) if args.max_severity else None,
+        hosts=args.host,
+        programs=args.program
+    )
+
+
+def chain_tip_file(directory: str) -> str:
+    """The signer tip file a directory's chain must end at (None if unknown)
+
+    signed_logs is the single-source chain; a partition written by
+    multi_source.py ends at state/sources/<name>/chain_tip.json.
+    """
+    directory = os.path.abspath(directory)
+    tip_name = os.path.basename(CHAIN_TIP_FILE)
+    if directory == os.path.abspath(LOCAL_SIGNED_DIR):
+        return CHAIN_TIP_FILE
+    if os.path.exists(SOURCES_FILE):
+        from multi_source import load_sources
+        
+        for source in load_sources(SOURCES_FILE):
+            if os.path.abspath(source['signed_dir']) == directory:
+                return os.path.join(source['state_dir'], tip_name)
+    if os.path.dirname(directory) == os.path.abspath(LOCAL_SIGNED_DIR):
+        # Partition named after its source (the default)
+        return os.path.join(LOCAL_STATE_DIR, "sources", os.path.basename(directory), tip_name)
+    return None
+
+
+def run_chain_verification(verifier: LocalSIEMVerifier, args):
+    # Every directory (signed_logs, each source partition) holds its own chain
+    paths = args.verify_chain or [LOCAL_SIGNED_DIR]
+    chains = {os.path.normpath(path): [] for path in paths if os.path.isdir(path)}
+    for path in collect_batch_files(paths):
+        chains.setdefault(os.path.normpath(os.path.dirname(path)), []).append(path)
+    
+    for directory, files in sorted(chains.items()):
+        expected_tip = None
+        tip_file = chain_tip_file(directory)
+        if tip_file and os.path.exists(tip_file):
+            with open(tip_file, 'r') as f:
+                expected_tip = json.load(f)
+        
+        results = verifier.verify_chain(files, expected_tip)
+        
+        print(f"\n⛓️ Chain Verification Results ({directory}):")
+        print(f"   Chained batches: {results['batches']}")
+        print(f"   Unchained (legacy) batches: {len(results['unchained'])}")
+        if results['tip']:
+            print(f"   Tip: sequence {results['tip']['sequence']} ({os.path.basename(results['tip']['file'])})")
+        if expected_tip is None and results['batches']:
+            print("   ⚠️ No signer tip found: batches deleted from the end cannot be detected")
+        
+        if results['errors']:
+            print(f"\n⚠️  {len(results['errors'])} chain problems found!")
+            for error in results['errors'][:10]:
+                print(f"   ❌ {os.path.basename(error['file'])}: {error['error']}")
+        else:
+            print("✓ Chain is continuous")
+
+
+def run_lookup(verifier: LocalSIEMVerifier, args):
+    from log_index import LogIndex
+    
+    index = LogIndex(LOG_INDEX_FILE)
+    if args.rebuild_index:
+        count = index.rebuild(LOCAL_SIGNED_DIR)
+        print(f"🗂️ Rebuilt index: {count} messages")
+    
+    match = field_filter(args)
+    if args.lookup_id:
+        results = verifier.lookup(message_id=args.lookup_id, index=index, match=match)
+    else:
+        results = verifier.lookup(start=args.lookup_range[0], end=args.lookup_range[1], index=index, match=match)
+    
+    print(f"🔎 {results['matches']} matching records")
+    if match:
+        print(f"   Filtered out (not verified): {results['filtered']}")
+    for record in results['records']:
+        status = "✓" if record['valid'] else f"❌ {record['error']}"
+        print(f"   {record.get('message_id', '?')} {record.get('timestamp', '')} {status}")
+        if 'original_message' in record:
+            print(f"      {record['original_message'][:80]}")
+
+
+def run_bulk_verification(verifier: LocalSIEMVerifier, args):
+    paths = args.verify_all or [LOCAL_SIGNED_DIR]
+    match = field_filter(args)
+    checkpoint = VerificationCheckpoint(VERIFY_CHECKPOINT_FILE) if args.incremental and not match else None
+    replay = None
+    if args.replay_check and not match:
+        from log_index import LogIndex
+        from replay_filter import ReplayDetector
+        replay = ReplayDetector(REPLAY_FILTER_FILE, LogIndex(LOG_INDEX_FILE), REPLAY_EXPECTED_IDS, REPLAY_ERROR_RATE)
+    results = verifier.verify_files(
+        paths,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        progress=print_progress if args.progress else None,
+        checkpoint=checkpoint,
+        rehash=args.rehash,
+        replay=replay,
+        match=match
+    )
+    
+    total = results['valid'] + results['invalid']
+    print(f"\n🎯 Bulk Verification Results:")
+    print(f"   Files: {results['files']}")
+    if checkpoint is not None:
+        print(f"   Unchanged (skipped): {results['skipped']}")
+        for path in results['missing'][:10]:
+            print(f"   ⚠️ Previously verified file is missing: {os.path.basename(path)}")
+    if match:
+        print(f"   Filtered out (not verified): {results['filtered']}")
+    print(f"   Valid: {results['valid']}")
+    print(f"   Invalid: {results['invalid']}")
+    if total:
+        print(f"   Success Rate: {results['valid']/total*100:.1f}%")
+    
+    for failure in results['failed'][:10]:
+        print(f"   ❌ {failure['message_id']} ({os.path.basename(failure['file'])}): {failure['error']}")
+    for failure in results['file_errors'][:10]:
+        print(f"   ❌ {os.path.basename(failure['file'])}: {failure['error']}")
+    if replay is not None:
+        print(f"   Replayed records: {len(results['replayed'])} "
+              f"({replay.stats['candidates']} filter hits over {replay.stats['checked']} new IDs)")
+        for failure in results['replayed'][:10]:
+            print(f"   ❌ {failure['message_id']} ({os.path.basename(failure['file'])}): {failure['error']}")
+    
+    METRICS.dump(VERIFIER_METRICS_FILE)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    
     print("🔐 Local SIEM Verifier Test")
     print("=" * 40)
     
-    verifier = LocalSIEMVerifier()
+    if args.metrics_port:
+        METRICS.serve(METRICS_HOST, args.metrics_port)
+    
+    verifier = LocalSIEMVerifier(key_server=args.key_server)
     
-    if verifier.public_key:
+    if verifier.public_key and args.verify_chain is not None:
+        run_chain_verification(verifier, args)
+    elif verifier.public_key and (args.lookup_id or args.lookup_range):
+        run_lookup(verifier, args)
+    elif verifier.public_key and args.verify_all is not None:
+        run_bulk_verification(verifier, args)
+    elif verifier.public_key:
         verifier.test_verification()
         
         print(f"\n🎯 Test completed!")
@@ -3,22 +3,73 @@ import os
 import time
 import json
 import hashlib
+import signal
+import argparse
+import threading
 from datetime import datetime
 from pathlib import Path
 from config.test_config import *
+from merkle import leaf_hash, build_levels, inclusion_proof
+from buffer_tail import BufferTailer, fsync_dir, stop_on_signals
+from batch_format import (
+    CompactBatchWriter, ListBatchWriter, COMPACT_EXTENSION, ROOT_SIGNATURE_VERSION, signing_data, root_signing_data
+)
+from hash_chain import ChainTip, ContentDigest
+from flush_policy import FlushPolicy
+from key_registry import KeyRegistry
+from metrics import METRICS, get_logger
+from syslog_fields import parse_fields, fields_dict
 
 # ✅ Use PyNaCl instead of old ed25519
 from nacl.signing import SigningKey, VerifyKey
 from nacl.exceptions import BadSignatureError
 
+log = get_logger("signer", LOG_LEVEL)
+
+# Per-stage signer metrics; hash/sign/serialize are sampled per message,
+# read/write are observed per chunk or per batch
+READ_SECONDS = METRICS.histogram("signer_read_seconds", "Time to read one chunk of input lines")
+HASH_SECONDS = METRICS.histogram("signer_hash_seconds", "Message-id hash time per message (sampled)")
+SIGN_SECONDS = METRICS.histogram("signer_sign_seconds", "Ed25519 signing time per message (sampled)")
+SERIALIZE_SECONDS = METRICS.histogram("signer_serialize_seconds", "Compact record encoding time per message (sampled)")
+WRITE_SECONDS = METRICS.histogram("signer_write_seconds", "Time to write, fsync and publish one batch")
+INDEX_SECONDS = METRICS.histogram("signer_index_seconds", "Time to index one published batch")
+LINES_READ = METRICS.counter("signer_lines_read_total", "Input lines read")
+MESSAGES_WRITTEN = METRICS.counter("signer_messages_written_total", "Signed messages published in batches")
+SIGN_FAILURES = METRICS.counter("signer_sign_failures_total", "Lines that could not be signed")
+BATCHES_WRITTEN = METRICS.counter("signer_batches_written_total", "Batch files published")
+BYTES_WRITTEN = METRICS.counter("signer_bytes_written_total", "Bytes of published batch files")
+
+
+def message_id_for(timestamp: str, log_line: str) -> str:
+    return hashlib.sha256(f"{timestamp}{log_line}".encode()).hexdigest()[:16]
+
 
 class LocalTestSigningService:
-    def __init__(self):
-        self.buffer_file = LOCAL_BUFFER_FILE
-        self.signed_dir = LOCAL_SIGNED_DIR
-        self.key_file = TEST_KEY_FILE
-        self.public_key_file = TEST_PUBLIC_KEY_FILE
-        self.key_id = "test_signer_v1"
+    def __init__(self, signing_mode=SIGNING_MODE, verbose=True, output_format=OUTPUT_FORMAT,
+                 buffer_file=None, signed_dir=None, key_id=None, key_file=None, public_key_file=None,
+                 state_dir=None):
+        """Paths and key default to config/test_config.py; multi_source.py overrides them per source"""
+        if signing_mode not in ("message", "merkle"):
+            raise ValueError(f"Unknown signing mode: {signing_mode}")
+        if output_format not in ("json", "ndjson"):
+            raise ValueError(f"Unknown output format: {output_format}")
+
+        self.buffer_file = buffer_file or LOCAL_BUFFER_FILE
+        self.signed_dir = signed_dir or LOCAL_SIGNED_DIR
+        self.key_file = key_file or TEST_KEY_FILE
+        self.public_key_file = public_key_file or TEST_PUBLIC_KEY_FILE
+        self.key_id = key_id or DEFAULT_KEY_ID
+        ensure_dirs()
+        state_dir = state_dir or LOCAL_STATE_DIR
+        self.buffer_checkpoint_file = os.path.join(state_dir, os.path.basename(BUFFER_CHECKPOINT_FILE))
+        self.chain_tip_file = os.path.join(state_dir, os.path.basename(CHAIN_TIP_FILE))
+        self.signing_mode = signing_mode
+        self.verbose = verbose
+        self.output_format = output_format
+        self.index = None
+        self.chain = None
+        self.batch_counter = 0
         
         # Create test log file if it doesn't exist
         # if not os.path.exists(self.buffer_file):
@@ -26,11 +77,18 @@ class LocalTestSigningService:
         
         # Load or generate keys
         self.load_or_generate_keys()
+        self.hash_id = METRICS.timed(message_id_for, HASH_SECONDS)
+        self.sign_bytes = METRICS.timed(self.private_key.sign, SIGN_SECONDS)
+        
+        if not self.verbose:
+            return
         
         print("🔧 Local Test Signing Service Initialized")
         print(f"   Buffer file: {self.buffer_file}")
         print(f"   Output directory: {self.signed_dir}")
         print(f"   Key ID: {self.key_id}")
+        print(f"   Signing mode: {self.signing_mode}")
+        print(f"   Output format: {self.output_format}")
     
     # def create_test_logs(self):
     #     """Create sample test logs"""
@@ -56,7 +114,8 @@ class LocalTestSigningService:
                     self.private_key = SigningKey(f.read())
                 with open(self.public_key_file, 'rb') as f:
                     self.public_key = VerifyKey(f.read())
-                print("✓ Loaded existing test keys")
+                if self.verbose:
+                    print("✓ Loaded existing test keys")
             else:
                 self.private_key = SigningKey.generate()
                 self.public_key = self.private_key.verify_key
@@ -67,6 +126,10 @@ class LocalTestSigningService:
                     f.write(self.public_key.encode())
                 
                 print("✓ Generated new test keys")
+            
+            registry = KeyRegistry(KEY_MANIFEST_FILE)
+            if self.key_id not in registry.entries:
+                registry.register(self.key_id, self.public_key.encode(), os.path.basename(self.public_key_file))
                 
         except Exception as e:
             print(f"❌ Key initialization failed: {e}")
@@ -75,13 +138,13 @@ class LocalTestSigningService:
     def create_rfc5848_structure(self, log_line: str) -> dict:
         """Create RFC 5848 inspired signed message structure"""
         timestamp = datetime.utcnow().isoformat() + "Z"
-        message_id = hashlib.sha256(f"{timestamp}{log_line}".encode()).hexdigest()[:16]
+        message_id = self.hash_id(timestamp, log_line)
         
         # Data to be signed
         signing_data = f"{message_id}{timestamp}{log_line}".encode()
-        signature = self.private_key.sign(signing_data).signature
+        signature = self.sign_bytes(signing_data).signature
         
-        return {
+        return self.add_fields({
             "version": "1.0",
             "message_id": message_id,
             "timestamp": timestamp,
@@ -91,66 +154,495 @@ class LocalTestSigningService:
                 "key_id": self.key_id,
                 "value": signature.hex()
             },
-            "public_key_info": {
-                "key_id": self.key_id,
-                "algorithm": "ed25519",
-                "public_key": self.public_key.encode().hex()
+            "public_key_info": self.public_key_info()
+        })
+    
+    def create_unsigned_structure(self, log_line: str) -> dict:
+        """Create a message for Merkle batch mode (covered by the batch root signature)"""
+        timestamp = datetime.utcnow().isoformat() + "Z"
+        message_id = self.hash_id(timestamp, log_line)
+        
+        return self.add_fields({
+            "version": "1.0",
+            "message_id": message_id,
+            "timestamp": timestamp,
+            "original_message": log_line
+        })
+    
+    def add_fields(self, message: dict) -> dict:
+        """Attach the syslog header fields: derived from the line, not covered by the signature"""
+        if EXTRACT_FIELDS:
+            fields = parse_fields(message['original_message'])
+            if fields is not None:
+                message["fields"] = fields_dict(fields)
+        return message
+    
+    def message_builder(self):
+        """Per-line message constructor for the current signing mode"""
+        if self.signing_mode == "merkle":
+            return self.create_unsigned_structure
+        return self.create_rfc5848_structure
+    
+    def public_key_info(self) -> dict:
+        """Public key block embedded in signed output"""
+        return {
+            "key_id": self.key_id,
+            "algorithm": "ed25519",
+            "public_key": self.public_key.encode().hex()
+        }
+    
+    def sign_merkle_batch(self, batch_id: str, messages: list) -> dict:
+        """Attach inclusion proofs to messages and sign the Merkle root once"""
+        leaves = [
+            leaf_hash(f"{m['message_id']}{m['timestamp']}{m['original_message']}".encode())
+            for m in messages
+        ]
+        levels = build_levels(leaves)
+        root = levels[-1][0].hex()
+        
+        for index, message in enumerate(messages):
+            message["proof"] = {
+                "index": index,
+                "path": [node.hex() for node in inclusion_proof(levels, index)]
             }
+        
+        return self.sign_merkle_root(batch_id, len(messages), root)
+    
+    def sign_merkle_root(self, batch_id: str, tree_size: int, root: str) -> dict:
+        """Sign a Merkle root, bound to its batch and size so proofs cannot be moved"""
+        signature = self.private_key.sign(root_signing_data(batch_id, tree_size, root)).signature
+        
+        return {
+            "algorithm": "ed25519",
+            "hash": "sha256-merkle",
+            "version": ROOT_SIGNATURE_VERSION,
+            "key_id": self.key_id,
+            "tree_size": tree_size,
+            "root": root,
+            "value": signature.hex()
         }
     
-    def process_buffer(self):
-        """Process the buffer file and sign logs"""
+    def process_buffer(self, workers=SIGNING_WORKERS):
+        """Process the buffer file and sign logs
+        
+        Signing starts at the committed buffer offset and each batch commits
+        its offset as it is published (as in follow_buffer), so a run that
+        fails part-way resumes after the batches it already wrote. The buffer
+        is cleared once every line is signed.
+        """
         try:
             if not os.path.exists(self.buffer_file) or os.path.getsize(self.buffer_file) == 0:
                 print("ℹ️ No logs to process")
                 return False
             
-            signed_messages = []
-            
-            # Read and process logs
-            with open(self.buffer_file, 'r') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if line:
-                        try:
-                            signed_msg = self.create_rfc5848_structure(line)
-                            signed_messages.append(signed_msg)
-                            print(f"✓ Signed log {line_num}: {line[:50]}...")
-                        except Exception as e:
-                            print(f"⚠️ Failed to sign line {line_num}: {e}")
-                            continue
+            tailer = BufferTailer(self.buffer_file, self.buffer_checkpoint_file)
+            if not tailer.open():
+                print("ℹ️ No logs to process")
+                return False
+            resumed = tailer.committed > 0
             
-            # Save signed messages
-            if signed_messages:
-                self.save_signed_batch(signed_messages)
-                open(self.buffer_file, 'w').close()  # clear buffer
-                return True
+            try:
+                if workers and workers > 1:
+                    written = self.process_buffer_parallel(workers, tailer)
+                else:
+                    written = self.process_buffer_lines(tailer)
+            finally:
+                tailer.close()
             
-            return False
+            if written or resumed:
+                self.clear_buffer(tailer)
+            return bool(written)
             
         except Exception as e:
             print(f"❌ Buffer processing failed: {e}")
             return False
     
-    def save_signed_batch(self, messages: list):
-        """Save signed messages to file"""
-        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-        filename = os.path.join(self.signed_dir, f"test_logs_{timestamp}.json")
+    def process_buffer_lines(self, tailer: BufferTailer) -> list:
+        """Sign the rest of the buffer into one batch; returns the batch files written"""
+        signed_messages = []
+        build_message = self.message_builder()
+        
+        # Read and process logs, about 1 MiB of lines at a time
+        line_num = 0
+        while True:
+            start = time.perf_counter()
+            lines = tailer.fh.readlines(1 << 20)
+            READ_SECONDS.observe(time.perf_counter() - start)
+            if not lines:
+                break
+            LINES_READ.inc(len(lines))
+            
+            for line in lines:
+                line_num += 1
+                tailer.position += len(line)
+                line = line.decode('utf-8', errors='replace').strip()
+                if line:
+                    try:
+                        signed_msg = build_message(line)
+                        signed_messages.append(signed_msg)
+                        log.debug("✓ Signed log %d: %s...", line_num, line[:50])
+                    except Exception as e:
+                        SIGN_FAILURES.inc()
+                        log.warning("⚠️ Failed to sign line %d: %s", line_num, e)
+                        continue
+        
+        log.info("✓ Signed %d logs", len(signed_messages))
+        
+        # Save signed messages
+        if not signed_messages:
+            return []
+        filename = self.next_batch_filename()
+        tailer.begin_commit(filename)
+        self.save_signed_batch(signed_messages, filename)
+        tailer.commit()
+        return [filename]
+    
+    def process_buffer_parallel(self, workers: int, tailer: BufferTailer) -> list:
+        """Sign the rest of the buffer on a pool of worker processes (order preserved)"""
+        from signing_pipeline import SigningPipeline
+        
+        def numbered_lines():
+            end = tailer.position
+            for line in tailer.fh:
+                end += len(line)
+                yield line.decode('utf-8', errors='replace'), end
+        
+        def publish(writer, end):
+            tailer.position = end
+            tailer.begin_commit(writer.path)
+            filename = self.finish_batch(writer)
+            tailer.commit()
+            return filename
+        
+        pipeline = SigningPipeline(self, workers=workers, batch_lines=FOLLOW_BATCH_LINES)
+        written = pipeline.run(numbered_lines(), publish)
+        
+        stats = pipeline.stats
+        print(f"✓ Signed {stats['signed']} logs on {workers} workers into {len(written)} batches")
+        if stats['failed']:
+            print(f"⚠️ Failed to sign {stats['failed']} lines")
+        return written
+    
+    def clear_buffer(self, tailer: BufferTailer):
+        """Truncate the fully signed buffer and restart its committed offset at 0"""
+        open(self.buffer_file, 'w').close()
+        tailer.committed = tailer.position = 0
+        tailer.save_checkpoint()
+    
+    def next_batch_filename(self) -> str:
+        """Pick a collision-free batch filename
+        
+        Names sort by time and add microseconds, the process id and a
+        per-process counter, so concurrent flushes in the same second (or
+        from several signer processes) never pick the same name.
+        """
+        now = datetime.utcnow()
+        extension = COMPACT_EXTENSION if self.output_format == "ndjson" else ".json"
+        
+        while True:
+            self.batch_counter += 1
+            stem = f"test_logs_{now.strftime('%Y%m%d_%H%M%S')}_{now.microsecond:06d}_{os.getpid()}_{self.batch_counter}"
+            filename = os.path.join(self.signed_dir, stem + extension)
+            if not os.path.exists(filename):
+                return filename
+    
+    def batch_id_for(self, filename: str) -> str:
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        return "test_batch_" + stem[len("test_logs_"):]
+    
+    def open_batch_writer(self, filename: str = None):
+        """Open a writer that accepts messages one at a time as they are signed
+        
+        The compact format streams each record to disk immediately; the
+        indented JSON layout has to collect the batch and write it on close.
+        """
+        if filename is None:
+            filename = self.next_batch_filename()
+        
+        if self.output_format == "ndjson":
+            writer = CompactBatchWriter(
+                filename,
+                self.batch_id_for(filename),
+                self.key_id,
+                self.public_key.encode().hex(),
+                signing_mode=self.signing_mode,
+                sign_root=self.sign_merkle_root,
+                chain_link=self.chain_link if HASH_CHAIN else None
+            )
+            # Records are encoded and buffered as they arrive (JSON batches serialize on close)
+            writer.write = METRICS.timed(writer.write, SERIALIZE_SECONDS)
+            return writer
+        return ListBatchWriter(self.save_json_batch, filename)
+    
+    def save_signed_batch(self, messages: list, filename: str = None) -> str:
+        """Save signed messages to file (atomically) and return its path"""
+        writer = self.open_batch_writer(filename)
+        try:
+            for message in messages:
+                writer.write(message)
+        except Exception:
+            writer.abort()
+            raise
+        
+        return self.finish_batch(writer)
+    
+    def finish_batch(self, writer) -> str:
+        """Close a batch writer, publishing the batch file; returns its path"""
+        count = writer.count
+        start = time.perf_counter()
+        filename = writer.close()
+        if self.chain is not None:
+            self.chain.commit()
+        WRITE_SECONDS.observe(time.perf_counter() - start)
+        MESSAGES_WRITTEN.inc(count)
+        BATCHES_WRITTEN.inc()
+        BYTES_WRITTEN.inc(os.path.getsize(filename))
+        print(f"💾 Saved {count} signed messages to {filename}")
+        
+        if INDEX_ON_WRITE:
+            start = time.perf_counter()
+            self.index_batch(filename)
+            INDEX_SECONDS.observe(time.perf_counter() - start)
+        return filename
+    
+    def index_batch(self, filename: str):
+        """Add a published batch to the lookup index (rebuildable, so failures only warn)"""
+        try:
+            if self.index is None:
+                from log_index import LogIndex
+                self.index = LogIndex(LOG_INDEX_FILE)
+            self.index.index_file(filename)
+        except Exception as e:
+            print(f"⚠️ Failed to index {filename}: {e}")
+    
+    def chain_link(self, batch_id: str, message_count: int, content_digest: str, filename: str) -> dict:
+        """Signed link to the previous batch; becomes the chain tip in finish_batch"""
+        if self.chain is None:
+            self.chain = ChainTip(self.chain_tip_file)
+        
+        link = self.chain.next_link(batch_id, message_count, content_digest, filename)
+        link["key_id"] = self.key_id
+        link["signature"] = self.private_key.sign(bytes.fromhex(link["batch_hash"])).signature.hex()
+        return link
+    
+    def save_json_batch(self, messages: list, filename: str) -> str:
+        """Write a batch in the indented JSON layout"""
+        batch_id = self.batch_id_for(filename)
         
         batch_data = {
             "version": "1.0",
-            "batch_id": f"test_batch_{timestamp}",
+            "batch_id": batch_id,
             "created": datetime.utcnow().isoformat() + "Z",
-            "message_count": len(messages),
-            "messages": messages
+            "message_count": len(messages)
         }
         
-        with open(filename, 'w') as f:
+        if self.signing_mode == "merkle":
+            # One signature per batch; header fields stay ahead of "messages"
+            batch_data["version"] = "1.1"
+            batch_data["batch_signature"] = self.sign_merkle_batch(batch_id, messages)
+            batch_data["public_key_info"] = self.public_key_info()
+        
+        if HASH_CHAIN:
+            digest = ContentDigest()
+            for message in messages:
+                digest.update(leaf_hash(signing_data(message)))
+            batch_data["chain"] = self.chain_link(batch_id, len(messages), digest.hexdigest(), filename)
+        
+        batch_data["messages"] = messages
+        
+        # Temp file + fsync + rename: the batch either exists complete or not at all
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, 'w') as f:
             json.dump(batch_data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename)
+        fsync_dir(self.signed_dir)
+        
+        return filename
+    
+    def follow_buffer(self, batch_lines=FOLLOW_BATCH_LINES, poll_interval=FOLLOW_POLL_INTERVAL,
+                      max_batches=None, exit_when_idle=False, policy=None):
+        """Follow the buffer file like `tail -F`, signing new lines incrementally
+        
+        Lines are read in large chunks from the checkpointed byte offset, at
+        most batch_lines at a time, so memory stays bounded by the batch size.
+        The offset is committed only after each batch is durably on disk, and
+        the buffer file is never truncated by the signer.
+        
+        Batches close according to policy (a FlushPolicy). Without one, a
+        batch is written after every read, as soon as input is available.
+        SIGINT/SIGTERM stop the loop between steps and publish the open batch.
+        """
+        if policy is None:
+            policy = FlushPolicy(max_messages=batch_lines, max_age=0, adaptive=False)
+        
+        tailer = BufferTailer(self.buffer_file, self.buffer_checkpoint_file)
+        build_message = self.message_builder()
+        
+        batches = 0
+        writer = None
+        filename = None
+        print(f"👀 Following {self.buffer_file} from offset {tailer.committed}")
+        
+        def flush():
+            tailer.begin_commit(filename)
+            self.finish_batch(writer)
+            tailer.commit()
+            policy.flushed()
+        
+        stop = threading.Event()
+        try:
+            with stop_on_signals(stop):
+                while not stop.is_set() and (max_batches is None or batches < max_batches):
+                    start = time.perf_counter()
+                    lines = tailer.read_lines(min(policy.remaining(), batch_lines))
+                    READ_SECONDS.observe(time.perf_counter() - start)
+                    LINES_READ.inc(len(lines))
+                    for line in lines:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            message = build_message(line)
+                        except Exception as e:
+                            SIGN_FAILURES.inc()
+                            log.warning("⚠️ Failed to sign line: %s", e)
+                            continue
+                        if writer is None:
+                            filename = self.next_batch_filename()
+                            writer = self.open_batch_writer(filename)
+                        writer.write(message)
+                        policy.add(len(line))
+                    
+                    if writer is not None and (policy.due() or (not lines and exit_when_idle)):
+                        flush()
+                        writer = None
+                        batches += 1
+                    elif writer is None and lines:
+                        # Only blank or unsignable lines: nothing to write, just move past them
+                        tailer.commit()
+                    elif not lines:
+                        if exit_when_idle:
+                            break
+                        stop.wait(min(poll_interval, policy.time_left()) if writer else poll_interval)
+                
+                if stop.is_set():
+                    print("\n⏹️ Stopped following buffer")
+                    if writer is not None:
+                        # Publish what was already signed; its offset commits with it
+                        flush()
+                        writer = None
+                        batches += 1
+        finally:
+            if writer is not None:
+                writer.abort()
+            tailer.close()
+        
+        return batches
+    
+    def sign_lines(self, lines: list) -> str:
+        """Sign already-received lines into one batch; returns the batch file"""
+        build_message = self.message_builder()
+        writer = self.open_batch_writer()
+        LINES_READ.inc(len(lines))
+        try:
+            for line in lines:
+                try:
+                    writer.write(build_message(line))
+                except Exception as e:
+                    SIGN_FAILURES.inc()
+                    log.warning("⚠️ Failed to sign line: %s", e)
+        except BaseException:
+            writer.abort()
+            raise
+        
+        if writer.count == 0:
+            writer.abort()
+            return None
+        return self.finish_batch(writer)
+    
+    def create_flush_policy(self) -> FlushPolicy:
+        """Flush controller configured for daemon mode"""
+        return FlushPolicy(
+            max_messages=FLUSH_MAX_MESSAGES,
+            max_bytes=FLUSH_MAX_BYTES,
+            max_age=FLUSH_MAX_AGE,
+            target_latency=FLUSH_TARGET_LATENCY,
+            adaptive=FLUSH_ADAPTIVE
+        )
+    
+    def create_receiver(self, host=SYSLOG_HOST, port=SYSLOG_PORT, spill=True, **kwargs):
+        """Syslog listener that signs received lines directly, bypassing the buffer file"""
+        from syslog_receiver import SyslogReceiver
+        
+        return SyslogReceiver(
+            self.sign_lines,
+            host=host,
+            port=port,
+            queue_size=kwargs.pop("queue_size", RECEIVER_QUEUE_SIZE),
+            batch_lines=kwargs.pop("batch_lines", RECEIVER_BATCH_LINES),
+            max_latency=kwargs.pop("max_latency", RECEIVER_MAX_LATENCY),
+            spill_file=RECEIVER_SPILL_FILE if spill else None,
+            **kwargs
+        )
+    
+    def run_receiver(self, host=SYSLOG_HOST, port=SYSLOG_PORT, spill=True, policy=None):
+        """Serve syslog over UDP and TCP until SIGINT/SIGTERM, flushing the open batch on exit"""
+        import asyncio
+        
+        receiver = self.create_receiver(host, port, spill, policy=policy)
         
-        print(f"💾 Saved {len(messages)} signed messages to {filename}")
+        async def serve():
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, lambda: asyncio.ensure_future(receiver.stop()))
+            await receiver.serve()
+        
+        print(f"📡 Listening for syslog on {host}:{port} (UDP + TCP)")
+        asyncio.run(serve())
+        print(f"\n⏹️ Receiver stopped: {receiver.stats}")
+        return receiver.stats
     
-    def run_test(self, cycles=3):
+    def run_daemon(self, source="buffer", host=SYSLOG_HOST, port=SYSLOG_PORT, metrics_port=METRICS_PORT):
+        """Long-running signer with the adaptive flush controller
+        
+        source is "buffer" (tail-follow LOCAL_BUFFER_FILE) or "receiver"
+        (syslog over UDP/TCP). Batches close on FLUSH_MAX_MESSAGES,
+        FLUSH_MAX_BYTES or FLUSH_MAX_AGE, whichever comes first, with the
+        message limit tuned to the input rate. SIGTERM shuts down cleanly.
+        Metrics are served on metrics_port and dumped to SIGNER_METRICS_FILE
+        every METRICS_DUMP_INTERVAL seconds and on exit. With ARCHIVE_ENABLED
+        a background compactor moves old batches into the archive tier.
+        """
+        policy = self.create_flush_policy()
+        print(f"🛠️ Daemon mode: max {FLUSH_MAX_MESSAGES} msgs / {FLUSH_MAX_BYTES} bytes / {FLUSH_MAX_AGE}s per batch")
+        
+        if metrics_port is not None:
+            METRICS.serve(METRICS_HOST, metrics_port)
+            print(f"📈 Metrics on http://{METRICS_HOST}:{metrics_port}/metrics")
+        stop_dump = METRICS.start_dump(SIGNER_METRICS_FILE, METRICS_DUMP_INTERVAL)
+        stop_archive = None
+        if ARCHIVE_ENABLED:
+            from archive import ArchiveCompactor
+            compactor = ArchiveCompactor(
+                self.signed_dir, ARCHIVE_MIN_AGE, ARCHIVE_CODEC, ARCHIVE_BLOCK_SIZE,
+                index_file=LOG_INDEX_FILE, checkpoint_file=VERIFY_CHECKPOINT_FILE
+            )
+            stop_archive = compactor.start(ARCHIVE_INTERVAL)
+            print(f"🗜️ Archiving batches older than {ARCHIVE_MIN_AGE}s every {ARCHIVE_INTERVAL}s ({ARCHIVE_CODEC})")
+        
+        try:
+            if source == "receiver":
+                return self.run_receiver(host, port, policy=policy)
+            return self.follow_buffer(batch_lines=FOLLOW_BATCH_LINES, policy=policy)
+        finally:
+            if stop_archive is not None:
+                stop_archive.set()
+            stop_dump.set()
+            METRICS.dump(SIGNER_METRICS_FILE)
+    
+    def run_test(self, cycles=3, workers=SIGNING_WORKERS):
         """Run a test sequence"""
         print("\n" + "="*50)
         print("🧪 STARTING LOCAL TEST")
@@ -160,7 +652,7 @@ class LocalTestSigningService:
             print(f"\n🔁 Test cycle {i+1}/{cycles}")
             print("-" * 30)
             
-            success = self.process_buffer()
+            success = self.process_buffer(workers=workers)
             if success:
                 print("✅ Cycle completed successfully")
             else:
@@ -193,10 +685,55 @@ class LocalTestSigningService:
         print("📝 Added 3 more test logs to buffer")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local test signing service")
+    parser.add_argument("--follow", action="store_true",
+                        help="Follow the buffer file like tail -F instead of running the test cycles")
+    parser.add_argument("--daemon", choices=["buffer", "receiver"],
+                        help="Run as a long-lived daemon with the adaptive flush controller")
+    parser.add_argument("--receive", action="store_true",
+                        help="Run the UDP/TCP syslog receiver and sign received lines directly")
+    parser.add_argument("--host", default=SYSLOG_HOST, help="Receiver bind address")
+    parser.add_argument("--port", type=int, default=SYSLOG_PORT, help="Receiver port (UDP and TCP)")
+    parser.add_argument("--no-spill", action="store_true",
+                        help="Drop (UDP) or push back (TCP) instead of spilling to disk when signing falls behind")
+    parser.add_argument("--batch-lines", type=int, default=FOLLOW_BATCH_LINES,
+                        help="Maximum lines per signed batch in follow mode")
+    parser.add_argument("--signing-mode", choices=["message", "merkle"], default=SIGNING_MODE)
+    parser.add_argument("--output-format", choices=["json", "ndjson"], default=OUTPUT_FORMAT,
+                        help="Indented JSON batches or compact newline-delimited batches")
+    parser.add_argument("--workers", type=int, default=SIGNING_WORKERS,
+                        help="Signing worker processes for process_buffer (1 = single-threaded)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help=f"Serve Prometheus metrics on this port (daemon mode default: {METRICS_PORT})")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    
+    if args.daemon:
+        service = LocalTestSigningService(signing_mode=args.signing_mode, output_format=args.output_format)
+        result = service.run_daemon(args.daemon, args.host, args.port, args.metrics_port or METRICS_PORT)
+        raise SystemExit(1 if isinstance(result, dict) and result["handler_errors"] else 0)
+    
+    if args.metrics_port:
+        METRICS.serve(METRICS_HOST, args.metrics_port)
+    
+    if args.receive:
+        service = LocalTestSigningService(signing_mode=args.signing_mode, output_format=args.output_format)
+        stats = service.run_receiver(args.host, args.port, spill=not args.no_spill)
+        # Batches the signer failed on were retried, but the operator should know
+        raise SystemExit(1 if stats["handler_errors"] else 0)
+    
+    if args.follow:
+        service = LocalTestSigningService(signing_mode=args.signing_mode, output_format=args.output_format)
+        service.follow_buffer(batch_lines=args.batch_lines)
+        raise SystemExit(0)
+    
     try:
-        service = LocalTestSigningService()
-        service.run_test(cycles=2)
+        service = LocalTestSigningService(signing_mode=args.signing_mode, output_format=args.output_format)
+        service.run_test(cycles=2, workers=args.workers)
         
         print("\n🎯 Next steps:")
         print("1. Check the 'signed_logs' directory for output")
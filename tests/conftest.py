@@ -0,0 +1,68 @@
+"""Shared fixtures: every test signs into its own temp dirs with its own key."""
+import os
+import sys
+import shutil
+import tempfile
+
+import pytest
+
+# config/test_config.py reads SIGNER_DATA_DIR at import, so set it before any repo module loads
+DATA_DIR = tempfile.mkdtemp(prefix="signer_tests_")
+os.environ["SIGNER_DATA_DIR"] = DATA_DIR
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def keys(tmp_path, monkeypatch):
+    """A non-default key registered in a temp manifest (keys/ in the repo stays untouched)"""
+    import test_signing_service
+    import test_siem_verifier
+
+    key_dir = tmp_path / "keys"
+    key_dir.mkdir()
+    for module in (test_signing_service, test_siem_verifier):
+        monkeypatch.setattr(module, "KEY_MANIFEST_FILE", str(key_dir / "manifest.json"))
+    return {
+        "key_id": "test_source",
+        "key_file": str(key_dir / "test_source.key"),
+        "public_key_file": str(key_dir / "test_source.pub")
+    }
+
+
+@pytest.fixture
+def make_service(tmp_path, keys):
+    """Build a quiet signing service whose buffer, output and state live under tmp_path"""
+    from test_signing_service import LocalTestSigningService
+
+    def make(**kwargs):
+        options = dict(
+            verbose=False,
+            buffer_file=str(tmp_path / "buffer.log"),
+            signed_dir=str(tmp_path / "signed"),
+            state_dir=str(tmp_path / "state"),
+            **keys
+        )
+        options.update(kwargs)
+        os.makedirs(options["signed_dir"], exist_ok=True)
+        os.makedirs(options["state_dir"], exist_ok=True)
+        return LocalTestSigningService(**options)
+
+    return make
+
+
+@pytest.fixture
+def make_verifier(keys):
+    """Build a verifier; call it after signing so the key registry includes the test key"""
+    from test_siem_verifier import LocalSIEMVerifier
+
+    return lambda: LocalSIEMVerifier(verbose=False, key_server=None)
+
+
+def write_buffer(path: str, count: int):
+    with open(path, 'w') as f:
+        for i in range(count):
+            f.write(f"<34>Oct 11 22:14:15 host{i % 3} sshd[{i}]: test line {i}\n")
@@ -0,0 +1,70 @@
+"""JSON Merkle batches must hold exactly the messages their root was signed over."""
+import json
+
+from conftest import write_buffer
+
+
+def signed_merkle_batch(make_service, count=50) -> str:
+    service = make_service(signing_mode="merkle", output_format="json")
+    write_buffer(service.buffer_file, count)
+    assert service.process_buffer(workers=1)
+    return latest_batch(service.signed_dir)
+
+
+def latest_batch(directory: str) -> str:
+    from batch_format import list_batch_files
+
+    return list_batch_files(directory)[-1]
+
+
+def rewrite_messages(path: str, pick):
+    """Keep the messages pick() returns; drop the chain block, which would catch this on its own"""
+    with open(path) as f:
+        batch = json.load(f)
+    batch.pop("chain", None)
+    batch["messages"] = pick(batch["messages"])
+    with open(path, 'w') as f:
+        json.dump(batch, f, indent=2)
+
+
+def errors(summary: dict) -> str:
+    return " ".join(e["error"] for e in summary["file_errors"])
+
+
+def test_intact_batch_verifies(make_service, make_verifier):
+    path = signed_merkle_batch(make_service)
+
+    summary = make_verifier().verify_file(path)
+
+    assert summary["valid"] == 50
+    assert not summary["invalid"] and not summary["file_errors"]
+
+
+def test_dropped_messages_are_reported(make_service, make_verifier):
+    path = signed_merkle_batch(make_service)
+    rewrite_messages(path, lambda messages: messages[:10])
+
+    summary = make_verifier().verify_file(path)
+
+    assert "does not match tree_size" in errors(summary)
+
+
+def test_duplicated_messages_are_reported(make_service, make_verifier):
+    path = signed_merkle_batch(make_service)
+    rewrite_messages(path, lambda messages: messages[:10] + messages[:10])
+
+    summary = make_verifier().verify_file(path)
+
+    assert summary["valid"] == 20
+    assert "does not match tree_size" in errors(summary)
+    assert "10 proof indices repeated" in errors(summary)
+
+
+def test_duplicates_padding_to_tree_size_are_reported(make_service, make_verifier):
+    path = signed_merkle_batch(make_service)
+    rewrite_messages(path, lambda messages: messages[:25] + messages[:25])
+
+    summary = make_verifier().verify_file(path)
+
+    assert "does not match tree_size" not in errors(summary)
+    assert "25 proof indices repeated" in errors(summary)
@@ -0,0 +1,79 @@
+"""process_buffer on worker processes: the parent's key, and no re-signing after a failure."""
+import json
+
+from batch_format import list_batch_files, load_batch
+from config.test_config import FOLLOW_BATCH_LINES
+from conftest import write_buffer
+
+
+def signed_lines(directory: str) -> list:
+    return [message["original_message"]
+            for path in sorted(list_batch_files(directory))
+            for message in load_batch(path)["messages"]]
+
+
+def verify_all(verifier, directory: str) -> dict:
+    summary = {"valid": 0, "invalid": 0, "file_errors": []}
+    for path in list_batch_files(directory):
+        result = verifier.verify_file(path)
+        for key in summary:
+            summary[key] += result[key]
+    return summary
+
+
+def test_workers_sign_with_the_services_key(make_service, make_verifier, keys):
+    service = make_service()
+    write_buffer(service.buffer_file, 300)
+
+    assert service.process_buffer(workers=2)
+
+    batch = load_batch(list_batch_files(service.signed_dir)[0])
+    assert {m["signature"]["key_id"] for m in batch["messages"]} == {keys["key_id"]}
+    summary = verify_all(make_verifier(), service.signed_dir)
+    assert summary == {"valid": 300, "invalid": 0, "file_errors": []}
+
+
+def test_failed_run_resumes_after_published_batches(make_service, make_verifier):
+    count = FOLLOW_BATCH_LINES * 2 + FOLLOW_BATCH_LINES // 2
+    service = make_service()
+    write_buffer(service.buffer_file, count)
+    finish_batch = service.finish_batch
+    published = []
+
+    def fail_second_batch(writer):
+        if published:
+            raise OSError("disk full")
+        published.append(writer.path)
+        return finish_batch(writer)
+
+    service.finish_batch = fail_second_batch
+    assert not service.process_buffer(workers=2)
+    assert len(list_batch_files(service.signed_dir)) == 1
+
+    service.finish_batch = finish_batch
+    assert service.process_buffer(workers=2)
+
+    lines = signed_lines(service.signed_dir)
+    assert len(lines) == len(set(lines)) == count
+    assert verify_all(make_verifier(), service.signed_dir)["invalid"] == 0
+    with open(service.buffer_checkpoint_file) as f:
+        assert json.load(f)["offset"] == 0
+
+
+def test_sequential_run_skips_lines_already_committed(make_service):
+    service = make_service()
+    write_buffer(service.buffer_file, FOLLOW_BATCH_LINES + 10)
+    finish_batch = service.finish_batch
+
+    def fail_last_batch(writer):
+        if writer.count < FOLLOW_BATCH_LINES:
+            raise OSError("disk full")
+        return finish_batch(writer)
+
+    service.finish_batch = fail_last_batch
+    assert not service.process_buffer(workers=2)
+    service.finish_batch = finish_batch
+    assert service.process_buffer(workers=1)
+
+    lines = signed_lines(service.signed_dir)
+    assert len(lines) == len(set(lines)) == FOLLOW_BATCH_LINES + 10
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Checkpoint store of fully verified batch files, so re-audits only touch new data."""
+import os
+import time
+import hashlib
+import sqlite3
+
+
+def file_fingerprint(path: str) -> tuple:
+    """Cheap change detector: (size, mtime_ns, ctime_ns, inode)
+
+    ctime cannot be set from user space, so rewriting a file and then
+    restoring its mtime still changes the fingerprint.
+    """
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino)
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class VerificationCheckpoint:
+    """SQLite record of batch files that verified cleanly.
+
+    A file is skipped on later runs while its fingerprint is unchanged.
+    With rehash=True the content hash is recomputed as well, which reads
+    every byte but still skips all signature work.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS verified (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                ctime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                message_count INTEGER NOT NULL,
+                verified_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self._rows = None
+
+    def close(self):
+        self.conn.close()
+
+    def rows(self) -> dict:
+        if self._rows is None:
+            self._rows = {
+                row[0]: row[1:]
+                for row in self.conn.execute(
+                    "SELECT path, size, mtime_ns, ctime_ns, inode, sha256 FROM verified"
+                )
+            }
+        return self._rows
+
+    def is_verified(self, path: str, rehash: bool = False) -> bool:
+        """True if path verified cleanly before and has not changed since"""
+        row = self.rows().get(os.path.abspath(path))
+        if row is None:
+            return False
+        try:
+            if file_fingerprint(path) != tuple(row[:4]):
+                return False
+            return not rehash or file_sha256(path) == row[4]
+        except FileNotFoundError:
+            return False
+
+    def missing(self, paths: list) -> list:
+        """Previously verified files that are no longer in the archive"""
+        present = {os.path.abspath(path) for path in paths}
+        return sorted(path for path in self.rows() if path not in present)
+
+    def record(self, entries: list):
+        """Store clean verification results: dicts with path, fingerprint, sha256, message_count"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO verified VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (os.path.abspath(e['path']), *e['fingerprint'], e['sha256'], e['message_count'], now)
+                    for e in entries
+                ]
+            )
+        self._rows = None
+
+    def forget(self, paths: list):
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM verified WHERE path = ?", [(os.path.abspath(p),) for p in paths]
+            )
+        self._rows = None